@@ -2,21 +2,28 @@ import streamlit as st
 import json
 import urllib.parse
 
-from utils.images import img_to_base64
-from utils.clients import carregar_cliente
+from utils.images import url_imagem
+from utils.clients import carregar_catalogo_resolvido
 from utils.importDatabase import carregar_database
+from utils import pedidos, previsao
+from utils.carrinho import Carrinho
+from utils.rotas import Destino
+from utils.api import iniciar_em_segundo_plano as iniciar_api
+from utils.instrumentacao import iniciar_rerun, finalizar_rerun
 from components.header import render_header
-from components.wpp_button import render_wpp_button
-from components.peca import render_peca
+from components.catalogo import render_grade_catalogo
 
 
 # -----------------------------------------------------------
 # CONFIG INICIAL
 # -----------------------------------------------------------
 st.set_page_config(page_title="ALCAM", layout="wide")
+iniciar_rerun("app")
 
-logo_base64 = img_to_base64("imagens/Logo.png")
-render_header(logo_base64)
+# API JSON no mesmo processo, se ALCAM_API_PORTA estiver definida (utils/api.py)
+iniciar_api()
+
+render_header(url_imagem("imagens/Logo.png"))
 
 ADMIN_PASSWORD = "SV2024"
 
@@ -69,48 +76,26 @@ if cliente_id == "":
     st.stop()
 
 # -----------------------------------------------------------
-# 1. PROCESSAR CLIENTE
+# 1. PROCESSAR CLIENTE E RESOLVER AS PEÇAS NA BASE DE PRODUTOS
 # -----------------------------------------------------------
+pecas_bd = carregar_database()
 
-dados_cliente = carregar_cliente(cliente_id)
+# catálogo já juntado com o índice, compartilhado entre sessões (utils/clients.py)
+resolvido = carregar_catalogo_resolvido(cliente_id, pecas_bd)
 
-if dados_cliente is None:
+if resolvido is None:
     st.error(f"❌ O cliente '{cliente_id}' não foi encontrado.")
     st.stop()
 
-nome_cliente = dados_cliente.get("cliente", cliente_id)
-contato_vendedor = dados_cliente.get("contato", "")
-
-# Normalizar lista de peças do cliente
-pecas_raw = dados_cliente.get("pecas", [])
+catalogo, pecas, faltando = resolvido
+nome_cliente = catalogo.cliente or cliente_id
+destino_padrao = Destino(catalogo.vendedor, catalogo.contato)
 
-codigos_pecas = []
-
-for item in pecas_raw:
-    if isinstance(item, dict):
-        # caso venha algo como {"codigo": "123"}
-        if "codigo" in item:
-            codigos_pecas.append(item["codigo"])
-        else:
-            st.warning(f"Formato inesperado de peça no cliente '{nome_cliente}': {item}")
-    else:
-        # caso seja apenas o código como string
-        codigos_pecas.append(item)
+for item in catalogo.itens_invalidos:
+    st.warning(f"Formato inesperado de peça no cliente '{nome_cliente}': {item}")
 
-
-# -----------------------------------------------------------
-# 2. CARREGAR BASE DE PRODUTOS DO DATABASE.JSON
-# -----------------------------------------------------------
-pecas_bd = carregar_database()
-
-pecas = []
-for codigo in codigos_pecas:
-    if codigo in pecas_bd:
-        item = pecas_bd[codigo].copy()
-        item["codigo"] = codigo
-        pecas.append(item)
-    else:
-        st.warning(f"⚠ Peça '{codigo}' não encontrada no database.")
+for codigo in faltando:
+    st.warning(f"⚠ Peça '{codigo}' não encontrada no database.")
 
 # -----------------------------------------------------------
 # 3. EXIBIR LISTA DE PEÇAS
@@ -118,19 +103,31 @@ for codigo in codigos_pecas:
 st.header(f"Reposição de Peças — {nome_cliente}")
 st.subheader("Selecione as peças desejadas abaixo:")
 
-pecas_selecionadas = []
-quantidades = {}
+# seleção preservada entre páginas, filtros e reruns; ao recarregar
+# a página, volta pelo token do carrinho salvo na URL
+chave_carrinho = f"carrinho_{cliente_id}"
+if chave_carrinho not in st.session_state:
+    carrinho = Carrinho()
+    carrinho.sincronizar_catalogo(pecas)
+    token = query_params.get("carrinho")
+    salvo = pedidos.carregar_carrinho(token, cliente_id) if token else None
+    if salvo is not None:
+        carrinho.token = token
+        carrinho.substituir(salvo)
+        st.session_state[f"carrinho_salvo_{cliente_id}"] = carrinho.versao
+    st.session_state[chave_carrinho] = carrinho
+
+carrinho = st.session_state[chave_carrinho]
+carrinho.sincronizar_catalogo(pecas)
 
 st.subheader("📦 Lista de Peças Disponíveis")
 
-for idx, peca in enumerate(pecas):
-    st.markdown("---")
-    render_peca(peca, idx, quantidades, pecas_selecionadas)
+# interações dentro da grade rodam só o fragmento (components/catalogo.py)
+# quantidade de costume e peças no prazo de reposição (só as do catálogo atual)
+sugestoes = previsao.sugestoes(cliente_id)
+if sugestoes:
+    sugestoes = {p.codigo: sugestoes[p.codigo] for p in pecas if p.codigo in sugestoes}
 
-if not pecas_selecionadas:
-    st.warning("Selecione pelo menos uma peça para continuar.")
-    st.stop()
+render_grade_catalogo(cliente_id, pecas, pecas_bd, carrinho, nome_cliente, destino_padrao, sugestoes)
 
-texto_itens = "\n".join([f"- {p['nome']} (código {p['codigo']}) — Quantidade: {quantidades[p['codigo']]}" for p in pecas_selecionadas])
-mensagem = f"Pedido de Reposição de Peças\nCliente: {nome_cliente}\n\nItens Selecionados:\n{texto_itens}"
-render_wpp_button(contato_vendedor, mensagem)
\ No newline at end of file
+finalizar_rerun()
@@ -0,0 +1,236 @@
+"""Benchmarks do caminho de carga, renderização e gravação do catálogo.
+
+Uso:
+    python -m benchmarks.bench_catalogo
+    python -m benchmarks.bench_catalogo --produtos 1000 100000 1000000 --pecas 10 1000 10000
+    python -m benchmarks.bench_catalogo --saida bench.jsonl --sem-apptest
+
+Cada combinação (produtos x peças por cliente) roda num processo
+separado, sobre uma base sintética criada num diretório temporário.
+Cada medição é uma linha JSON (bench, tamanhos, ms_min/ms_mediana/ms_max,
+commit), fácil de comparar entre versões.
+"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _medir(func, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        "ms_min": round(min(tempos), 3),
+        "ms_mediana": round(statistics.median(tempos), 3),
+        "ms_max": round(max(tempos), 3),
+        "repeticoes": repeticoes,
+    }
+
+
+def _conferir_envio(envio, limite, pecas, quantidades):
+    """Pedido grande: toda parte cabe no limite e cada item aparece uma vez, na ordem."""
+    from utils.mensagem import ROTULOS
+
+    if any(len(parte.url) > limite for parte in envio.partes):
+        raise RuntimeError("mensagem acima do limite da URL")
+    esperado = [(p.codigo, quantidades[p.codigo]) for p in pecas]
+    if envio.formato == "compacto":
+        itens = []
+        for parte in envio.partes:
+            for linha in parte.texto.split(ROTULOS["compacto"] + "\n", 1)[1].splitlines():
+                codigo, qtd = linha.rsplit(" x", 1)
+                itens.append((codigo, int(qtd)))
+        if itens != esperado:
+            raise RuntimeError("itens perdidos ou fora de ordem na mensagem")
+
+
+def _rodar_cenario(produtos, clientes, pecas, repeticoes, apptest):
+    """Executa todas as medições de um tamanho e imprime uma linha JSON por medição."""
+    sys.path.insert(0, RAIZ)
+    logging.disable(logging.CRITICAL)
+
+    from benchmarks.gerar_dados import gerar_base
+
+    tmp = tempfile.mkdtemp(prefix="bench_catalogo_")
+    try:
+        ids = gerar_base(tmp, produtos=produtos, clientes=clientes, pecas=pecas)
+        shutil.copy(os.path.join(RAIZ, "imagens", "Logo.png"), os.path.join(tmp, "imagens"))
+        os.chdir(tmp)
+
+        from utils import storage
+        from utils.importDatabase import carregar_database, invalidar_database
+        from utils.mensagem import LIMITE_TEXTO, linha_item, montar_mensagem, montar_por_destino
+        from utils.rotas import Destino, Rotas
+        from utils.modelo import Catalogo
+
+        rng = random.Random(0)
+        tamanho = {"produtos": produtos, "clientes": clientes, "pecas": pecas}
+
+        def emitir(nome, medida):
+            print(json.dumps({"bench": nome, **tamanho, **medida}), flush=True)
+
+        # ---------------- carga ----------------
+        emitir("carga.migracao_json", _medir(storage.conectar, 1))
+
+        def carregar_frio():
+            invalidar_database()
+            carregar_database()
+
+        emitir("carga.carregar_database_frio", _medir(carregar_frio, repeticoes))
+        emitir("carga.carregar_database_quente", _medir(carregar_database, repeticoes))
+        emitir("carga.carregar_cliente", _medir(lambda: storage.carregar_cliente(rng.choice(ids)), repeticoes))
+
+        # ---------------- consultas ----------------
+        codigos = list(carregar_database())
+        amostra = [rng.choice(codigos) for _ in range(1000)]
+
+        def consultar():
+            for codigo in amostra:
+                storage.obter_produto(codigo)
+
+        emitir("consulta.obter_produto_x1000", _medir(consultar, repeticoes))
+
+        # ---------------- preparação da renderização ----------------
+        dados = storage.carregar_cliente(ids[0])
+        catalogo = Catalogo.de_dict(dados)
+        indice = carregar_database()
+        # mesmo nome de antes para comparar com medições antigas
+        emitir("render.resolver_catalogo", _medir(lambda: catalogo.resolver(indice), repeticoes))
+
+        selecionadas, _ = catalogo.resolver(indice)
+        quantidades = {p.codigo: rng.randrange(1, 10) for p in selecionadas}
+        emitir("mensagem.montar_mensagem_todas",
+               _medir(lambda: montar_mensagem(dados["cliente"], selecionadas, quantidades), repeticoes))
+        envio = montar_mensagem(dados["cliente"], selecionadas, quantidades)
+        _conferir_envio(envio, LIMITE_TEXTO, selecionadas, quantidades)
+        emitir("mensagem.tamanho_envio", {"formato": envio.formato, "partes": len(envio.partes),
+                                          "caracteres": envio.tamanho})
+
+        # divisão por vendedor: regras por peça e por prefixo do código
+        vendedores = {v: {"nome": v, "contato": f"55{i}"} for i, v in enumerate(("a", "b", "c", "d"))}
+        rotas = Rotas(
+            vendedores,
+            pecas={codigo: "c" for codigo in rng.sample(codigos, min(1000, len(codigos)))},
+            categorias={"P000": "a", "P0001": "b", "P00002": "d"},
+        )
+        itens = [(p.codigo, linha_item(p, quantidades[p.codigo])) for p in selecionadas]
+        padrao = Destino(dados["vendedor"], dados["contato"])
+        emitir("mensagem.montar_por_destino",
+               _medir(lambda: montar_por_destino(dados["cliente"], itens, rotas, padrao), repeticoes))
+
+        # ---------------- diretório de clientes ----------------
+        emitir("diretorio.listar_clientes_pagina",
+               _medir(lambda: storage.listar_clientes(ordem="qtd_pecas", limite=20), repeticoes))
+        emitir("diretorio.sincronizar_clientes_json", _medir(storage.sincronizar_clientes_json, repeticoes))
+
+        # ---------------- gravações ----------------
+        produto = dict(storage.obter_produto(codigos[0]))
+
+        def salvar_produto():
+            produto["nome"] = f"Produto alterado {rng.random()}"
+            storage.salvar_produto(produto)
+
+        emitir("salvar.salvar_produto", _medir(salvar_produto, repeticoes))
+        emitir("salvar.salvar_cliente", _medir(lambda: storage.salvar_cliente(ids[0], dados), repeticoes))
+        emitir("salvar.exportar_produtos_json", _medir(storage.exportar_produtos_json, max(1, repeticoes // 3)))
+        emitir("salvar.exportar_cliente_json", _medir(lambda: storage.exportar_cliente_json(ids[0]), repeticoes))
+
+        # ---------------- páginas completas (headless) ----------------
+        if apptest:
+            from streamlit.testing.v1 import AppTest
+
+            def rodar_app():
+                at = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=600)
+                at.query_params["cliente"] = ids[0]
+                at.run()
+                if at.exception:
+                    raise RuntimeError(at.exception[0].message)
+
+            def rodar_clientes():
+                at = AppTest.from_file(os.path.join(RAIZ, "pages", "allClients.py"), default_timeout=600)
+                at.run()
+                if at.exception:
+                    raise RuntimeError(at.exception[0].message)
+
+            emitir("apptest.app_primeira_execucao", _medir(rodar_app, 1))
+            emitir("apptest.app", _medir(rodar_app, repeticoes))
+            emitir("apptest.allClients", _medir(rodar_clientes, repeticoes))
+    finally:
+        os.chdir(RAIZ)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--produtos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--pecas", type=int, nargs="+", default=[10, 100, 1000], help="peças por cliente")
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--sem-apptest", action="store_true", help="não mede as páginas completas")
+    parser.add_argument("--saida", help="arquivo JSONL (padrão: só stdout)")
+    parser.add_argument("--um", type=int, nargs=3, metavar=("PRODUTOS", "CLIENTES", "PECAS"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.um:
+        _rodar_cenario(*args.um, repeticoes=args.repeticoes, apptest=not args.sem_apptest)
+        return
+
+    extra = {
+        "commit": _commit_atual(),
+        "python": sys.version.split()[0],
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    saida = open(args.saida, "a", encoding="utf-8") if args.saida else None
+
+    try:
+        for produtos in args.produtos:
+            for pecas in args.pecas:
+                cmd = [sys.executable, "-m", "benchmarks.bench_catalogo",
+                       "--um", str(produtos), str(args.clientes), str(pecas),
+                       "--repeticoes", str(args.repeticoes)]
+                if args.sem_apptest:
+                    cmd.append("--sem-apptest")
+
+                proc = subprocess.run(cmd, cwd=RAIZ, capture_output=True, text=True)
+                if proc.returncode != 0:
+                    print(proc.stderr, file=sys.stderr)
+                    raise SystemExit(f"cenário {produtos} produtos / {pecas} peças falhou")
+
+                for linha in proc.stdout.splitlines():
+                    if not linha.startswith("{"):
+                        continue
+                    registro = json.dumps({**json.loads(linha), **extra})
+                    print(registro)
+                    if saida:
+                        saida.write(registro + "\n")
+    finally:
+        if saida:
+            saida.close()
+
+
+if __name__ == "__main__":
+    main()
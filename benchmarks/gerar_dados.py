@@ -0,0 +1,98 @@
+"""Gera uma base sintética (database.json + clientes/*.json + imagens) para benchmarks.
+
+Uso:
+    python -m benchmarks.gerar_dados DESTINO --produtos 100000 --clientes 50 --pecas 1000
+"""
+import argparse
+import json
+import os
+import random
+
+from PIL import Image
+
+PALAVRAS = (
+    "botao emergencia cogumelo chave seccionadora contator rele termico disjuntor "
+    "motor sensor indutivo capacitivo fusivel cabo terminal borne fonte inversor "
+    "frequencia painel lampada sinalizacao trava porta fim curso encoder"
+).split()
+
+QTD_IMAGENS = 20  # imagens distintas reaproveitadas entre os produtos
+
+
+def _texto(rng, n):
+    return " ".join(rng.choice(PALAVRAS) for _ in range(n))
+
+
+def gerar_imagens(destino, qtd=QTD_IMAGENS, tamanho=(800, 600), seed=0):
+    rng = random.Random(seed)
+    pasta = os.path.join(destino, "imagens")
+    os.makedirs(pasta, exist_ok=True)
+
+    caminhos = []
+    for i in range(qtd):
+        cor = tuple(rng.randrange(256) for _ in range(3))
+        caminho = f"imagens/sintetica_{i:02d}.jpg"
+        Image.new("RGB", tamanho, cor).save(os.path.join(destino, caminho), quality=90)
+        caminhos.append(caminho)
+    return caminhos
+
+
+def gerar_produtos(qtd, imagens, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "codigo": f"P{i:07d}",
+            "nome": _texto(rng, 3).capitalize(),
+            "descricao": f"{_texto(rng, 8)} modelo {rng.randrange(10000)}",
+            "imagem": imagens[i % len(imagens)],
+        }
+        for i in range(qtd)
+    ]
+
+
+def gerar_clientes(qtd, pecas_por_cliente, codigos, seed=0):
+    rng = random.Random(seed)
+    vendedores = [f"vendedor_{i}" for i in range(max(1, qtd // 10))]
+    k = min(pecas_por_cliente, len(codigos))
+    return {
+        f"cliente_{i:05d}": {
+            "cliente": f"Cliente {i:05d}",
+            "vendedor": rng.choice(vendedores),
+            "contato": f"55159{rng.randrange(10**8):08d}",
+            "formato": 2,
+            "pecas": rng.sample(codigos, k),
+            "personalizacoes": {},
+        }
+        for i in range(qtd)
+    }
+
+
+def gerar_base(destino, produtos=1000, clientes=10, pecas=100, seed=0):
+    """Cria a base em `destino` e devolve os ids dos clientes gerados."""
+    os.makedirs(os.path.join(destino, "database"), exist_ok=True)
+    os.makedirs(os.path.join(destino, "clientes"), exist_ok=True)
+
+    imagens = gerar_imagens(destino, seed=seed)
+    lista = gerar_produtos(produtos, imagens, seed=seed)
+    with open(os.path.join(destino, "database", "database.json"), "w", encoding="utf-8") as f:
+        json.dump(lista, f, ensure_ascii=False)
+
+    catalogos = gerar_clientes(clientes, pecas, [p["codigo"] for p in lista], seed=seed)
+    for cliente_id, dados in catalogos.items():
+        with open(os.path.join(destino, "clientes", f"{cliente_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(dados, f, ensure_ascii=False)
+
+    return list(catalogos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("destino")
+    parser.add_argument("--produtos", type=int, default=1000)
+    parser.add_argument("--clientes", type=int, default=10)
+    parser.add_argument("--pecas", type=int, default=100, help="peças por cliente")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    ids = gerar_base(args.destino, args.produtos, args.clientes, args.pecas, args.seed)
+    print(f"{args.produtos} produtos e {len(ids)} clientes gerados em {args.destino}")
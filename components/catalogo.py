@@ -0,0 +1,181 @@
+import streamlit as st
+
+from utils import pedidos
+from utils.rotas import ErroRotas, Rotas, carregar_rotas
+from utils.busca import obter_indice
+from utils.instrumentacao import rerun_fragmento
+from components.peca import render_peca
+from components.paginacao import render_paginacao
+from components.wpp_button import render_wpp_button
+
+# -----------------------------------------------------------
+# Catálogo do cliente em fragmentos (st.fragment).
+#
+# Marcar uma peça, mudar quantidade, filtrar, paginar ou usar
+# as ações em lote roda de novo só a grade: a página visível e
+# o resumo do pedido. Cabeçalho, cliente, base de produtos e a
+# resolução do catálogo ficam de fora, então o tempo de cada
+# interação depende do tamanho da página, não do catálogo.
+#
+# Os argumentos são os da última execução completa do script.
+# -----------------------------------------------------------
+@st.fragment
+def render_grade_catalogo(cliente_id, pecas, pecas_bd, carrinho, nome_cliente, destino_padrao, sugestoes):
+    with rerun_fragmento("app.grade"):
+        filtro = st.text_input(
+            "🔎 Filtrar peças",
+            key=f"filtro_{cliente_id}",
+            placeholder="nome, descrição ou código"
+        )
+
+        # (posição no catálogo, peça) — a posição mantém as chaves dos widgets estáveis
+        if filtro.strip():
+            por_codigo = {p.codigo: (idx, p) for idx, p in enumerate(pecas)}
+            ranking = obter_indice(pecas_bd).buscar(filtro, k=len(pecas), codigos=por_codigo)
+            visiveis = [por_codigo[codigo] for codigo, _ in ranking]
+            if not visiveis:
+                st.info("Nenhuma peça corresponde ao filtro.")
+        else:
+            visiveis = list(enumerate(pecas))
+            ranking = pedidos.ranking_pecas(cliente_id)
+            if ranking and st.toggle("⭐ Mais pedidas primeiro", value=True, key=f"frequentes_{cliente_id}"):
+                posicao = {codigo: i for i, codigo in enumerate(ranking)}
+                visiveis.sort(key=lambda item: (posicao.get(item[1].codigo, len(posicao)), item[0]))
+
+        _render_previstas(cliente_id, carrinho, sugestoes)
+        _render_acoes_em_lote(cliente_id, carrinho, [p.codigo for _, p in visiveis])
+
+        # Só a janela visível cria widgets e carrega imagens
+        inicio, fim = render_paginacao(len(visiveis), chave=f"pag_{cliente_id}")
+
+        for idx, peca in visiveis[inicio:fim]:
+            st.markdown("---")
+            render_peca(peca, idx, carrinho, sugestoes.get(peca.codigo))
+
+        render_resumo_pedido(cliente_id, carrinho, nome_cliente, destino_padrao)
+
+
+# Peças no prazo de reposição (utils/previsao.py)
+def _render_previstas(cliente_id, carrinho, sugestoes):
+    previstas = {codigo: s.quantidade for codigo, s in sugestoes.items() if s.devido}
+    if not previstas:
+        return
+    col_aviso, col_botao = st.columns([3, 1], vertical_alignment="center")
+    with col_aviso:
+        st.info(f"🔔 {len(previstas)} peça(s) no prazo de reposição.")
+    with col_botao:
+        st.button(
+            "Selecionar previstas",
+            key=f"previstas_{cliente_id}",
+            help="Marca essas peças com a quantidade de costume.",
+            on_click=carrinho.adicionar,
+            args=(previstas,)
+        )
+
+
+# Ações em lote (valem para as peças que passam pelo filtro)
+def _render_acoes_em_lote(cliente_id, carrinho, codigos_visiveis):
+    key_qtd = f"qtd_lote_{cliente_id}"
+
+    def aplicar_quantidade():
+        carrinho.quantidade_em_lote(st.session_state[key_qtd])
+
+    ultimo = pedidos.ultimo_pedido(cliente_id)
+
+    col_todos, col_limpar, col_qtd, col_aplicar, col_repetir = st.columns(
+        [1, 1, 1, 1, 1], vertical_alignment="bottom"
+    )
+    with col_todos:
+        st.button(
+            "Selecionar todas",
+            key=f"todos_{cliente_id}",
+            on_click=carrinho.selecionar_todos,
+            args=(codigos_visiveis,)
+        )
+    with col_limpar:
+        st.button("Limpar seleção", key=f"limpar_{cliente_id}", on_click=carrinho.limpar)
+    with col_qtd:
+        st.number_input("Quantidade para todas", min_value=1, step=1, value=1, key=key_qtd)
+    with col_aplicar:
+        st.button("Aplicar quantidade", key=f"aplicar_{cliente_id}", on_click=aplicar_quantidade)
+    with col_repetir:
+        st.button(
+            "🔁 Repetir último pedido",
+            key=f"repetir_{cliente_id}",
+            disabled=ultimo is None,
+            help=f"Pedido nº {ultimo['id']}" if ultimo else "Nenhum pedido registrado ainda.",
+            on_click=carrinho.substituir,
+            args=(ultimo["itens"] if ultimo else {},)
+        )
+
+
+# -----------------------------------------------------------
+# Resumo do pedido + confirmação + botões do WhatsApp
+# -----------------------------------------------------------
+# Fragmento próprio dentro da grade: roda junto com ela e, se
+# ganhar widgets, pode rodar sozinho sem refazer a página.
+# `destino_padrao` (utils.rotas.Destino) recebe as peças sem regra
+# de rota; com regras, cada vendedor ganha o seu botão.
+@st.fragment
+def render_resumo_pedido(cliente_id, carrinho, nome_cliente, destino_padrao):
+    with rerun_fragmento("app.resumo"):
+        _salvar_carrinho(cliente_id, carrinho)
+
+        st.markdown("---")
+        chave_enviado = f"pedido_registrado_{cliente_id}"
+
+        registrado = st.session_state.get(chave_enviado)
+        if registrado and not len(carrinho):
+            numero, envios = registrado
+            if len(envios) == 1:
+                st.success(f"Pedido nº {numero} registrado. Envie ao vendedor pelo WhatsApp:")
+                render_wpp_button(envios[0][0].contato, envios[0][1])
+                return
+            st.success(f"Pedido nº {numero} registrado. Envie a parte de cada vendedor pelo WhatsApp:")
+            for destino, envio in envios:
+                st.markdown(f"**{destino.nome or destino.contato}**")
+                render_wpp_button(destino.contato, envio)
+            return
+
+        if not len(carrinho):
+            st.warning("Selecione pelo menos uma peça para continuar.")
+            return
+
+        rotas = _carregar_rotas()
+        st.write(f"**{len(carrinho)} peça(s) selecionada(s) · {carrinho.unidades} unidade(s)**")
+        envios = carrinho.mensagens(nome_cliente, destino_padrao, rotas)
+        if len(envios) > 1:
+            st.caption(
+                f"O pedido será dividido entre {len(envios)} vendedores: "
+                + ", ".join(destino.nome or destino.contato for destino, _ in envios)
+            )
+        if st.button("✅ Confirmar pedido", key=f"confirmar_{cliente_id}", type="primary"):
+            numero = pedidos.registrar_pedido(cliente_id, carrinho.itens().items(), carrinho.token)
+            st.session_state[chave_enviado] = (numero, carrinho.mensagens(nome_cliente, destino_padrao, rotas, numero))
+            carrinho.limpar()
+            # a grade também precisa desmarcar as peças
+            st.rerun()
+
+
+def _carregar_rotas():
+    try:
+        return carregar_rotas()
+    except ErroRotas as e:
+        st.error(f"Regras de rota ignoradas: {e}")
+        return Rotas()
+
+
+def _salvar_carrinho(cliente_id, carrinho):
+    """Grava o carrinho quando ele mudou e põe o token na URL (?carrinho=...)."""
+    chave_salva = f"carrinho_salvo_{cliente_id}"
+    if st.session_state.get(chave_salva) == carrinho.versao:
+        return
+
+    if carrinho.token is None:
+        if not len(carrinho):
+            return
+        carrinho.token = pedidos.novo_token()
+    pedidos.salvar_carrinho(carrinho.token, cliente_id, carrinho.itens())
+    st.session_state[chave_salva] = carrinho.versao
+    if st.query_params.get("carrinho") != carrinho.token:
+        st.query_params["carrinho"] = carrinho.token
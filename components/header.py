@@ -1,6 +1,7 @@
 import streamlit as st
 
-def render_header(logo_base64):
+# `logo_src` é a URL da imagem (utils.images.url_imagem)
+def render_header(logo_src):
     st.markdown(f"""
     <style>
     .header {{
@@ -23,7 +24,7 @@ def render_header(logo_base64):
     </style>
 
     <div class="header">
-        <img src="data:image/png;base64,{logo_base64}">
+        <img src="{logo_src}">
         <h1>ALCAM — Reposição de Peças</h1>
     </div>
     """, unsafe_allow_html=True)
@@ -0,0 +1,50 @@
+import math
+
+import streamlit as st
+
+TAMANHOS_PAGINA = [10, 20, 50, 100]
+TAMANHO_PAGINA_PADRAO = 20
+
+# -----------------------------------------------------------
+# Controle de paginação: devolve a fatia (inicio, fim) visível
+# -----------------------------------------------------------
+def render_paginacao(total, chave, tamanho_padrao=TAMANHO_PAGINA_PADRAO, rotulo="peças"):
+    key_tam = f"{chave}_tamanho"
+    key_pag = f"{chave}_pagina"
+
+    if key_tam not in st.session_state:
+        st.session_state[key_tam] = tamanho_padrao
+    if key_pag not in st.session_state:
+        st.session_state[key_pag] = 1
+
+    col_tam, col_pag, col_info = st.columns([1.2, 1.2, 3])
+
+    with col_tam:
+        tamanho = st.selectbox(
+            "Itens por página",
+            sorted(set(TAMANHOS_PAGINA) | {tamanho_padrao}),
+            key=key_tam,
+        )
+
+    total_paginas = max(1, math.ceil(total / tamanho))
+    if st.session_state[key_pag] > total_paginas:
+        st.session_state[key_pag] = total_paginas
+
+    with col_pag:
+        pagina = st.number_input(
+            "Página",
+            min_value=1,
+            max_value=total_paginas,
+            step=1,
+            key=key_pag,
+        )
+
+    inicio = (pagina - 1) * tamanho
+    fim = min(inicio + tamanho, total)
+
+    with col_info:
+        st.write("")
+        st.caption(f"Mostrando {inicio + 1 if total else 0}–{fim} de {total} {rotulo} "
+                   f"(página {pagina} de {total_paginas})")
+
+    return inicio, fim
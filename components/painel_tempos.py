@@ -0,0 +1,49 @@
+import time
+
+import streamlit as st
+
+from utils import instrumentacao
+from utils.clients import estatisticas_cache
+
+# -----------------------------------------------------------
+# Painel de tempos (só admin): percentis por trecho e os
+# últimos reruns das páginas com o detalhamento de cada um.
+# -----------------------------------------------------------
+def render_painel_tempos(qtd_reruns=10):
+    with st.expander("⏱ Desempenho (tempos por trecho)"):
+        resumo = instrumentacao.resumo()
+        if not resumo:
+            st.caption("Nenhuma medição ainda.")
+            return
+
+        st.markdown("**Percentis das últimas medições (ms)**")
+        st.dataframe(resumo, hide_index=True, use_container_width=True)
+
+        cache = estatisticas_cache()
+        consultas = cache["acertos"] + cache["faltas"]
+        taxa = f"{100 * cache['acertos'] / consultas:.0f}%" if consultas else "—"
+        st.caption(
+            f"Cache de catálogos: {cache['em_cache']}/{cache['limite']} em memória · "
+            f"{cache['acertos']} acertos · {cache['faltas']} faltas ({taxa} de acerto) · "
+            f"{cache['invalidacoes']} invalidações · TTL {cache['ttl_s']} s"
+        )
+
+        st.markdown(f"**Últimos {qtd_reruns} reruns**")
+        for rerun in instrumentacao.ultimos_reruns(qtd_reruns):
+            hora = time.strftime("%H:%M:%S", time.localtime(rerun["inicio"]))
+            situacao = "" if rerun["concluido"] else " · interrompido (st.stop/st.rerun)"
+            st.caption(f"{hora} · {rerun['pagina']} · {rerun['duracao_ms']} ms{situacao}")
+            if rerun["trechos"]:
+                st.dataframe(
+                    [{"trecho": nome, **valores} for nome, valores in rerun["trechos"].items()],
+                    hide_index=True,
+                    use_container_width=True,
+                )
+
+        st.download_button(
+            "Baixar métricas (Prometheus)",
+            instrumentacao.exportar_prometheus(),
+            file_name="metricas.prom",
+            mime="text/plain",
+            key="btn_metricas_prometheus",
+        )
@@ -1,35 +1,73 @@
 import streamlit as st
 
+from utils.instrumentacao import medido
+from utils.miniaturas import miniatura, LARGURA_CATALOGO
+
 # -----------------------------------------------------------
-# Função para renderizar cada peça
+# Função para renderizar cada peça (utils.modelo.Peca)
 # -----------------------------------------------------------
-def render_peca(peca, idx, quantidades, pecas_selecionadas):
+# `carrinho` é o utils.carrinho.Carrinho da sessão: os widgets só
+# refletem o que está nele e o alteram pelos callbacks, então a
+# escolha sobrevive quando a peça sai da página visível.
+def _ao_marcar(carrinho, codigo, key_chk, quantidade):
+    if st.session_state[key_chk]:
+        carrinho.definir(codigo, quantidade)
+    else:
+        carrinho.remover(codigo)
+
+
+def _ao_mudar_quantidade(carrinho, codigo, key_qtd):
+    carrinho.definir(codigo, st.session_state[key_qtd])
+
+
+# `sugestao` (utils.previsao.Sugestao, opcional) define a quantidade
+# ao marcar a peça e destaca as que estão no prazo de reposição.
+@medido("render_peca")
+def render_peca(peca, idx, carrinho, sugestao=None):
     col_img, col_info, col_sel = st.columns([1.4, 3, 1.1])
 
     # Imagem
     with col_img:
-        if peca.get("imagem"):
-            st.image(peca["imagem"], use_container_width=True)
+        if peca.imagem:
+            st.image(miniatura(peca.imagem, LARGURA_CATALOGO), use_container_width=True)
         else:
             st.write("Sem imagem")
 
     # Informações
     with col_info:
-        st.write(f"### {peca.get('nome', '—')}")
-        st.write(f"**Código:** {peca.get('codigo', '—')}")
-        st.write(f"**Descrição:** {peca.get('descricao', '—')}")
+        st.write(f"### {peca.nome or '—'}")
+        st.write(f"**Código:** {peca.codigo}")
+        st.write(f"**Descrição:** {peca.descricao or '—'}")
+        if sugestao is not None and sugestao.devido:
+            st.caption(
+                f"🔔 Hora de repor: costuma pedir a cada ~{sugestao.intervalo_dias:.0f} dia(s); "
+                f"o último pedido foi há {sugestao.dias_desde_ultimo:.0f}."
+            )
 
     # Seleção
     with col_sel:
-        key_chk = f"chk_{peca['codigo']}_{idx}"
-        key_qtd = f"qtd_{peca['codigo']}_{idx}"
-        adicionar = st.checkbox("Selecionar", key=key_chk)
-        if adicionar:
-            qtd = st.number_input(
+        codigo = peca.codigo
+        key_chk = f"chk_{codigo}_{idx}"
+        key_qtd = f"qtd_{codigo}_{idx}"
+
+        # o carrinho é a fonte da verdade (botões em lote também o alteram)
+        selecionada = codigo in carrinho
+        st.session_state[key_chk] = selecionada
+        quantidade_inicial = sugestao.quantidade if sugestao is not None else 1
+        st.checkbox(
+            "Selecionar",
+            key=key_chk,
+            help=f"Quantidade sugerida: {quantidade_inicial}" if sugestao is not None else None,
+            on_change=_ao_marcar,
+            args=(carrinho, codigo, key_chk, quantidade_inicial)
+        )
+        if selecionada:
+            st.session_state[key_qtd] = carrinho.quantidade(codigo)
+            st.number_input(
                 "Quantidade",
                 min_value=1,
                 step=1,
-                key=key_qtd
+                key=key_qtd,
+                on_change=_ao_mudar_quantidade,
+                args=(carrinho, codigo, key_qtd)
             )
-            pecas_selecionadas.append(peca)
-            quantidades[peca['codigo']] = qtd
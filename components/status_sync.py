@@ -0,0 +1,35 @@
+import time
+
+import streamlit as st
+
+from utils import github_sync
+
+# -----------------------------------------------------------
+# Situação da fila de sincronização com o GitHub (barra lateral)
+# -----------------------------------------------------------
+def render_status_sincronizacao():
+    status = github_sync.status()
+    pendentes = status["pendentes"] + status["enviando"]
+
+    with st.sidebar:
+        st.markdown("### 🔄 Sincronização GitHub")
+
+        if pendentes:
+            st.info(f"⏳ {len(pendentes)} arquivo(s) aguardando envio")
+            for caminho in pendentes:
+                st.caption(caminho)
+        else:
+            st.success("✅ Tudo sincronizado")
+
+        if status["ultimo_erro"]:
+            st.error("Última tentativa falhou — nova tentativa em breve")
+            st.code(status["ultimo_erro"])
+
+        if status["ultima_sincronizacao"]:
+            hora = time.strftime("%H:%M:%S", time.localtime(status["ultima_sincronizacao"]))
+            st.caption(f"Último envio: {hora}")
+        if status["ultimo_commit"]:
+            st.caption(f"Commit: {status['ultimo_commit'][:7]}")
+
+        if st.button("Atualizar status", key="btn_status_sync"):
+            st.rerun()
@@ -0,0 +1,36 @@
+import streamlit as st
+
+from utils import uploads
+
+INTERVALO_ATUALIZACAO = 2  # segundos, só enquanto há imagens processando
+
+ICONES = {"na fila": "⏳", "processando": "⚙️", "publicado": "✅", "erro": "❌"}
+
+
+# -----------------------------------------------------------
+# Imagens enviadas que ainda estão sendo processadas (barra lateral)
+# -----------------------------------------------------------
+def render_status_uploads(qtd_concluidos=5):
+    pendentes = bool(uploads.status()["pendentes"])
+    with st.sidebar:
+        st.fragment(_render_lista, run_every=INTERVALO_ATUALIZACAO if pendentes else None)(
+            pendentes, qtd_concluidos
+        )
+
+
+def _render_lista(havia_pendentes, qtd_concluidos):
+    status = uploads.status()
+    if havia_pendentes and not status["pendentes"]:
+        # terminou tudo: recarrega a página para mostrar as imagens novas
+        st.rerun(scope="app")
+
+    if not status["pendentes"] and not status["concluidos"]:
+        return
+
+    st.markdown("### 🖼 Imagens enviadas")
+    if status["pendentes"]:
+        st.info(f"{len(status['pendentes'])} imagem(ns) em processamento")
+    for job in status["pendentes"] + status["concluidos"][:qtd_concluidos]:
+        st.caption(f"{ICONES[job['situacao']]} {job['descricao']} · {job['situacao']}")
+        if job["erro"]:
+            st.error(job["erro"])
@@ -1,10 +1,8 @@
 import streamlit as st
-import urllib.parse
-
-def render_wpp_button(numero: str, mensagem: str):
-    mensagem_url = urllib.parse.quote(mensagem)
-    link_whatsapp = f"https://wa.me/{numero}?text={mensagem_url}"
 
+# `envio` é o utils.mensagem.Envio do pedido: o texto de cada parte
+# já vem escapado e dentro do limite de tamanho da URL.
+def render_wpp_button(numero: str, envio):
     st.markdown("""
         <style>
         .wpp-btn {
@@ -25,8 +23,18 @@ def render_wpp_button(numero: str, mensagem: str):
         </style>
     """, unsafe_allow_html=True)
 
-    st.markdown(f"""
-        <a href="{link_whatsapp}" target="_blank" class="wpp-btn">
-            📲 Enviar Pedido via WhatsApp
-        </a>
-    """, unsafe_allow_html=True)
+    total = len(envio.partes)
+    if envio.formato == "compacto":
+        st.caption("Pedido grande: os itens vão só com código e quantidade.")
+    if total > 1:
+        st.caption(f"O pedido foi dividido em {total} mensagens; envie todas, na ordem.")
+
+    for i, parte in enumerate(envio.partes, 1):
+        rotulo = f" ({i}/{total})" if total > 1 else ""
+        st.markdown(f"""
+            <a href="https://wa.me/{numero}?text={parte.url}" target="_blank" class="wpp-btn">
+                📲 Enviar Pedido via WhatsApp{rotulo}
+            </a>
+        """, unsafe_allow_html=True)
+
+    st.caption(f"Tamanho do envio: {envio.tamanho:,} caracteres".replace(",", "."))
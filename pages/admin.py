@@ -1,63 +1,30 @@
 import streamlit as st
-import json
 import os
-from PIL import Image
-import base64, requests
+
+from utils import storage, github_sync, uploads
+from utils.busca import obter_indice
+from utils.clients import invalidar_cliente
+from utils.importDatabase import carregar_database
+from utils.modelo import Catalogo, ErroValidacao, Peca, validar_codigo
+from utils.instrumentacao import iniciar_rerun, finalizar_rerun
+from components.status_sync import render_status_sincronizacao
+from components.painel_tempos import render_painel_tempos
+from components.status_uploads import render_status_uploads
 
 # ===========================
 # CONFIGURAÇÕES
 # ===========================
 st.set_page_config(page_title="Criar Catálogo", page_icon="📘")
+iniciar_rerun("admin")
 
 PASSWORD = st.secrets["ADMIN_PASSWORD"]
 
-PRODUTOS_FILE = "database/database.json"
-CLIENTES_DIR = "clientes"
+CLIENTES_DIR = storage.CLIENTES_DIR
 IMAGENS_DIR = "imagens"
 
 os.makedirs(CLIENTES_DIR, exist_ok=True)
 os.makedirs(IMAGENS_DIR, exist_ok=True)
 
-# ===========================
-# FUNÇÕES AUXILIARES
-# ===========================
-def carregar_produtos():
-    if not os.path.exists(PRODUTOS_FILE):
-        return []
-    with open(PRODUTOS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def salvar_produtos(produtos):
-    with open(PRODUTOS_FILE, "w", encoding="utf-8") as f:
-        json.dump(produtos, f, indent=2, ensure_ascii=False)
-
-def buscar_produto_por_codigo(produtos, codigo):
-    for p in produtos:
-        if p["codigo"] == codigo:
-            return p
-    return None
-
-def github_upload(path, repo_path, message):
-    """Envia QUALQUER arquivo ao GitHub."""
-    GITHUB_TOKEN = st.secrets["GITHUB_TOKEN"]
-    GITHUB_REPO = st.secrets["GITHUB_REPO"]
-    GITHUB_USER = st.secrets["GITHUB_USER"]
-    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}"}
-
-    url = f"https://api.github.com/repos/{GITHUB_USER}/{GITHUB_REPO}/contents/{repo_path}"
-
-    with open(path, "rb") as f:
-        content_b64 = base64.b64encode(f.read()).decode()
-
-    get_file = requests.get(url, headers=headers)
-    sha = get_file.json().get("sha") if get_file.status_code == 200 else None
-
-    payload = {"message": message, "content": content_b64}
-    if sha:
-        payload["sha"] = sha
-
-    return requests.put(url, headers=headers, json=payload)
-
 # ===========================
 # LOGIN
 # ===========================
@@ -76,6 +43,10 @@ if not st.session_state.auth:
             st.error("Senha incorreta!")
     st.stop()
 
+render_status_sincronizacao()
+render_status_uploads()
+render_painel_tempos()
+
 # ===========================
 # SESSION STATE
 # ===========================
@@ -84,6 +55,7 @@ defaults = {
     "vendedor": "",
     "contato": "",
     "codigo_busca": "",
+    "termo_busca": "",
     "nome_novo": "",
     "descricao_novo": "",
     "pecas_cliente": [],
@@ -94,6 +66,11 @@ for key, value in defaults.items():
     if key not in st.session_state:
         st.session_state[key] = value
 
+# produtos novos cuja imagem ainda está no pool de uploads:
+# codigo -> {"peca": Peca publicada, "erro": mensagem}, preenchidos pelo job
+if "novos_produtos" not in st.session_state:
+    st.session_state.novos_produtos = {}
+
 def reset_form():
     for key in defaults:
         if key != "pecas_cliente":
@@ -110,27 +87,64 @@ if st.session_state.reset:
 # ===========================
 st.title("📘 Criar Catálogo")
 
+# a peça nova só entra no catálogo depois de publicada
+novos_produtos = st.session_state.novos_produtos
+for codigo, novo in list(novos_produtos.items()):
+    if novo["erro"]:
+        st.error(f"Produto {codigo} não foi cadastrado: {novo['erro']}")
+        del novos_produtos[codigo]
+    elif novo["peca"] is not None:
+        st.session_state.pecas_cliente.append(novo["peca"])
+        st.success(f"Produto {codigo} cadastrado e adicionado ao catálogo!")
+        del novos_produtos[codigo]
+
 cliente = st.text_input("Nome do Cliente", key="cliente")
 vendedor = st.text_input("Nome do Vendedor", key="vendedor")
 contato = st.text_input("Contato do Vendedor", key="contato")
 
 st.subheader("🔧 Adicionar Peças ao Catálogo")
 
-produtos = carregar_produtos()
-
 # ------------------------------
 # BUSCAR PRODUTO EXISTENTE
 # ------------------------------
 codigo_busca = st.text_input("Código da Peça", key="codigo_busca")
 
 if st.button("🔍 Buscar peça por código"):
-    produto = buscar_produto_por_codigo(produtos, codigo_busca)
+    produto = storage.obter_produto(codigo_busca)
     if produto:
-        st.success(f"Produto encontrado: {produto['nome']}")
-        st.session_state.pecas_cliente.append(produto)
+        peca = Peca.de_dict(produto)
+        st.success(f"Produto encontrado: {peca.nome}")
+        st.session_state.pecas_cliente.append(peca)
     else:
         st.warning("Produto não encontrado. Cadastre abaixo.")
 
+# ------------------------------
+# BUSCAR POR NOME / DESCRIÇÃO
+# ------------------------------
+termo_busca = st.text_input(
+    "🔎 Buscar peça por nome ou descrição",
+    key="termo_busca",
+    placeholder="ex.: botao emergencia cogumelo"
+)
+
+if termo_busca.strip():
+    produtos = carregar_database()
+    resultados = obter_indice(produtos).buscar(termo_busca, k=10)
+
+    if not resultados:
+        st.info("Nenhuma peça encontrada para essa busca.")
+
+    for codigo, _ in resultados:
+        p = produtos[codigo]
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            st.write(f"**{p.nome}** — {codigo}")
+            st.caption(p.descricao)
+        with col2:
+            if st.button("➕ Adicionar", key=f"add_busca_{codigo}"):
+                st.session_state.pecas_cliente.append(p)
+                st.success(f"{p.nome} adicionada ao catálogo!")
+
 # ------------------------------
 # CADASTRAR NOVO PRODUTO
 # ------------------------------
@@ -146,61 +160,35 @@ if st.button("💾 Salvar Novo Produto"):
     elif not nome_novo or not descricao_novo or upload_novo is None:
         st.error("Preencha todos os campos!")
     else:
-
-        # Salvar imagem com extensão correta
-        orig_ext = upload_novo.name.split(".")[-1].lower()
-
-        if orig_ext not in ["png", "jpg", "jpeg"]:
-            st.error("Formato de imagem inválido! Use PNG, JPG ou JPEG.")
+        try:
+            codigo_busca = validar_codigo(codigo_busca, para_arquivo=True)
+        except ErroValidacao as e:
+            st.error(str(e))
             st.stop()
 
-        if orig_ext == "jpeg" or "png":
-            orig_ext = "jpg"
-
-        img_filename = f"{codigo_busca}.{orig_ext}"
-        img_path = os.path.join(IMAGENS_DIR, img_filename)
-
-        image = Image.open(upload_novo)
-        image.save(img_path)
-
-        # Criar produto
-        novo_produto = {
-            "codigo": codigo_busca,
-            "nome": nome_novo,
-            "descricao": descricao_novo,
-            "imagem": f"imagens/{img_filename}"
-        }
-
-        produtos.append(novo_produto)
-        salvar_produtos(produtos)
-
-        # Uploads GitHub
-        resp_img = github_upload(
-            img_path,
-            f"imagens/{img_filename}",
-            f"Adicionando imagem do produto {codigo_busca}"
-        )
-
-        if resp_img.status_code in [200, 201]:
-            st.success("📸 Imagem enviada ao GitHub!")
-        else:
-            st.error("Erro ao enviar imagem")
-            st.code(resp_img.text)
-
-        resp_db = github_upload(
-            PRODUTOS_FILE,
-            "database/database.json",
-            "Atualizando database.json após cadastrar produto"
-        )
-
-        if resp_db.status_code in [200, 201]:
-            st.success("📘 database.json atualizado no GitHub!")
-        else:
-            st.error("Erro ao enviar database.json")
-            st.code(resp_db.text)
+        # O produto só é gravado (e entra no catálogo) quando a imagem estiver processada
+        novo = {"peca": None, "erro": None}
+
+        def publicar(img_path, codigo=codigo_busca, nome=nome_novo, descricao=descricao_novo, novo=novo):
+            peca = Peca(codigo, nome, descricao, img_path)
+            storage.salvar_produto(peca)
+            github_sync.enfileirar(img_path, img_path, f"Adicionando imagem do produto {codigo}")
+            github_sync.enfileirar_produtos(f"Cadastrando produto {codigo}")
+            novo["peca"] = peca
+
+        def ao_falhar(erro, novo=novo):
+            novo["erro"] = erro
+
+        try:
+            uploads.enviar_imagem(
+                upload_novo, codigo_busca, f"Produto {codigo_busca}", publicar, IMAGENS_DIR, ao_falhar
+            )
+        except uploads.ErroImagem as e:
+            st.error(str(e))
+            st.stop()
 
-        st.session_state.pecas_cliente.append(novo_produto)
-        st.success("Produto cadastrado e adicionado ao catálogo!")
+        novos_produtos[codigo_busca] = novo
+        st.info("⏳ Imagem em processamento; o produto é publicado e adicionado ao catálogo assim que ela ficar pronta.")
 
 # ------------------------------
 # LISTA DE PEÇAS + REMOVER ITEM
@@ -213,8 +201,8 @@ else:
     for i, p in enumerate(st.session_state.pecas_cliente):
 
         with st.container(border=True):
-            st.write(f"**{p['nome']}** — {p['codigo']}")
-            st.write(p["descricao"])
+            st.write(f"**{p.nome}** — {p.codigo}")
+            st.write(p.descricao)
 
             col1, col2 = st.columns([5, 1])
             with col2:
@@ -233,38 +221,33 @@ if st.button("📁 Salvar Catálogo do Cliente"):
         st.error("Preencha os dados do cliente!")
         st.stop()
 
+    if novos_produtos:
+        st.error(f"Aguarde a imagem dos produtos novos ({', '.join(novos_produtos)}) antes de salvar.")
+        st.stop()
+
     if len(st.session_state.pecas_cliente) == 0:
         st.error("Adicione ao menos uma peça!")
         st.stop()
 
-    data = {
-        "cliente": cliente,
-        "vendedor": vendedor,
-        "contato": contato,
-        "pecas": st.session_state.pecas_cliente
-    }
+    catalogo = Catalogo(cliente, vendedor, contato, [p.codigo for p in st.session_state.pecas_cliente])
 
-    json_name = f"{cliente.replace(' ', '_').lower()}.json"
-    json_path_local = f"{CLIENTES_DIR}/{json_name}"
+    cliente_id = cliente.replace(' ', '_').lower()
+    json_name = f"{cliente_id}.json"
 
-    with open(json_path_local, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    storage.salvar_cliente(cliente_id, catalogo)
+    invalidar_cliente(cliente_id)
 
     st.success("Catálogo salvo localmente!")
 
-    resp_json = github_upload(
-        json_path_local,
+    github_sync.enfileirar(
         f"clientes/{json_name}",
+        lambda: storage.exportar_cliente_json(cliente_id, CLIENTES_DIR),
         f"Salvando catálogo do cliente {cliente}"
     )
 
-    if resp_json.status_code in [200, 201]:
-        st.success("🎉 Catálogo enviado ao GitHub!")
-    else:
-        st.error("❌ Erro ao enviar catálogo")
-        st.code(resp_json.text)
-
-    st.success("🎯 Catálogo completo enviado ao GitHub!")
+    st.success("🎯 Catálogo na fila de envio ao GitHub!")
 
     st.session_state.reset = True
     st.rerun()
+
+finalizar_rerun()
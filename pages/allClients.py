@@ -1,60 +1,73 @@
 import streamlit as st
-import json
-import os
 import urllib.parse
 
-CLIENTES_DIR = "clientes"
+from utils import storage
+from utils.clients import invalidar_todos
+from utils.instrumentacao import iniciar_rerun, finalizar_rerun
+from components.paginacao import render_paginacao
 
 st.set_page_config(page_title="Clientes Cadastrados", page_icon="📋")
+iniciar_rerun("allClients")
 st.title("Lista de Clientes Cadastrados")
 
-os.makedirs(CLIENTES_DIR, exist_ok=True)
+# Reimporta apenas os JSON alterados por fora (compara mtime/tamanho)
+importados, erros = storage.sincronizar_clientes_json()
+if importados:
+    invalidar_todos()
+for caminho, erro in erros:
+    st.error(f"Erro ao carregar {caminho}: {erro}")
 
-arquivos = [f for f in os.listdir(CLIENTES_DIR) if f.endswith(".json")]
-
-if not arquivos:
+if storage.contar_clientes() == 0:
     st.warning("Nenhum cliente cadastrado ainda.")
     st.stop()
 
-clientes_dados = []
-
-# Carregar dados de cada cliente
-for arq in arquivos:
-    caminho = os.path.join(CLIENTES_DIR, arq)
-
-    try:
-        with open(caminho, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        cliente = data.get("cliente", "Sem nome")
-        vendedor = data.get("vendedor", "—")
-        pecas = data.get("pecas", [])
-        qtd_pecas = len(pecas)
-
-        clientes_dados.append({
-            "cliente": cliente,
-            "vendedor": vendedor,
-            "qtd_pecas": qtd_pecas
-        })
-
-    except Exception as e:
-        st.error(f"Erro ao ler {arq}: {e}")
+# ================================================
+# FILTROS / ORDENAÇÃO
+# ================================================
+ORDENS = {
+    "Cliente (A–Z)": "cliente",
+    "Vendedor": "vendedor",
+    "Mais peças": "qtd_pecas",
+}
+
+col_ordem, col_vendedor = st.columns(2)
+with col_ordem:
+    ordem = st.selectbox("Ordenar por", list(ORDENS), key="clientes_ordem")
+with col_vendedor:
+    vendedor = st.selectbox(
+        "Vendedor",
+        ["Todos"] + storage.listar_vendedores(),
+        key="clientes_vendedor"
+    )
+
+filtro_vendedor = None if vendedor == "Todos" else vendedor
+total = storage.contar_clientes(filtro_vendedor)
+
+inicio, fim = render_paginacao(total, chave="pag_clientes", rotulo="clientes")
+
+clientes_dados = [
+    {
+        "id": c["id"],
+        "cliente": c["cliente"] or "Sem nome",
+        "vendedor": c["vendedor"] or "—",
+        "qtd_pecas": c["qtd_pecas"]
+    }
+    for c in storage.listar_clientes(
+        ordem=ORDENS[ordem],
+        vendedor=filtro_vendedor,
+        limite=fim - inicio,
+        deslocamento=inicio,
+    )
+]
 
 # ================================================
-# TABELA RESUMIDA COM LINKS
+# TABELA RESUMIDA
 # ================================================
 st.subheader("📊 Visão Geral")
-st.dataframe(clientes_dados, use_container_width=True)
-
-clientes_com_link = []
-for c in clientes_dados:
-    cliente_url = urllib.parse.quote(c["cliente"].lower().replace(" ", "_"))
-    link = f"[{c['cliente']}](\/?cliente={cliente_url})"
-    clientes_com_link.append({
-        "cliente": link,
-        "vendedor": c["vendedor"],
-        "qtd_pecas": c["qtd_pecas"]
-    })
+st.dataframe(
+    [{k: c[k] for k in ("cliente", "vendedor", "qtd_pecas")} for c in clientes_dados],
+    use_container_width=True
+)
 
 st.markdown(
     "<style>td, th {padding: 10px}</style>",
@@ -67,7 +80,9 @@ st.markdown(
 st.subheader("🗂 Detalhes dos Clientes")
 
 for c in clientes_dados:
-    cliente_url = urllib.parse.quote(c["cliente"].lower().replace(" ", "_"))
-    st.markdown(f"### 👤 [{c['cliente']}](\/?cliente={cliente_url})")
+    cliente_url = urllib.parse.quote(c["id"])
+    st.markdown(f"### 👤 [{c['cliente']}](\\/?cliente={cliente_url})")
     st.write(f"**Vendedor:** {c['vendedor']}")
     st.write(f"**Itens no catálogo:** {c['qtd_pecas']}")
+
+finalizar_rerun()
@@ -1,200 +1,224 @@
 import streamlit as st
-import json
 import os
-from PIL import Image
-import base64, requests
+
+from utils import storage, github_sync, uploads
+from utils.clients import invalidar_cliente
+from utils.importDatabase import carregar_database
+from utils.miniaturas import miniatura
+from utils.modelo import Catalogo, ErroValidacao, Peca, validar_codigo
+from utils.instrumentacao import iniciar_rerun, finalizar_rerun
+from components.status_sync import render_status_sincronizacao
+from components.status_uploads import render_status_uploads
 
 st.set_page_config(page_title="Editar Catálogo", page_icon="📘")
+iniciar_rerun("editar_catalogos")
 
-CATALOGOS_DIR = "clientes"
+CATALOGOS_DIR = storage.CLIENTES_DIR
 IMAGENS_DIR = "imagens"
-PRODUTOS_FILE = "database/database.json"
-
-# --------------------------------------------------
-# Funções auxiliares
-# --------------------------------------------------
-def carregar_catalogo(caminho):
-    with open(caminho, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def salvar_catalogo(caminho, dados):
-    with open(caminho, "w", encoding="utf-8") as f:
-        json.dump(dados, f, indent=4, ensure_ascii=False)
-
-def carregar_produtos():
-    if not os.path.exists(PRODUTOS_FILE):
-        return []
-    with open(PRODUTOS_FILE, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def salvar_produtos(produtos):
-    with open(PRODUTOS_FILE, "w", encoding="utf-8") as f:
-        json.dump(produtos, f, indent=2, ensure_ascii=False)
-
-def github_upload(path, repo_path, message):
-    """Envia QUALQUER arquivo ao GitHub."""
-    GITHUB_TOKEN = st.secrets["GITHUB_TOKEN"]
-    GITHUB_REPO = st.secrets["GITHUB_REPO"]
-    GITHUB_USER = st.secrets["GITHUB_USER"]
-    headers = {"Authorization": f"Bearer {GITHUB_TOKEN}"}
-
-    url = f"https://api.github.com/repos/{GITHUB_USER}/{GITHUB_REPO}/contents/{repo_path}"
-
-    with open(path, "rb") as f:
-        content_b64 = base64.b64encode(f.read()).decode()
-
-    get_file = requests.get(url, headers=headers)
-    sha = get_file.json().get("sha") if get_file.status_code == 200 else None
-
-    payload = {"message": message, "content": content_b64}
-    if sha:
-        payload["sha"] = sha
-
-    return requests.put(url, headers=headers, json=payload)
 
 # --------------------------------------------------
 # Página
 # --------------------------------------------------
 st.header("🛠 Editar Catálogos Existentes")
+render_status_sincronizacao()
+render_status_uploads()
 
-if not os.path.exists(CATALOGOS_DIR):
-    st.warning(f"A pasta '{CATALOGOS_DIR}' não existe.")
-    st.stop()
-
-arquivos = [f for f in os.listdir(CATALOGOS_DIR) if f.endswith(".json")]
-if len(arquivos) == 0:
-    st.warning("Nenhum catálogo encontrado na pasta.")
+clientes = storage.listar_clientes()
+if len(clientes) == 0:
+    st.warning("Nenhum catálogo encontrado.")
     st.stop()
 
-nome_catalogo = st.selectbox("Selecione um catálogo:", arquivos)
-caminho_catalogo = os.path.join(CATALOGOS_DIR, nome_catalogo)
+cliente_id = st.selectbox(
+    "Selecione um catálogo:",
+    [c["id"] for c in clientes],
+    format_func=lambda id_: f"{id_}.json",
+)
+nome_catalogo = f"{cliente_id}.json"
 
-catalogo = carregar_catalogo(caminho_catalogo)
+# versão que estava na tela no rerun anterior: se alguém salvar o catálogo
+# nesse meio tempo, a gravação abaixo é recusada em vez de sobrescrever
+chave_versao = f"versao_catalogo_{cliente_id}"
+versao_vista = st.session_state.get(chave_versao)
 
-if "pecas" not in catalogo:
-    st.error("Esse catálogo não possui o formato esperado (sem 'pecas').")
-    st.stop()
+catalogo = Catalogo.de_dict(storage.carregar_cliente(cliente_id))
+st.session_state[chave_versao] = storage.versao_cliente(cliente_id)
 
-catalogo.setdefault("cliente", "")
 
-cliente_edit = st.text_input("Nome do cliente:", value=catalogo["cliente"])
+def salvar_catalogo():
+    try:
+        st.session_state[chave_versao] = storage.salvar_cliente(
+            cliente_id, catalogo, versao_esperada=versao_vista
+        )
+        invalidar_cliente(cliente_id)
+    except storage.ConflitoVersao:
+        st.error(
+            "⚠ Este catálogo foi salvo por outra pessoa enquanto você editava. "
+            "A página já mostra a versão atual: confira e refaça a alteração."
+        )
+        st.stop()
+
+
+# Imagens novas são processadas em segundo plano (utils/uploads.py);
+# estas funções rodam no pool quando a imagem fica pronta e só então
+# apontam o produto / a personalização para ela.
+def publicar_imagem_produto(codigo):
+    def publicar(img_path):
+        atual = storage.obter_produto(codigo)
+        if atual:
+            storage.salvar_produto({**atual, "imagem": img_path})
+        github_sync.enfileirar(img_path, img_path, f"Atualizando imagem da peça {codigo}")
+        github_sync.enfileirar_produtos(f"Atualizando imagem da peça {codigo}")
+    return publicar
+
+
+def publicar_imagem_cliente(cliente_id, codigo):
+    def publicar(img_path):
+        dados = storage.carregar_cliente(cliente_id)
+        atual = Catalogo.de_dict(dados) if dados else None
+        if atual is not None and codigo in atual.pecas:
+            campos = {**atual.personalizacoes.get(codigo, {}), "imagem": img_path}
+            storage.salvar_cliente(cliente_id, atual.personalizar(codigo, campos))
+            invalidar_cliente(cliente_id)
+        github_sync.enfileirar(img_path, img_path, f"Atualizando imagem da peça {codigo}")
+        github_sync.enfileirar(
+            f"clientes/{cliente_id}.json",
+            lambda: storage.exportar_cliente_json(cliente_id, CATALOGOS_DIR),
+            f"Atualizando imagem da peça {codigo} do cliente {cliente_id}"
+        )
+    return publicar
+
+
+def enviar_imagem(arquivo, nome_base, descricao, publicar, ao_falhar=None):
+    try:
+        return uploads.enviar_imagem(arquivo, nome_base, descricao, publicar, IMAGENS_DIR, ao_falhar)
+    except uploads.ErroImagem as e:
+        st.error(str(e))
+        st.stop()
+
+
+# Peças novas só entram no catálogo depois que o produto foi gravado
+# (publicar do upload); se a imagem falhar, o catálogo fica como estava.
+chave_novas = f"novas_pecas_{cliente_id}"
+if chave_novas not in st.session_state:
+    st.session_state[chave_novas] = {}
+novas_pecas = st.session_state[chave_novas]
+
+for codigo, nova in list(novas_pecas.items()):
+    if nova["erro"]:
+        st.error(f"Peça {codigo} não foi cadastrada: {nova['erro']}")
+        del novas_pecas[codigo]
+    elif nova["publicado"]:
+        if codigo not in catalogo.pecas:
+            catalogo = catalogo.com_peca(codigo)
+            salvar_catalogo()
+            github_sync.enfileirar(
+                f"clientes/{nome_catalogo}",
+                lambda: storage.exportar_cliente_json(cliente_id, CATALOGOS_DIR),
+                f"Adicionando peça {codigo} ao catálogo do cliente {catalogo.cliente}"
+            )
+        st.success(f"Peça {codigo} cadastrada e adicionada ao catálogo!")
+        del novas_pecas[codigo]
+
+
+cliente_edit = st.text_input("Nome do cliente:", value=catalogo.cliente)
 
 st.markdown("---")
 st.subheader("Peças do catálogo")
 
-remover_indices = []
+produtos = carregar_database()
+pecas, faltando = catalogo.resolver(produtos)
+
+for codigo in faltando:
+    st.warning(f"⚠ Peça '{codigo}' não encontrada no database.")
 
-for i, p in enumerate(catalogo["pecas"]):
-    with st.expander(f"{p.get('nome', 'Sem nome')} — {p.get('codigo', '')}", expanded=False):
-        form_key = f"form_peca_{i}"
+remover_codigos = []
+
+for i, p in enumerate(pecas):
+    codigo = p.codigo
+    with st.expander(f"{p.nome or 'Sem nome'} — {codigo}", expanded=False):
+        form_key = f"form_peca_{cliente_id}_{i}"
         with st.form(key=form_key):
-            nome_input = st.text_input("Nome:", value=p.get("nome", ""), key=f"nome_{i}")
-            desc_input = st.text_area("Descrição:", value=p.get("descricao", ""), key=f"desc_{i}")
+            nome_input = st.text_input("Nome:", value=p.nome, key=f"nome_{cliente_id}_{i}")
+            desc_input = st.text_area("Descrição:", value=p.descricao, key=f"desc_{cliente_id}_{i}")
 
             st.write("Imagem atual:")
-            imagem_atual = p.get("imagem", None)
+            imagem_atual = p.imagem
             if imagem_atual and os.path.exists(imagem_atual):
-                st.image(imagem_atual, width=200)
+                st.image(miniatura(imagem_atual, 200), width=200)
             else:
                 st.info("Imagem não encontrada localmente.")
 
-            nova_img = st.file_uploader("Nova imagem (opcional)", type=["png", "jpg", "jpeg"], key=f"img_{i}")
+            nova_img = st.file_uploader("Nova imagem (opcional)", type=["png", "jpg", "jpeg"], key=f"img_{cliente_id}_{i}")
+
+            so_cliente = st.checkbox(
+                "Aplicar só a este cliente",
+                value=codigo in catalogo.personalizacoes,
+                key=f"pers_{cliente_id}_{i}",
+                help="Sem marcar, a alteração vale para a peça em todos os catálogos."
+            )
 
             confirmar = st.form_submit_button("Confirmar alterações")
             remover = st.form_submit_button("Remover peça")
 
             if remover:
-                remover_indices.append(i)
+                remover_codigos.append(codigo)
                 st.success("Peça marcada para remoção. Clique em 'Salvar catálogo' para confirmar.")
                 st.rerun()
 
             if confirmar:
-                catalogo["pecas"][i]["nome"] = nome_input
-                catalogo["pecas"][i]["descricao"] = desc_input
-
-                img_filename = None
                 if nova_img is not None:
-                    ext = nova_img.name.split(".")[-1].lower()
-                    if ext == "jpeg":
-                        ext = "jpg"
-                    img_filename = f"{p.get('codigo', i)}.{ext}"
-                    img_path = os.path.join(IMAGENS_DIR, img_filename)
-
-                    os.makedirs(IMAGENS_DIR, exist_ok=True)
-
-                    image = Image.open(nova_img)
-                    image.save(img_path)
-
-                    catalogo["pecas"][i]["imagem"] = f"{IMAGENS_DIR}/{img_filename}"
-
-                    resp_img = github_upload(
-                        img_path,
-                        f"imagens/{img_filename}",
-                        f"Atualizando imagem da peça {p.get('codigo', i)}"
-                    )
-                    if resp_img.status_code in [200, 201]:
-                        st.success("📸 Imagem atualizada no GitHub!")
+                    # imagem personalizada não pode sobrescrever a da peça
+                    if so_cliente:
+                        enviar_imagem(nova_img, f"{codigo}_{cliente_id}", f"Peça {codigo} ({cliente_id})",
+                                      publicar_imagem_cliente(cliente_id, codigo))
                     else:
-                        st.error("Erro ao atualizar imagem no GitHub")
-                        st.code(resp_img.text)
-
-                # Atualizar também no database.json
-                produtos = carregar_produtos()
-                for prod in produtos:
-                    if prod["codigo"] == p.get("codigo"):
-                        prod["nome"] = nome_input
-                        prod["descricao"] = desc_input
-                        if img_filename:
-                            prod["imagem"] = f"imagens/{img_filename}"
-                    break
-                salvar_produtos(produtos)
-
-
-                resp_db = github_upload(
-                    PRODUTOS_FILE,
-                    "database/database.json",
-                    f"Atualizando produto {p.get('codigo')} no database.json"
-                )
-                if resp_db.status_code in [200, 201]:
-                    st.success("📘 database.json atualizado no GitHub!")
+                        enviar_imagem(nova_img, codigo, f"Peça {codigo}", publicar_imagem_produto(codigo))
+
+                if so_cliente:
+                    # Personalização: fica só no catálogo deste cliente
+                    campos = {"nome": nome_input, "descricao": desc_input}
+                    if "imagem" in catalogo.personalizacoes.get(codigo, {}):
+                        campos["imagem"] = catalogo.personalizacoes[codigo]["imagem"]
+                    catalogo = catalogo.personalizar(codigo, campos)
                 else:
-                    st.error("Erro ao enviar database.json")
-                    st.code(resp_db.text)
+                    catalogo = catalogo.personalizar(codigo, None)
+
+                    # Atualizar o produto na base (uma única linha); a imagem nova entra ao ficar pronta
+                    atual = produtos.get(codigo)
+                    if atual:
+                        storage.salvar_produto(Peca(codigo, nome_input, desc_input, atual.imagem))
 
-                st.success("Alterações aplicadas localmente. Clique em 'Salvar catálogo' para gravar no arquivo.")
+                    github_sync.enfileirar_produtos(f"Atualizando produto {codigo}")
+
+                # personalizações são gravadas na hora (só as linhas deste cliente)
+                salvar_catalogo()
+                github_sync.enfileirar(
+                    f"clientes/{nome_catalogo}",
+                    lambda: storage.exportar_cliente_json(cliente_id, CATALOGOS_DIR),
+                    f"Atualizando catálogo do cliente {catalogo.cliente}"
+                )
+
+                st.success("Alterações aplicadas.")
                 st.rerun()
 
 # --------------------------------------------------
 # Remover peças
 # --------------------------------------------------
-if remover_indices:
-    for idx in sorted(remover_indices, reverse=True):
-        p_to_remove = catalogo["pecas"][idx]
-        codigo_removido = p_to_remove.get("codigo")
-
-        img_path = p_to_remove.get("imagem")
+if remover_codigos:
+    for codigo_removido in remover_codigos:
+        img_path = produtos[codigo_removido].imagem
         if img_path and os.path.exists(img_path):
             try:
                 os.remove(img_path)
             except Exception:
                 pass
 
-        catalogo["pecas"].pop(idx)
+        catalogo = catalogo.sem_peca(codigo_removido)
 
-        produtos = carregar_produtos()
-        produtos = [prod for prod in produtos if prod["codigo"] != codigo_removido]
-        salvar_produtos(produtos)
+        storage.remover_produto(codigo_removido)
 
-        resp_db = github_upload(
-            PRODUTOS_FILE,
-            "database/database.json",
-            f"Removendo produto {codigo_removido} do database.json"
-        )
-        if resp_db.status_code in [200, 201]:
-            st.success("📘 database.json atualizado no GitHub!")
-        else:
-            st.error("Erro ao enviar database.json")
-            st.code(resp_db.text)
+        # enfileiramentos repetidos do mesmo arquivo viram um único envio
+        github_sync.enfileirar_produtos(f"Removendo produto {codigo_removido}")
 
     st.success("Peças removidas localmente. Clique em 'Salvar catálogo' para gravar no arquivo.")
     st.rerun()
@@ -208,58 +232,31 @@ desc_novo = st.text_area("Descrição (nova):", key="desc_novo")
 img_nova = st.file_uploader("Imagem (nova):", type=["png", "jpg", "jpeg"], key="img_nova")
 
 if st.button("Adicionar peça"):
-    if not codigo_novo or not nome_novo or not img_nova:
+    try:
+        codigo_novo = validar_codigo(codigo_novo, para_arquivo=True)
+    except ErroValidacao as e:
+        st.error(str(e))
+        st.stop()
+
+    if not nome_novo or not img_nova:
         st.error("Preencha todos os campos e envie uma imagem.")
     else:
-        ext = img_nova.name.split(".")[-1].lower()
-        if ext == "jpeg":
-            ext = "jpg"
-
-        img_filename = f"{codigo_novo}.{ext}"
-        img_path = os.path.join(IMAGENS_DIR, img_filename)
-
-        os.makedirs(IMAGENS_DIR, exist_ok=True)
-
-        image = Image.open(img_nova)
-        image.save(img_path)
-
-        nova_peca = {
-            "codigo": codigo_novo,
-            "nome": nome_novo,
-            "descricao": desc_novo,
-            "imagem": f"{IMAGENS_DIR}/{img_filename}"
-        }
+        # o produto é gravado (e a peça entra no catálogo) quando a imagem ficar pronta
+        nova = {"publicado": False, "erro": None}
 
-        catalogo["pecas"].append(nova_peca)
+        def publicar(img_path, codigo=codigo_novo, nome=nome_novo, descricao=desc_novo, nova=nova):
+            storage.salvar_produto(Peca(codigo, nome, descricao, img_path))
+            github_sync.enfileirar(img_path, img_path, f"Adicionando imagem da peça {codigo}")
+            github_sync.enfileirar_produtos(f"Adicionando produto {codigo}")
+            nova["publicado"] = True
 
-        produtos = carregar_produtos()
-        produtos.append(nova_peca)
-        salvar_produtos(produtos)
+        def ao_falhar(erro, nova=nova):
+            nova["erro"] = erro
 
-        resp_img = github_upload(
-            img_path,
-            f"imagens/{img_filename}",
-            f"Adicionando imagem da peça {codigo_novo}"
-        )
-        if resp_img.status_code in [200, 201]:
-            st.success("📸 Imagem enviada ao GitHub!")
-        else:
-            st.error("Erro ao enviar imagem")
-            st.code(resp_img.text)
-
-        resp_db = github_upload(
-            PRODUTOS_FILE,
-            "database/database.json",
-            f"Atualizando database.json após adicionar produto {codigo_novo}"
-        )
-        if resp_db.status_code in [200, 201]:
-            st.success("📘 database.json atualizado no GitHub!")
-        else:
-            st.error("Erro ao enviar database.json")
-            st.code(resp_db.text)
+        enviar_imagem(img_nova, codigo_novo, f"Peça {codigo_novo}", publicar, ao_falhar)
 
-        st.success("Peça adicionada com sucesso! Clique em 'Salvar catálogo' para gravar no arquivo.")
-        st.rerun()
+        novas_pecas[codigo_novo] = nova
+        st.info("⏳ Imagem em processamento; a peça é adicionada ao catálogo assim que ela ficar pronta.")
 
 st.markdown("---")
 
@@ -267,18 +264,19 @@ st.markdown("---")
 # Botão final para salvar todas as alterações no catálogo
 # --------------------------------------------------
 if st.button("💾 Salvar catálogo"):
-    catalogo["cliente"] = cliente_edit
-    salvar_catalogo(caminho_catalogo, catalogo)
+    if novas_pecas:
+        st.error(f"Aguarde a imagem das peças novas ({', '.join(novas_pecas)}) antes de salvar.")
+        st.stop()
+
+    catalogo = catalogo.com(cliente=cliente_edit)
+    salvar_catalogo()
 
-    resp_json = github_upload(
-        caminho_catalogo,
+    github_sync.enfileirar(
         f"clientes/{nome_catalogo}",
+        lambda: storage.exportar_cliente_json(cliente_id, CATALOGOS_DIR),
         f"Atualizando catálogo do cliente {cliente_edit}"
     )
-    if resp_json.status_code in [200, 201]:
-        st.success("🎉 Catálogo atualizado e enviado ao GitHub!")
-    else:
-        st.error("❌ Erro ao enviar catálogo")
-        st.code(resp_json.text)
 
     st.rerun()
+
+finalizar_rerun()
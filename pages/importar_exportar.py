@@ -0,0 +1,132 @@
+import os
+import tempfile
+
+import streamlit as st
+
+from utils import storage, github_sync
+from utils.importacao import (
+    importar_produtos, importar_catalogos,
+    linhas_produtos, linhas_catalogos, exportar_csv,
+)
+from utils.instrumentacao import iniciar_rerun, finalizar_rerun
+from components.status_sync import render_status_sincronizacao
+
+st.set_page_config(page_title="Importar / Exportar", page_icon="📦")
+iniciar_rerun("importar_exportar")
+
+# ===========================
+# ACESSO (mesmo login da página admin)
+# ===========================
+if not st.session_state.get("auth"):
+    st.title("🔐 Área Restrita")
+    st.warning("Entre pela página admin para importar ou exportar dados.")
+    if st.button("Ir para o login"):
+        st.switch_page("pages/admin.py")
+    st.stop()
+
+render_status_sincronizacao()
+
+st.title("📦 Importar / Exportar em lote")
+
+
+def mostrar_relatorio(relatorio, simular):
+    if relatorio["erros"]:
+        st.warning(f"{len(relatorio['erros'])} linha(s) ignorada(s)")
+        st.code("\n".join(relatorio["erros"]))
+    if simular:
+        st.info("Simulação: nada foi gravado.")
+    st.json(relatorio, expanded=False)
+
+
+# ===========================
+# PRODUTOS
+# ===========================
+st.subheader("Produtos")
+st.caption("Colunas: codigo, nome, descricao (opcional), imagem (opcional). "
+           "Imagens no zip são associadas pelo nome do arquivo: <codigo>.jpg / .png.")
+
+arquivo_produtos = st.file_uploader("Planilha de produtos (CSV ou XLSX)", type=["csv", "xlsx"], key="imp_produtos")
+zip_imagens = st.file_uploader("Imagens (zip, opcional)", type=["zip"], key="imp_imagens")
+simular_produtos = st.checkbox("Só validar (não grava)", key="simular_produtos")
+
+if st.button("📥 Importar produtos", disabled=arquivo_produtos is None):
+    try:
+        with st.spinner("Importando produtos..."):
+            relatorio = importar_produtos(
+                arquivo_produtos, arquivo_produtos.name, zip_imagens, simular=simular_produtos
+            )
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        if not simular_produtos and relatorio["produtos"]:
+            # tudo enfileirado de uma vez entra no mesmo commit
+            for caminho in relatorio["imagens"]:
+                github_sync.enfileirar(caminho, caminho, f"Importando imagem {caminho}")
+            github_sync.enfileirar_produtos(f"Importando {relatorio['produtos']} produtos")
+            st.success(f"✅ {relatorio['produtos']} produto(s) gravado(s) "
+                       f"({relatorio['novos']} novo(s), {len(relatorio['imagens'])} imagem(ns)).")
+        mostrar_relatorio(relatorio, simular_produtos)
+
+# ===========================
+# CATÁLOGOS
+# ===========================
+st.subheader("Catálogos de clientes")
+st.caption("Uma linha por peça: id, cliente, vendedor, contato, codigo, personalizacao (JSON, opcional). "
+           "Cada catálogo presente no arquivo é substituído por inteiro.")
+
+arquivo_catalogos = st.file_uploader("Planilha de catálogos (CSV ou XLSX)", type=["csv", "xlsx"], key="imp_catalogos")
+simular_catalogos = st.checkbox("Só validar (não grava)", key="simular_catalogos")
+
+if st.button("📥 Importar catálogos", disabled=arquivo_catalogos is None):
+    try:
+        with st.spinner("Importando catálogos..."):
+            relatorio = importar_catalogos(arquivo_catalogos, arquivo_catalogos.name, simular=simular_catalogos)
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        if relatorio["codigos_desconhecidos"]:
+            st.warning(f"{len(relatorio['codigos_desconhecidos'])} código(s) não existem no database.")
+        if not simular_catalogos and relatorio["catalogos"]:
+            for cliente_id in relatorio["catalogos"]:
+                github_sync.enfileirar(
+                    f"clientes/{cliente_id}.json",
+                    lambda cliente_id=cliente_id: storage.exportar_cliente_json(cliente_id),
+                    f"Importando catálogo {cliente_id}"
+                )
+            st.success(f"✅ {len(relatorio['catalogos'])} catálogo(s) gravado(s).")
+        mostrar_relatorio(relatorio, simular_catalogos)
+
+# ===========================
+# EXPORTAÇÃO
+# ===========================
+st.subheader("Exportar")
+
+
+def gerar_csv(chave, linhas):
+    """Escreve o CSV num arquivo temporário, em blocos; a sessão guarda só o caminho."""
+    anterior = st.session_state.get(chave)
+    if anterior and os.path.exists(anterior):
+        os.remove(anterior)
+    fd, caminho = tempfile.mkstemp(prefix=f"{chave}_", suffix=".csv")
+    os.close(fd)
+    st.session_state[chave] = exportar_csv(linhas, caminho)
+
+
+def botao_download(chave, nome):
+    caminho = st.session_state.get(chave)
+    if caminho and os.path.exists(caminho):
+        with open(caminho, "rb") as f:
+            st.download_button(f"⬇ {nome}", f, file_name=nome, mime="text/csv")
+
+
+col1, col2 = st.columns(2)
+with col1:
+    if st.button("Gerar CSV de produtos"):
+        gerar_csv("csv_produtos", linhas_produtos())
+    botao_download("csv_produtos", "produtos.csv")
+with col2:
+    if st.button("Gerar CSV de catálogos"):
+        gerar_csv("csv_catalogos", linhas_catalogos())
+    botao_download("csv_catalogos", "catalogos.csv")
+
+finalizar_rerun()
@@ -0,0 +1,109 @@
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+# -----------------------------------------------------------
+# Servidor HTTP local que imita a Git Data API do GitHub
+# (ref, commits, blobs, trees). Guarda tudo o que recebeu e
+# aceita falhas programadas: servidor.falhar("POST", "/git/blobs", 502)
+# faz a próxima requisição que casar responder 502.
+# -----------------------------------------------------------
+class GitHubFalso:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requisicoes = []     # (metodo, caminho)
+        self.blobs = {}           # sha -> conteúdo base64
+        self.trees = []           # corpo de cada POST /git/trees
+        self.commits = {"c0": {"tree": {"sha": "t0"}, "message": "inicial", "parents": []}}
+        self.head = "c0"
+        self._falhas = []         # [metodo, trecho do caminho, status]
+
+    def falhar(self, metodo, trecho, status, vezes=1):
+        with self.lock:
+            self._falhas += [[metodo, trecho, status]] * vezes
+
+    def contar(self, metodo, trecho):
+        with self.lock:
+            return sum(1 for m, c in self.requisicoes if m == metodo and trecho in c)
+
+    def responder(self, metodo, caminho, corpo):
+        with self.lock:
+            self.requisicoes.append((metodo, caminho))
+            for falha in self._falhas:
+                if falha[0] == metodo and falha[1] in caminho:
+                    self._falhas.remove(falha)
+                    return falha[2], {"message": "falha simulada"}
+
+            if metodo == "GET" and "/git/ref/heads/" in caminho:
+                return 200, {"object": {"sha": self.head}}
+            if metodo == "GET" and "/git/commits/" in caminho:
+                return 200, self.commits[caminho.rsplit("/", 1)[1]]
+            if metodo == "POST" and caminho.endswith("/git/blobs"):
+                sha = uuid.uuid4().hex
+                self.blobs[sha] = corpo["content"]
+                return 201, {"sha": sha}
+            if metodo == "POST" and caminho.endswith("/git/trees"):
+                self.trees.append(corpo)
+                return 201, {"sha": f"t{len(self.trees)}"}
+            if metodo == "POST" and caminho.endswith("/git/commits"):
+                sha = f"c{len(self.commits)}"
+                self.commits[sha] = {"tree": {"sha": corpo["tree"]}, **corpo}
+                return 201, {"sha": sha}
+            if metodo == "PATCH" and "/git/refs/heads/" in caminho:
+                if corpo["sha"] not in self.commits or self.head not in self.commits[corpo["sha"]]["parents"]:
+                    return 422, {"message": "não é fast-forward"}
+                self.head = corpo["sha"]
+                return 200, {"object": {"sha": self.head}}
+            return 404, {"message": "rota desconhecida"}
+
+    def commits_novos(self):
+        with self.lock:
+            return [sha for sha in self.commits if sha != "c0"]
+
+
+@pytest.fixture
+def github_falso():
+    falso = GitHubFalso()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _tratar(self):
+            tamanho = int(self.headers.get("Content-Length") or 0)
+            corpo = json.loads(self.rfile.read(tamanho)) if tamanho else None
+            status, resposta = falso.responder(self.command, self.path, corpo)
+            dados = json.dumps(resposta).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        do_GET = do_POST = do_PATCH = _tratar
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    falso.url = f"http://127.0.0.1:{servidor.server_address[1]}"
+    try:
+        yield falso
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """utils.storage apontando para um banco novo em tmp_path (caminhos relativos ao cwd)."""
+    from utils import storage
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "database").mkdir()
+    (tmp_path / "clientes").mkdir()
+    monkeypatch.setattr(storage, "_preparado", False)
+    monkeypatch.setattr(storage, "_local", threading.local())
+    return storage
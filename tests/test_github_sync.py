@@ -0,0 +1,104 @@
+import base64
+
+import pytest
+
+from utils.github_sync import SincronizadorGitHub
+
+
+@pytest.fixture
+def sincronizador(github_falso):
+    return SincronizadorGitHub(
+        "token", "dono", "repo",
+        api_url=github_falso.url, atraso_lote=0.2, tentativas=5, espera_inicial=0.01,
+    )
+
+
+def _arquivo(tmp_path, nome, conteudo):
+    caminho = tmp_path / nome
+    caminho.write_text(conteudo, encoding="utf-8")
+    return str(caminho)
+
+
+def test_mesmo_caminho_varias_vezes_vira_um_commit(sincronizador, github_falso, tmp_path):
+    for i in range(5):
+        origem = _arquivo(tmp_path, f"v{i}.json", f"versão {i}")
+        sincronizador.enfileirar("clientes/joao.json", origem, f"Salvando {i}")
+    assert sincronizador.aguardar(timeout=10)
+
+    commits = github_falso.commits_novos()
+    assert len(commits) == 1
+    assert github_falso.contar("POST", "/git/blobs") == 1
+    assert github_falso.commits[commits[0]]["message"] == "Salvando 4"
+    (blob,) = github_falso.blobs.values()
+    assert base64.b64decode(blob).decode("utf-8") == "versão 4"
+    assert github_falso.head == commits[0]
+
+
+def test_varios_caminhos_em_uma_tree_e_um_commit(sincronizador, github_falso, tmp_path):
+    caminhos = ["clientes/a.json", "clientes/b.json", "database/alteracoes.jsonl"]
+    for caminho in caminhos:
+        sincronizador.enfileirar(caminho, _arquivo(tmp_path, caminho.replace("/", "_"), caminho), caminho)
+    sincronizador.enfileirar_remocao("clientes/velho.json", "Removendo velho")
+    assert sincronizador.aguardar(timeout=10)
+
+    assert len(github_falso.trees) == 1
+    tree = github_falso.trees[0]
+    assert tree["base_tree"] == "t0"
+    assert sorted(e["path"] for e in tree["tree"]) == sorted(caminhos + ["clientes/velho.json"])
+    assert [e["sha"] for e in tree["tree"] if e["path"] == "clientes/velho.json"] == [None]
+    assert len(github_falso.commits_novos()) == 1
+    assert github_falso.contar("PATCH", "/git/refs/heads/main") == 1
+
+
+def test_conteudo_igual_ao_publicado_nao_gera_envio(sincronizador, github_falso, tmp_path):
+    origem = _arquivo(tmp_path, "a.json", "mesmo conteúdo")
+    sincronizador.enfileirar("clientes/a.json", origem, "primeiro")
+    assert sincronizador.aguardar(timeout=10)
+    primeiro = sincronizador.status()["ultimo_commit"]
+
+    sincronizador.enfileirar("clientes/a.json", _arquivo(tmp_path, "b.json", "mesmo conteúdo"), "segundo")
+    assert sincronizador.aguardar(timeout=10)
+
+    assert github_falso.contar("POST", "/git/blobs") == 1
+    assert len(github_falso.commits_novos()) == 1
+    status = sincronizador.status()
+    assert status["ultimo_commit"] == primeiro
+    assert status["ultimo_erro"] is None
+
+
+def test_falhas_temporarias_sao_repetidas_ate_dar_certo(sincronizador, github_falso, tmp_path):
+    github_falso.falhar("POST", "/git/blobs", 502)
+    github_falso.falhar("POST", "/git/trees", 503)
+    github_falso.falhar("PATCH", "/git/refs/heads/main", 409)
+
+    sincronizador.enfileirar("clientes/a.json", _arquivo(tmp_path, "a.json", "conteúdo"), "Salvando a")
+    assert sincronizador.aguardar(timeout=10)
+
+    status = sincronizador.status()
+    assert status["ultimo_erro"] is None
+    assert status["ultimo_commit"] == github_falso.head
+    assert github_falso.head != "c0"
+    # cada falha depois de ler o head (503 na tree, 409 na ref) descarta o
+    # head em cache e a tentativa seguinte relê a ref
+    assert github_falso.contar("GET", "/git/ref/heads/main") == 3
+
+
+def test_grupo_le_todos_os_arquivos_de_uma_vez(sincronizador, github_falso, tmp_path):
+    leituras = []
+
+    def gerar():
+        leituras.append(len(leituras))
+        return {"database/database.json": b"[snapshot]", "database/alteracoes.jsonl": b""}
+
+    # o envio avulso do log fica para trás: o grupo já traz o log vazio
+    sincronizador.enfileirar("database/alteracoes.jsonl", _arquivo(tmp_path, "log", "linha\n"), "edição")
+    sincronizador.enfileirar_grupo(("database/database.json", "database/alteracoes.jsonl"), gerar, "compactando")
+    assert sincronizador.status()["pendentes"] == ["database/alteracoes.jsonl", "database/database.json"]
+    assert sincronizador.aguardar(timeout=10)
+
+    assert leituras == [0]
+    (tree,) = github_falso.trees
+    assert sorted(e["path"] for e in tree["tree"]) == ["database/alteracoes.jsonl", "database/database.json"]
+    conteudos = sorted(base64.b64decode(b) for b in github_falso.blobs.values())
+    assert conteudos == [b"", b"[snapshot]"]
+    assert github_falso.commits[github_falso.head]["message"] == "compactando"
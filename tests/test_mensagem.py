@@ -0,0 +1,69 @@
+from urllib.parse import unquote
+
+import pytest
+
+from utils.mensagem import LIMITE_TEXTO, ROTULOS, linha_item, montar_mensagem_linhas
+from utils.modelo import Peca
+
+
+def _linhas(qtd, nome="Botão de emergência cogumelo vermelho"):
+    return [linha_item(Peca(f"P{i:05d}", f"{nome} {i}", ""), i % 7 + 1) for i in range(qtd)]
+
+
+def _itens(envio):
+    """Linhas de item de todas as partes, em ordem (sem os cabeçalhos)."""
+    itens = []
+    for parte in envio.partes:
+        linhas = parte.texto.split("\n")
+        itens += linhas[linhas.index(ROTULOS[envio.formato]) + 1:]
+    return itens
+
+
+@pytest.mark.parametrize("qtd", [1, 40, 300, 5000])
+def test_partes_cabem_no_limite_depois_de_escapadas(qtd):
+    envio = montar_mensagem_linhas("Cliente Ação & Cia", _linhas(qtd), numero_pedido=1234)
+
+    for parte in envio.partes:
+        assert len(parte.url) <= LIMITE_TEXTO
+        assert unquote(parte.url) == parte.texto
+    assert envio.tamanho == sum(len(p.url) for p in envio.partes)
+
+
+def test_cada_item_aparece_uma_vez_e_em_ordem():
+    linhas = _linhas(5000)
+    envio = montar_mensagem_linhas("Cliente", linhas, numero_pedido=7, vendedor="Ana")
+
+    assert envio.formato == "compacto"
+    assert len(envio.partes) > 1
+    assert _itens(envio) == [l["compacto"].texto for l in linhas]
+
+    total = len(envio.partes)
+    for i, parte in enumerate(envio.partes, 1):
+        assert f"(parte {i}/{total})" in parte.texto.split("\n")[0]
+
+
+def test_pedido_pequeno_vai_completo_em_uma_mensagem():
+    linhas = _linhas(3)
+    envio = montar_mensagem_linhas("Cliente", linhas)
+
+    assert envio.formato == "completo"
+    assert len(envio.partes) == 1
+    assert _itens(envio) == [l["completo"].texto for l in linhas]
+
+
+def test_linha_maior_que_o_limite_e_cortada_entre_partes():
+    gigante = linha_item(Peca("Ç" * 3000, "enorme", ""), 2)
+    linhas = _linhas(10) + [gigante] + _linhas(10, nome="depois")
+    envio = montar_mensagem_linhas("Cliente", linhas, limite=500)
+
+    for parte in envio.partes:
+        assert len(parte.url) <= 500
+
+    itens = _itens(envio)
+    esperados = [l["compacto"].texto for l in linhas]
+    # os itens antes e depois continuam inteiros e na ordem
+    assert itens[:10] == esperados[:10]
+    assert itens[-10:] == esperados[-10:]
+    # e os pedaços do meio, juntos, remontam a linha grande
+    assert "".join(itens[10:-10]) == gigante["compacto"].texto
+    assert len(itens[10:-10]) > 1
@@ -0,0 +1,29 @@
+from utils import pedidos, previsao
+
+DIA = previsao.DIA
+
+
+def _pedir(banco, monkeypatch, quando, itens):
+    monkeypatch.setattr(pedidos.time, "time", lambda: quando)
+    pedidos.registrar_pedido("cli", itens)
+
+
+def test_pedidos_no_mesmo_instante_nao_ficam_sempre_devidos(banco, monkeypatch):
+    _pedir(banco, monkeypatch, 1000.0, [("A", 2)])
+    _pedir(banco, monkeypatch, 1000.0, [("A", 4)])
+
+    for agora in (1000.0, 1000.0 + DIA, 1000.0 + 90 * DIA):
+        sugestao = previsao.sugestoes("cli", agora=agora)["A"]
+        assert sugestao.devido is False
+        assert sugestao.intervalo_dias is None
+        assert sugestao.quantidade == 3
+
+
+def test_peca_fica_devida_perto_do_intervalo_medio(banco, monkeypatch):
+    _pedir(banco, monkeypatch, 0.0, [("A", 1)])
+    _pedir(banco, monkeypatch, 10 * DIA, [("A", 1)])
+
+    assert previsao.sugestoes("cli", agora=15 * DIA)["A"].devido is False
+    sugestao = previsao.sugestoes("cli", agora=19.5 * DIA)["A"]
+    assert sugestao.devido is True
+    assert sugestao.intervalo_dias == 10
@@ -0,0 +1,45 @@
+import json
+import threading
+
+from utils import alteracoes
+
+
+def test_compactacao_espera_a_gravacao_que_ja_anexou_ao_log(banco, monkeypatch):
+    banco.salvar_produto({"codigo": "A", "nome": "antigo", "descricao": ""})
+
+    # a gravação para entre a linha do log e o COMMIT
+    anexou, liberar = threading.Event(), threading.Event()
+    anexar = alteracoes.anexar
+
+    def anexar_e_esperar(entrada, *args, **kwargs):
+        anexar(entrada, *args, **kwargs)
+        anexou.set()
+        liberar.wait(5)
+
+    enviados, conectada = {}, threading.Event()
+
+    def compactar():
+        banco.conectar()  # como a thread do github_sync, que já tem a sua conexão
+        conectada.set()
+        anexou.wait(5)
+        enviados.update(banco.compactar_produtos())
+
+    compactacao = threading.Thread(target=compactar)
+    compactacao.start()
+    assert conectada.wait(5)
+
+    monkeypatch.setattr(alteracoes, "anexar", anexar_e_esperar)
+    escritor = threading.Thread(target=banco.salvar_produto, args=({"codigo": "A", "nome": "novo", "descricao": ""},))
+    escritor.start()
+    assert anexou.wait(5)
+    compactacao.join(0.3)
+    assert compactacao.is_alive()  # esperando o COMMIT da gravação
+
+    liberar.set()
+    escritor.join(5)
+    compactacao.join(5)
+
+    snapshot = {p["codigo"]: p["nome"] for p in json.loads(enviados[banco.PRODUTOS_JSON])}
+    assert snapshot["A"] == "novo"
+    assert enviados[alteracoes.ALTERACOES_JSONL] == b""
+    assert banco.obter_produto("A")["nome"] == "novo"
@@ -0,0 +1,71 @@
+import json
+import os
+
+from utils.persistencia import gravar_atomico, trava_arquivo
+
+# -----------------------------------------------------------
+# Log de alterações dos produtos (só acrescenta linhas).
+#
+# Cada gravação de produto vira uma linha JSON:
+#   {"op": "salvar", "produto": {...}}   ou   {"op": "remover", "codigo": "..."}
+# O database.json é o snapshot; snapshot + log = estado atual.
+# Assim cada edição envia ao GitHub só o log (proporcional às
+# mudanças) e o snapshot completo é regravado apenas na
+# compactação (storage.compactar_produtos).
+#
+# As operações são idempotentes (linha inteira / remoção), então
+# reaplicar uma entrada que já está no snapshot não muda nada.
+# -----------------------------------------------------------
+ALTERACOES_JSONL = "database/alteracoes.jsonl"
+
+# compacta quando o log passa de 1/4 do snapshot (mínimo 64 KB):
+# o custo de reenviar o snapshot fica diluído entre as edições
+LIMITE_BYTES = 64 * 1024
+FRACAO_SNAPSHOT = 0.25
+
+
+def anexar(entrada, caminho=ALTERACOES_JSONL):
+    anexar_varias([entrada], caminho)
+
+
+def anexar_varias(entradas, caminho=ALTERACOES_JSONL):
+    """Acrescenta várias entradas com uma única escrita e um único fsync."""
+    linhas = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entradas)
+    if not linhas:
+        return
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    with trava_arquivo(caminho):
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(linhas)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def ler(caminho=ALTERACOES_JSONL):
+    """Entradas do log em ordem; uma última linha incompleta (queda no meio da escrita) é ignorada."""
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            for linha in f:
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        return
+
+
+def limpar(caminho=ALTERACOES_JSONL):
+    """Esvazia o log; quem chama deve segurar trava_arquivo(caminho)."""
+    gravar_atomico(caminho, "")
+
+
+def precisa_compactar(snapshot, caminho=ALTERACOES_JSONL):
+    try:
+        tamanho = os.path.getsize(caminho)
+    except FileNotFoundError:
+        return False
+    try:
+        tamanho_snapshot = os.path.getsize(snapshot)
+    except FileNotFoundError:
+        return True
+    return tamanho > max(LIMITE_BYTES, tamanho_snapshot * FRACAO_SNAPSHOT)
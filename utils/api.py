@@ -0,0 +1,400 @@
+"""API HTTP/JSON somente com os dados (sem Streamlit) para o ERP e apps.
+
+Uso (processo próprio):
+    python -m utils.api --porta 8502
+ou, dentro do processo do Streamlit (compartilha os caches das páginas):
+    ALCAM_API_PORTA=8502 streamlit run app.py
+
+Sem ALCAM_API_TOKEN a API só atende em 127.0.0.1; com ele, atende em
+todas as interfaces e exige "Authorization: Bearer <token>".
+
+Rotas:
+    GET  /clients?limite=&cursor=
+    GET  /clients/<id>/catalog?limite=&cursor=
+    GET  /products?q=&limite=&cursor=
+    POST /clients/<id>/orders   {"itens": {"<codigo>": quantidade}}
+"""
+import argparse
+import asyncio
+import base64
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.ioloop
+import tornado.web
+from cachetools import LRUCache
+
+from utils import instrumentacao, pedidos, storage
+from utils.busca import obter_indice
+from utils.clients import carregar_catalogo_resolvido
+from utils.importDatabase import carregar_database, chave_database
+from utils.mensagem import linha_item, montar_por_destino
+from utils.rotas import Destino, ErroRotas, carregar_rotas
+
+# -----------------------------------------------------------
+# Os GET usam os mesmos índices das páginas (carregar_database,
+# carregar_catalogo_resolvido, obter_indice) e guardam a resposta
+# pronta: JSON, versão gzip e ETag. Cada resposta fica presa à
+# versão dos dados de onde saiu (assinatura do banco, chave dos
+# produtos ou o catálogo resolvido em cache), então uma requisição
+# repetida só compara a versão e devolve os bytes, ou 304 quando
+# o cliente manda If-None-Match com o mesmo ETag.
+#
+# A paginação é por cursor opaco: o cliente repassa o "cursor"
+# da resposta até ele vir null.
+#
+# O trabalho com o banco roda num pool de threads (cada thread com
+# a sua conexão SQLite), nunca no IOLoop: uma consulta lenta não
+# segura as outras requisições.
+# -----------------------------------------------------------
+PORTA_PADRAO = 8502
+LIMITE_PADRAO = 100
+LIMITE_MAXIMO = 1000
+RESPOSTAS_EM_CACHE = 2048
+TAMANHO_MINIMO_GZIP = 512   # bytes; abaixo disso o gzip não compensa
+TOKEN = os.environ.get("ALCAM_API_TOKEN")  # se definido, exigido em "Authorization: Bearer"
+ENDERECO_LOCAL = "127.0.0.1"              # único endereço atendido sem TOKEN
+TRABALHADORES = 4
+
+Resposta = namedtuple("Resposta", "corpo gzip etag")
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_respostas = LRUCache(maxsize=RESPOSTAS_EM_CACHE)  # chave -> (versão dos dados, Resposta)
+_executor = ThreadPoolExecutor(max_workers=TRABALHADORES, thread_name_prefix="api")
+
+
+class ErroApi(tornado.web.HTTPError):
+    def __init__(self, status, mensagem):
+        super().__init__(status, reason=None, log_message=mensagem)
+        self.mensagem = mensagem
+
+
+def _preparar(dados):
+    corpo = json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    compactado = gzip.compress(corpo, compresslevel=6) if len(corpo) >= TAMANHO_MINIMO_GZIP else None
+    etag = 'W/"' + hashlib.blake2b(corpo, digest_size=12).hexdigest() + '"'
+    return Resposta(corpo, compactado, etag)
+
+
+def _resposta(chave, versao, montar):
+    """Resposta em cache para `chave` enquanto a versão for `versao` (None não guarda)."""
+    with _lock:
+        entrada = _respostas.get(chave)
+    if entrada is not None and versao is not None and entrada[0] == versao:
+        return entrada[1]
+
+    resposta = _preparar(montar())
+    if versao is not None:
+        with _lock:
+            _respostas[chave] = (versao, resposta)
+    return resposta
+
+
+# ===========================
+# CURSOR
+# ===========================
+def _codificar_cursor(valor):
+    if valor is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(valor).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decodificar_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise ErroApi(400, "Cursor inválido.")
+
+
+def _pagina(sequencia, deslocamento, limite):
+    """Fatia de `sequencia` e o cursor da próxima (deslocamento), ou None no fim."""
+    fim = deslocamento + limite
+    proximo = fim if fim < len(sequencia) else None
+    return sequencia[deslocamento:fim], proximo
+
+
+def _token_valido(autorizacao):
+    # comparação em tempo constante: o tempo de resposta não revela o token
+    return hmac.compare_digest(autorizacao.encode("utf-8"), f"Bearer {TOKEN}".encode("utf-8"))
+
+
+# ===========================
+# HANDLERS
+# ===========================
+class BaseHandler(tornado.web.RequestHandler):
+    _etag = None
+
+    def prepare(self):
+        if TOKEN and not _token_valido(self.request.headers.get("Authorization", "")):
+            raise ErroApi(401, "Token ausente ou inválido.")
+
+    def limite(self):
+        try:
+            limite = int(self.get_query_argument("limite", LIMITE_PADRAO))
+        except ValueError:
+            raise ErroApi(400, "limite deve ser um número.")
+        return max(1, min(limite, LIMITE_MAXIMO))
+
+    def deslocamento(self):
+        valor = _decodificar_cursor(self.get_query_argument("cursor", None)) or 0
+        if not isinstance(valor, int) or valor < 0:
+            raise ErroApi(400, "Cursor inválido.")
+        return valor
+
+    def em_segundo_plano(self, funcao, *args):
+        """Roda `funcao` no pool da API (fora do IOLoop); use com await."""
+        return tornado.ioloop.IOLoop.current().run_in_executor(_executor, funcao, *args)
+
+    def compute_etag(self):
+        # o Tornado compara com If-None-Match e responde 304 sozinho
+        return self._etag
+
+    def enviar(self, resposta):
+        self._etag = resposta.etag
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.set_header("Vary", "Accept-Encoding")
+        if resposta.gzip is not None and "gzip" in self.request.headers.get("Accept-Encoding", ""):
+            self.set_header("Content-Encoding", "gzip")
+            self.write(resposta.gzip)
+        else:
+            self.write(resposta.corpo)
+
+    def write_error(self, status_code, **kwargs):
+        erro = kwargs.get("exc_info", (None, None))[1]
+        mensagem = erro.mensagem if isinstance(erro, ErroApi) else self._reason
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps({"erro": mensagem}, ensure_ascii=False))
+
+
+class ClientesHandler(BaseHandler):
+    async def get(self):
+        limite = self.limite()
+        apos = _decodificar_cursor(self.get_query_argument("cursor", None))
+        if apos is not None and not isinstance(apos, str):
+            raise ErroApi(400, "Cursor inválido.")
+
+        def montar():
+            # um a mais para saber se existe a próxima página
+            clientes = storage.listar_clientes(ordem="id", limite=limite + 1, apos=apos)
+            proximo = clientes[limite - 1]["id"] if len(clientes) > limite else None
+            return {"clientes": clientes[:limite], "cursor": _codificar_cursor(proximo)}
+
+        def responder():
+            return _resposta(("clientes", apos, limite), storage.assinatura(), montar)
+
+        self.enviar(await self.em_segundo_plano(responder))
+
+
+class CatalogoHandler(BaseHandler):
+    async def get(self, cliente_id):
+        limite, deslocamento = self.limite(), self.deslocamento()
+
+        def responder():
+            resolvido = carregar_catalogo_resolvido(cliente_id, carregar_database())
+            if resolvido is None:
+                raise ErroApi(404, f"Cliente '{cliente_id}' não encontrado.")
+
+            def montar():
+                catalogo, pecas, faltando = resolvido
+                pagina, proximo = _pagina(pecas, deslocamento, limite)
+                return {
+                    "id": cliente_id,
+                    "cliente": catalogo.cliente,
+                    "vendedor": catalogo.vendedor,
+                    "total": len(pecas),
+                    "pecas": [p.para_dict() for p in pagina],
+                    "faltando": list(faltando),
+                    "cursor": _codificar_cursor(proximo),
+                }
+
+            # o catálogo resolvido é trocado a cada alteração do cliente ou dos produtos
+            return _resposta(("catalogo", cliente_id, deslocamento, limite), resolvido, montar)
+
+        self.enviar(await self.em_segundo_plano(responder))
+
+
+class ProdutosHandler(BaseHandler):
+    async def get(self):
+        limite = self.limite()
+        consulta = self.get_query_argument("q", "").strip()
+
+        if consulta:
+            deslocamento = self.deslocamento()
+
+            def montar(produtos):
+                ranking = obter_indice(produtos).buscar(consulta, k=deslocamento + limite + 1)
+                pagina, proximo = _pagina(ranking, deslocamento, limite)
+                return {
+                    "produtos": [produtos[codigo].para_dict() for codigo, _ in pagina if codigo in produtos],
+                    "cursor": _codificar_cursor(proximo),
+                }
+
+            chave = ("busca", consulta, deslocamento, limite)
+        else:
+            apos = _decodificar_cursor(self.get_query_argument("cursor", None))
+            if apos is not None and not isinstance(apos, str):
+                raise ErroApi(400, "Cursor inválido.")
+
+            def montar(produtos):
+                lista = storage.pagina_produtos(apos, limite + 1)
+                proximo = lista[limite - 1]["codigo"] if len(lista) > limite else None
+                return {"produtos": lista[:limite], "cursor": _codificar_cursor(proximo)}
+
+            chave = ("produtos", apos, limite)
+
+        def responder():
+            produtos = carregar_database()
+            return _resposta(chave, chave_database(produtos), lambda: montar(produtos))
+
+        self.enviar(await self.em_segundo_plano(responder))
+
+
+class PedidosHandler(BaseHandler):
+    async def post(self, cliente_id):
+        try:
+            itens = json.loads(self.request.body or b"{}").get("itens")
+            itens = {str(codigo): int(qtd) for codigo, qtd in itens.items()}
+        except (ValueError, AttributeError, TypeError):
+            raise ErroApi(400, 'Corpo deve ser {"itens": {"<codigo>": quantidade}}.')
+
+        numero, envios = await self.em_segundo_plano(_registrar, cliente_id, itens)
+
+        self.set_status(201)
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps({
+            "pedido": numero,
+            "envios": [
+                {
+                    "vendedor": destino.nome,
+                    "contato": destino.contato,
+                    "formato": envio.formato,
+                    "links": [f"https://wa.me/{destino.contato}?text={parte.url}" for parte in envio.partes],
+                }
+                for destino, envio in envios
+            ],
+        }, ensure_ascii=False))
+
+
+def _registrar(cliente_id, itens):
+    """Grava o pedido e monta as mensagens por vendedor (roda no pool da API)."""
+    resolvido = carregar_catalogo_resolvido(cliente_id, carregar_database())
+    if resolvido is None:
+        raise ErroApi(404, f"Cliente '{cliente_id}' não encontrado.")
+    catalogo, pecas, _ = resolvido
+
+    por_codigo = {p.codigo: p for p in pecas}
+    fora = [codigo for codigo in itens if codigo not in por_codigo]
+    if fora:
+        raise ErroApi(422, f"Peças fora do catálogo: {', '.join(fora)}")
+    # na ordem do catálogo, como na página
+    itens = [(p.codigo, itens[p.codigo]) for p in pecas if itens.get(p.codigo, 0) > 0]
+    if not itens:
+        raise ErroApi(422, "Pedido sem itens.")
+
+    numero = pedidos.registrar_pedido(cliente_id, itens)
+
+    try:
+        rotas = carregar_rotas()
+    except ErroRotas as e:
+        raise ErroApi(500, str(e))
+    envios = montar_por_destino(
+        catalogo.cliente or cliente_id,
+        [(codigo, linha_item(por_codigo[codigo], qtd)) for codigo, qtd in itens],
+        rotas,
+        Destino(catalogo.vendedor, catalogo.contato),
+        numero,
+    )
+    return numero, envios
+
+
+# ===========================
+# SERVIDOR
+# ===========================
+def _registrar_tempo(handler):
+    instrumentacao.registrar(f"api.{type(handler).__name__}", handler.request.request_time() * 1000)
+
+
+def criar_app():
+    return tornado.web.Application(
+        [
+            (r"/clients", ClientesHandler),
+            (r"/clients/([^/]+)/catalog", CatalogoHandler),
+            (r"/clients/([^/]+)/orders", PedidosHandler),
+            (r"/products", ProdutosHandler),
+        ],
+        log_function=_registrar_tempo,
+    )
+
+
+def endereco():
+    """Todas as interfaces só com TOKEN definido; sem ele, apenas esta máquina."""
+    return "" if TOKEN else ENDERECO_LOCAL
+
+
+async def _servir(porta, ao_escutar=None):
+    criar_app().listen(porta, address=endereco())
+    if ao_escutar is not None:
+        ao_escutar()
+    await asyncio.Event().wait()
+
+
+_situacao = None  # None, "iniciando" ou "iniciada"
+
+
+def _marcar_iniciada():
+    global _situacao
+    with _lock:
+        _situacao = "iniciada"
+
+
+def _rodar_em_segundo_plano(porta):
+    global _situacao
+    try:
+        asyncio.run(_servir(porta, ao_escutar=_marcar_iniciada))
+    except Exception:
+        log.exception("API não iniciou na porta %s", porta)
+    finally:
+        # a próxima chamada de iniciar_em_segundo_plano tenta de novo
+        with _lock:
+            _situacao = None
+
+
+def iniciar_em_segundo_plano():
+    """Sobe a API numa thread deste processo se ALCAM_API_PORTA estiver definida.
+
+    Só fica marcada como iniciada depois que a porta foi aberta; se a
+    abertura falhar (porta em uso), o erro vai para o log e a chamada
+    seguinte (o app.py chama a cada rerun) tenta de novo.
+    """
+    global _situacao
+
+    porta = os.environ.get("ALCAM_API_PORTA")
+    if not porta:
+        return
+    with _lock:
+        if _situacao is not None:
+            return
+        _situacao = "iniciando"
+    threading.Thread(target=_rodar_em_segundo_plano, args=(int(porta),), name="api", daemon=True).start()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API JSON de clientes, catálogos e produtos.")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    args = parser.parse_args()
+    if TOKEN:
+        print(f"API em http://0.0.0.0:{args.porta} (exige token)")
+    else:
+        print(f"API em http://{ENDERECO_LOCAL}:{args.porta} (sem ALCAM_API_TOKEN, só acesso local)")
+    asyncio.run(_servir(args.porta))
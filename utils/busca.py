@@ -0,0 +1,208 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+# -----------------------------------------------------------
+# Busca textual sobre código/nome/descrição das peças.
+# - índice invertido: token -> {codigo: peso do campo}
+# - prefixos via vocabulário ordenado ("cogu" acha "cogumelo")
+# - trigramas dos tokens para tolerar erros de digitação
+# Tudo normalizado sem acento e sem caixa ("Botão" == "botao").
+# -----------------------------------------------------------
+PESOS_CAMPOS = {"codigo": 3.0, "nome": 2.0, "descricao": 1.0}
+PESO_PREFIXO = 0.7
+PESO_FUZZY = 0.5
+SIMILARIDADE_MINIMA = 0.45
+LIMITE_TRIGRAMA = 2000  # trigramas mais comuns que isso não ajudam a achar erros
+
+_NAO_ALFANUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize("NFKD", str(texto or ""))
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return _NAO_ALFANUM.sub(" ", texto.casefold()).strip()
+
+
+def tokenizar(texto):
+    return normalizar(texto).split()
+
+
+def _impressao(valores):
+    # o índice não guarda o produto: só o suficiente para saber se mudou
+    return hash(valores)
+
+
+def trigramas(token):
+    t = f"  {token} "
+    return {t[i:i + 3] for i in range(len(t) - 2)}
+
+
+class IndiceBusca:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._produtos = {}                    # codigo -> impressão dos campos indexados
+        self._tokens_doc = {}                  # codigo -> {token: peso}
+        self._invertido = defaultdict(dict)    # token -> {codigo: peso}
+        self._trigramas = defaultdict(set)     # trigrama -> tokens
+        self._vocabulario = []                 # tokens ordenados (para prefixos)
+
+    def __len__(self):
+        return len(self._produtos)
+
+    # ===========================
+    # ATUALIZAÇÃO INCREMENTAL
+    # ===========================
+    def adicionar(self, produto):
+        self._indexar(tuple(produto.get(campo) for campo in PESOS_CAMPOS))
+
+    def _indexar(self, valores):
+        """`valores` na ordem de PESOS_CAMPOS (o primeiro é o código)."""
+        codigo = valores[0]
+        with self._lock:
+            if codigo in self._produtos:
+                self.remover(codigo)
+
+            pesos = {}
+            for peso, valor in zip(PESOS_CAMPOS.values(), valores):
+                for token in tokenizar(valor):
+                    if peso > pesos.get(token, 0):
+                        pesos[token] = peso
+
+            for token, peso in pesos.items():
+                postagens = self._invertido[token]
+                if not postagens:
+                    bisect.insort(self._vocabulario, token)
+                    for tri in trigramas(token):
+                        self._trigramas[tri].add(token)
+                postagens[codigo] = peso
+
+            self._produtos[codigo] = _impressao(valores)
+            self._tokens_doc[codigo] = pesos
+
+    def remover(self, codigo):
+        with self._lock:
+            self._produtos.pop(codigo, None)
+            for token in self._tokens_doc.pop(codigo, {}):
+                postagens = self._invertido[token]
+                postagens.pop(codigo, None)
+                if not postagens:
+                    del self._invertido[token]
+                    i = bisect.bisect_left(self._vocabulario, token)
+                    if i < len(self._vocabulario) and self._vocabulario[i] == token:
+                        del self._vocabulario[i]
+                    for tri in trigramas(token):
+                        self._trigramas[tri].discard(token)
+
+    def sincronizar(self, produtos):
+        """Aplica só as diferenças entre o índice e `produtos` (mapping codigo -> produto).
+
+        Percorre `produtos` uma única vez; no snapshot colunar lê direto
+        as colunas indexadas (linhas()), sem criar uma Peca por produto.
+        """
+        if hasattr(produtos, "linhas"):
+            linhas = produtos.linhas(*PESOS_CAMPOS)
+        else:
+            linhas = (tuple(p.get(campo) for campo in PESOS_CAMPOS) for p in produtos.values())
+
+        with self._lock:
+            vistos = set()
+            for valores in linhas:
+                vistos.add(valores[0])
+                if self._produtos.get(valores[0]) != _impressao(valores):
+                    self._indexar(valores)
+            for codigo in [c for c in self._produtos if c not in vistos]:
+                self.remover(codigo)
+
+    # ===========================
+    # CONSULTA
+    # ===========================
+    def _expandir(self, termo):
+        """Tokens do vocabulário que casam com `termo` e o fator de cada um."""
+        candidatos = {}
+        if termo in self._invertido:
+            candidatos[termo] = 1.0
+
+        i = bisect.bisect_left(self._vocabulario, termo)
+        while i < len(self._vocabulario) and self._vocabulario[i].startswith(termo):
+            candidatos.setdefault(self._vocabulario[i], PESO_PREFIXO)
+            i += 1
+
+        # tolerância a erros só quando a palavra digitada não existe
+        if len(termo) >= 3 and termo not in self._invertido:
+            tris = trigramas(termo)
+            contagem = defaultdict(int)
+            for tri in tris:
+                tokens = self._trigramas.get(tri, ())
+                if len(tokens) > LIMITE_TRIGRAMA:
+                    continue
+                for token in tokens:
+                    contagem[token] += 1
+            for token, comuns in contagem.items():
+                sim = comuns / (len(tris) + len(trigramas(token)) - comuns)
+                if sim >= SIMILARIDADE_MINIMA:
+                    fator = PESO_FUZZY * sim
+                    if fator > candidatos.get(token, 0):
+                        candidatos[token] = fator
+
+        return candidatos
+
+    def buscar(self, consulta, k=20, codigos=None):
+        """Retorna até `k` pares (codigo, pontuação), do mais relevante ao menos.
+
+        `codigos` restringe o resultado a um subconjunto (ex.: catálogo do cliente).
+        """
+        termos = tokenizar(consulta)
+        if not termos:
+            return []
+
+        with self._lock:
+            total = max(len(self._produtos), 1)
+            pontos = None
+
+            for termo in termos:
+                pontos_termo = {}
+                for token, fator in self._expandir(termo).items():
+                    postagens = self._invertido[token]
+                    idf = math.log(1 + total / len(postagens))
+                    for codigo, peso in postagens.items():
+                        valor = fator * peso * idf
+                        if valor > pontos_termo.get(codigo, 0):
+                            pontos_termo[codigo] = valor
+
+                # todos os termos precisam casar (E lógico)
+                if pontos is None:
+                    pontos = pontos_termo
+                else:
+                    pontos = {c: v + pontos_termo[c] for c, v in pontos.items() if c in pontos_termo}
+                if not pontos:
+                    return []
+
+        if codigos is not None:
+            pontos = {c: v for c, v in pontos.items() if c in codigos}
+
+        return heapq.nlargest(k, pontos.items(), key=lambda item: (item[1], item[0]))
+
+
+# -----------------------------------------------------------
+# Índice único por processo, sincronizado com carregar_database()
+# -----------------------------------------------------------
+_lock = threading.Lock()
+_indice = IndiceBusca()
+_base = None
+
+
+def obter_indice(produtos):
+    """Índice compartilhado; `produtos` é o mapping devolvido por carregar_database()."""
+    global _base
+
+    if produtos is not _base:
+        with _lock:
+            if produtos is not _base:
+                _indice.sincronizar(produtos)
+                _base = produtos
+    return _indice
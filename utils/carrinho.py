@@ -0,0 +1,135 @@
+from utils.mensagem import linha_item, montar_por_destino
+
+# -----------------------------------------------------------
+# Seleção de peças de uma sessão (fica no session_state).
+#
+# É alterada só pelos callbacks dos widgets e botões, então
+# cada operação custa proporcional ao que mudou: o resumo
+# (peças/unidades) é mantido a cada alteração, a linha de cada
+# item da mensagem é guardada e o texto completo só é remontado
+# quando algo mudou. Como não depende dos widgets, a seleção
+# sobrevive à paginação e ao filtro.
+# -----------------------------------------------------------
+class Carrinho:
+    def __init__(self):
+        self._catalogo = ()       # peças do catálogo na última sincronização
+        self._posicoes = {}       # codigo -> (posição no catálogo, Peca)
+        self._quantidades = {}    # codigo -> quantidade (só as selecionadas)
+        self._linhas = {}         # codigo -> linhas da mensagem, já escapadas (mensagem.linha_item)
+        self._unidades = 0
+        self._mensagem = None     # (argumentos, envios) da última montagem
+        self.versao = 0           # muda a cada alteração (para gravar só quando mudou)
+        self.token = None         # token do carrinho salvo (utils/pedidos.py)
+
+    # ===========================
+    # CATÁLOGO
+    # ===========================
+    def sincronizar_catalogo(self, pecas):
+        """Chamado a cada rerun; só trabalha quando o catálogo (ou alguma peça) mudou."""
+        pecas = tuple(pecas)
+        if pecas == self._catalogo:
+            return
+
+        self._catalogo = pecas
+        self._posicoes = {p.codigo: (i, p) for i, p in enumerate(pecas)}
+        for codigo in [c for c in self._quantidades if c not in self._posicoes]:
+            self.remover(codigo)
+        for codigo, qtd in self._quantidades.items():
+            self._linhas[codigo] = linha_item(self._posicoes[codigo][1], qtd)
+        self._alterado()
+
+    # ===========================
+    # ALTERAÇÕES
+    # ===========================
+    def _alterado(self):
+        self._mensagem = None
+        self.versao += 1
+
+    def definir(self, codigo, quantidade):
+        if codigo not in self._posicoes:
+            return
+        quantidade = int(quantidade)
+        if quantidade < 1:
+            self.remover(codigo)
+            return
+
+        anterior = self._quantidades.get(codigo, 0)
+        if anterior == quantidade:
+            return
+        self._quantidades[codigo] = quantidade
+        self._unidades += quantidade - anterior
+        self._linhas[codigo] = linha_item(self._posicoes[codigo][1], quantidade)
+        self._alterado()
+
+    def remover(self, codigo):
+        anterior = self._quantidades.pop(codigo, None)
+        if anterior is not None:
+            self._unidades -= anterior
+            self._linhas.pop(codigo, None)
+            self._alterado()
+
+    def selecionar_todos(self, codigos, quantidade=1):
+        """Seleciona os `codigos` ainda não selecionados (os demais mantêm a quantidade)."""
+        self.adicionar({codigo: quantidade for codigo in codigos})
+
+    def adicionar(self, itens):
+        """Como selecionar_todos, mas com a quantidade de cada código ({codigo: quantidade})."""
+        for codigo, quantidade in itens.items():
+            if codigo not in self._quantidades:
+                self.definir(codigo, quantidade)
+
+    def limpar(self):
+        self._quantidades.clear()
+        self._linhas.clear()
+        self._unidades = 0
+        self._alterado()
+
+    def quantidade_em_lote(self, quantidade):
+        """Aplica a mesma quantidade a todas as peças selecionadas."""
+        for codigo in list(self._quantidades):
+            self.definir(codigo, quantidade)
+
+    def substituir(self, itens):
+        """Troca a seleção por `itens` {codigo: quantidade} (códigos fora do catálogo são ignorados)."""
+        self.limpar()
+        for codigo, quantidade in itens.items():
+            self.definir(codigo, quantidade)
+
+    # ===========================
+    # CONSULTA
+    # ===========================
+    def __contains__(self, codigo):
+        return codigo in self._quantidades
+
+    def __len__(self):
+        return len(self._quantidades)
+
+    def quantidade(self, codigo, padrao=1):
+        return self._quantidades.get(codigo, padrao)
+
+    @property
+    def unidades(self):
+        return self._unidades
+
+    def _ordenados(self):
+        return sorted(self._quantidades, key=lambda c: self._posicoes[c][0])
+
+    def itens(self):
+        """{codigo: quantidade} na ordem do catálogo."""
+        return {c: self._quantidades[c] for c in self._ordenados()}
+
+    def selecionadas(self):
+        """(Peca, quantidade) na ordem do catálogo."""
+        return [(self._posicoes[c][1], self._quantidades[c]) for c in self._ordenados()]
+
+    def mensagens(self, nome_cliente, padrao, rotas, numero_pedido=None):
+        """[(utils.rotas.Destino, utils.mensagem.Envio)] do pedido, um por vendedor.
+
+        `rotas` vem de utils.rotas.carregar_rotas(); `padrao` é o Destino
+        das peças sem regra (o vendedor do catálogo).
+        """
+        chave = (nome_cliente, padrao, rotas, numero_pedido)
+        if self._mensagem is None or self._mensagem[0] != chave:
+            itens = [(c, self._linhas[c]) for c in self._ordenados()]
+            self._mensagem = (chave, montar_por_destino(nome_cliente, itens, rotas, padrao, numero_pedido))
+        return self._mensagem[1]
@@ -0,0 +1,96 @@
+# -----------------------------------------------------------
+# Formato normalizado do catálogo de um cliente:
+#
+#   {
+#     "cliente": "...", "vendedor": "...", "contato": "...",
+#     "formato": 2,
+#     "pecas": ["1234", "4321"],
+#     "personalizacoes": {"4321": {"nome": "Nome só para este cliente"}},
+#     "itens_invalidos": [{"nome": "item sem código"}]   (só se houver)
+#   }
+#
+# Os dados da peça vêm sempre do database; o catálogo guarda apenas
+# os códigos e, quando houver, o que muda para aquele cliente.
+# O formato antigo (lista de dicts com nome/descricao/imagem copiados)
+# continua sendo lido: com `produtos`, os campos copiados que diferem
+# do database viram personalizações, então nada do cliente se perde.
+# Itens sem código são guardados à parte para serem mostrados.
+# -----------------------------------------------------------
+FORMATO_ATUAL = 2
+CAMPOS_PERSONALIZAVEIS = ("nome", "descricao", "imagem")
+
+
+def codigos_do_catalogo(dados):
+    """Lista de códigos, aceitando o formato novo (strings) e o antigo (dicts)."""
+    codigos = []
+    for item in dados.get("pecas", []):
+        if isinstance(item, dict):
+            if "codigo" in item:
+                codigos.append(item["codigo"])
+        else:
+            codigos.append(item)
+    return codigos
+
+
+def itens_invalidos(dados):
+    """Itens do formato antigo sem "codigo" (não há como resolvê-los), inclusive os já guardados."""
+    novos = [item for item in dados.get("pecas", []) if isinstance(item, dict) and "codigo" not in item]
+    return list(dados.get("itens_invalidos") or []) + novos
+
+
+def personalizacoes_copiadas(dados, produtos):
+    """{codigo: campos} dos itens do formato antigo cujos dados copiados diferem de `produtos`.
+
+    `produtos` é um mapping codigo -> produto (dict ou Peca); para um
+    código que não está nele, todos os campos copiados são mantidos.
+    """
+    personalizacoes = {}
+    for item in dados.get("pecas", []):
+        if not isinstance(item, dict) or "codigo" not in item:
+            continue
+        produto = produtos.get(item["codigo"])
+        campos = {
+            campo: item[campo]
+            for campo in CAMPOS_PERSONALIZAVEIS
+            if item.get(campo) not in (None, "")
+            and (produto is None or item[campo] != produto.get(campo))
+        }
+        if campos:
+            personalizacoes[item["codigo"]] = campos
+    return personalizacoes
+
+
+def normalizar_catalogo(dados, produtos=None):
+    """Converte qualquer formato para o formato normalizado (sem copiar dados de peça).
+
+    Com `produtos` (codigo -> produto), as diferenças dos itens do formato
+    antigo são preservadas como personalizações (ver personalizacoes_copiadas).
+    """
+    codigos = codigos_do_catalogo(dados)
+    presentes = set(codigos)
+
+    explicitas = dict(dados.get("personalizacoes") or {})
+    if produtos is not None:
+        for codigo, campos in personalizacoes_copiadas(dados, produtos).items():
+            explicitas[codigo] = {**campos, **explicitas.get(codigo, {})}
+
+    personalizacoes = {}
+    for codigo, campos in explicitas.items():
+        campos = {k: v for k, v in campos.items() if k in CAMPOS_PERSONALIZAVEIS}
+        if codigo in presentes and campos:
+            personalizacoes[codigo] = campos
+
+    return {
+        "cliente": dados.get("cliente", ""),
+        "vendedor": dados.get("vendedor", ""),
+        "contato": dados.get("contato", ""),
+        "formato": FORMATO_ATUAL,
+        "pecas": codigos,
+        "personalizacoes": personalizacoes,
+        "itens_invalidos": itens_invalidos(dados),
+    }
+
+
+def formato_antigo(dados):
+    return any(isinstance(item, dict) for item in dados.get("pecas", []))
+
@@ -1,10 +1,88 @@
-import json
+import threading
 
+from cachetools import TTLCache
+
+from utils import storage
+from utils.importDatabase import chave_database
+from utils.instrumentacao import medido
+from utils.modelo import Catalogo
+
+# -----------------------------------------------------------
+# Catálogos já resolvidos (peças juntadas com os produtos),
+# compartilhados entre todas as sessões do processo.
+#
+# Limitado em quantidade (LRU) e em tempo (TTL): o TTL cobre
+# gravações feitas por outro processo; neste processo as páginas
+# que salvam catálogos chamam invalidar_cliente()/invalidar_todos().
+# Mudanças nos produtos invalidam sozinhas (chave_database()).
+# -----------------------------------------------------------
+MAX_CATALOGOS = 256
+TTL_SEGUNDOS = 300
+
+_lock = threading.Lock()
+_cache = TTLCache(maxsize=MAX_CATALOGOS, ttl=TTL_SEGUNDOS)  # id -> (chave produtos, resolvido)
+_contadores = {"acertos": 0, "faltas": 0, "invalidacoes": 0}
+_geracao = 0  # muda a cada invalidação: resolução iniciada antes dela não entra no cache
+
+
+@medido("carregar_cliente")
 def carregar_cliente(cliente_id):
-    arquivo = f"clientes/{cliente_id}.json"
+    """Catalogo do cliente ou None."""
+    dados = storage.carregar_cliente(cliente_id)
+    return Catalogo.de_dict(dados) if dados is not None else None
+
+
+def carregar_catalogo_resolvido(cliente_id, produtos):
+    """(catalogo, pecas, faltando) do cliente já resolvido com `produtos`, ou None.
+
+    `produtos` é o índice de carregar_database(); `pecas` e `faltando`
+    são tuplas compartilhadas entre as sessões (não alterar).
+    """
+    chave = chave_database(produtos)
+    with _lock:
+        entrada = _cache.get(cliente_id)
+        if entrada is not None and chave is not None and entrada[0] == chave:
+            _contadores["acertos"] += 1
+            return entrada[1]
+        _contadores["faltas"] += 1
+        geracao = _geracao
+
+    resolvido = _resolver(cliente_id, produtos)
+    if resolvido is not None and chave is not None:
+        with _lock:
+            if geracao == _geracao:
+                _cache[cliente_id] = (chave, resolvido)
+    return resolvido
 
-    try:
-        with open(arquivo, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
+
+@medido("carregar_catalogo_resolvido.falta")
+def _resolver(cliente_id, produtos):
+    catalogo = carregar_cliente(cliente_id)
+    if catalogo is None:
         return None
+    pecas, faltando = catalogo.resolver(produtos)
+    return catalogo, tuple(pecas), tuple(faltando)
+
+
+def invalidar_cliente(cliente_id):
+    global _geracao
+
+    with _lock:
+        _geracao += 1
+        if _cache.pop(cliente_id, None) is not None:
+            _contadores["invalidacoes"] += 1
+
+
+def invalidar_todos():
+    global _geracao
+
+    with _lock:
+        _geracao += 1
+        _contadores["invalidacoes"] += len(_cache)
+        _cache.clear()
+
+
+def estatisticas_cache():
+    with _lock:
+        _cache.expire()
+        return {**_contadores, "em_cache": len(_cache), "limite": _cache.maxsize, "ttl_s": _cache.ttl}
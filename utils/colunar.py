@@ -0,0 +1,159 @@
+import bisect
+import os
+from collections.abc import Mapping
+from contextlib import suppress
+from functools import lru_cache
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+
+from utils import storage
+from utils.instrumentacao import medido
+from utils.modelo import Peca
+
+# -----------------------------------------------------------
+# Snapshot colunar dos produtos (Arrow IPC, mapeado em memória).
+#
+# O arquivo fica ordenado por código e guarda na metadata a
+# storage.chave_produtos() de quando foi gerado: enquanto os
+# produtos não mudam, um processo novo só faz mmap do arquivo,
+# sem ler JSON nem criar um objeto por produto. As linhas viram
+# Peca apenas quando alguém pede aquele código. Linhas sem código
+# válido ficam fora do arquivo, como no dict de carregar_database().
+#
+# Sem pyarrow, carregar_database() volta ao dict em memória.
+# -----------------------------------------------------------
+SNAPSHOT_ARROW = "database/produtos.arrow"
+TAMANHO_LOTE = 50000
+LINHAS_EM_CACHE = 20000
+VERSAO = "2"  # muda quando o conteúdo gerado muda; força gerar de novo
+
+CAMPOS = storage.CAMPOS_PRODUTO
+
+
+def disponivel():
+    return pa is not None
+
+
+class _Codigos:
+    """Sequência indexável dos códigos, para o bisect sem materializar a coluna."""
+
+    def __init__(self, coluna):
+        self._coluna = coluna
+
+    def __len__(self):
+        return len(self._coluna)
+
+    def __getitem__(self, i):
+        return self._coluna[i].as_py()
+
+
+class ProdutosColunares(Mapping):
+    """Mapping somente leitura codigo -> Peca sobre uma tabela Arrow ordenada por código."""
+
+    def __init__(self, tabela):
+        self.tabela = tabela
+        self._codigos = _Codigos(tabela.column("codigo"))
+        self._colunas = [tabela.column(c) for c in CAMPOS]
+        self._linha = lru_cache(maxsize=LINHAS_EM_CACHE)(self._ler_linha)
+
+    def _posicao(self, codigo):
+        if not isinstance(codigo, str):
+            return None
+        i = bisect.bisect_left(self._codigos, codigo)
+        if i < len(self._codigos) and self._codigos[i] == codigo:
+            return i
+        return None
+
+    def _ler_linha(self, i):
+        return Peca(*(coluna[i].as_py() for coluna in self._colunas))
+
+    def __getitem__(self, codigo):
+        i = self._posicao(codigo)
+        if i is None:
+            raise KeyError(codigo)
+        return self._linha(i)
+
+    def __contains__(self, codigo):
+        return self._posicao(codigo) is not None
+
+    def __len__(self):
+        return self.tabela.num_rows
+
+    def __iter__(self):
+        for bloco in self.tabela.column("codigo").chunks:
+            yield from bloco.to_pylist()
+
+    def linhas(self, *campos):
+        """Tuplas com os valores de `campos`, lote a lote e sem criar Peca."""
+        for lote in self.tabela.to_batches():
+            yield from zip(*(lote.column(c).to_pylist() for c in campos))
+
+    def items(self):
+        """(codigo, produto) lote a lote: bem mais rápido que buscar código por código."""
+        for valores in self.linhas(*CAMPOS):
+            yield valores[0], Peca(*valores)
+
+    def coluna(self, nome):
+        """Coluna inteira como ChunkedArray (para filtros vetorizados com pyarrow.compute)."""
+        return self.tabela.column(nome)
+
+
+def _schema(chave):
+    return pa.schema([(c, pa.string()) for c in CAMPOS], metadata={"chave_produtos": chave, "versao": VERSAO})
+
+
+@medido("colunar.gerar_snapshot")
+def gerar_snapshot(chave, caminho=SNAPSHOT_ARROW):
+    """Grava o snapshot em `caminho` e devolve a tabela aberta."""
+    schema = _schema(chave)
+    tmp = f"{caminho}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+    try:
+        with pa.OSFile(tmp, "wb") as arquivo, ipc.new_file(arquivo, schema) as escritor:
+            for lote in storage.iterar_lotes_por_codigo(TAMANHO_LOTE):
+                lote = [linha for linha in lote if str(linha[0] or "").strip()]
+                if not lote:
+                    continue
+                colunas = list(zip(*lote))
+                escritor.write_batch(pa.record_batch(
+                    [pa.array(valores, type=pa.string()) for valores in colunas], schema=schema
+                ))
+        try:
+            os.replace(tmp, caminho)
+        except OSError:
+            # Windows: o arquivo antigo pode estar mapeado por outro processo.
+            # Usa uma cópia em memória; a próxima carga tenta gravar de novo.
+            with pa.OSFile(tmp, "rb") as arquivo:
+                return ipc.open_file(arquivo).read_all()
+    finally:
+        with suppress(OSError):
+            os.remove(tmp)
+    return _abrir(caminho)
+
+
+def _abrir(caminho):
+    return ipc.open_file(pa.memory_map(caminho, "r")).read_all()
+
+
+@medido("colunar.carregar_produtos")
+def carregar_produtos(caminho=SNAPSHOT_ARROW):
+    """Produtos atuais a partir do snapshot, gerando-o de novo se estiver desatualizado."""
+    chave = storage.chave_produtos()
+
+    tabela = None
+    if os.path.exists(caminho):
+        try:
+            tabela = _abrir(caminho)
+        except (OSError, pa.ArrowInvalid):
+            tabela = None  # arquivo corrompido / de outra versão: gera de novo
+
+    metadata = (tabela.schema.metadata or {}) if tabela is not None else {}
+    if metadata.get(b"chave_produtos") != chave.encode() or metadata.get(b"versao") != VERSAO.encode():
+        tabela = gerar_snapshot(chave, caminho)
+
+    return ProdutosColunares(tabela)
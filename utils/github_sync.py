@@ -0,0 +1,310 @@
+import base64
+import hashlib
+import threading
+import time
+
+import requests
+import streamlit as st
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+from utils import alteracoes, storage
+from utils.instrumentacao import medir
+
+# -----------------------------------------------------------
+# Fila de sincronização com o GitHub.
+# As páginas só enfileiram arquivos e retornam na hora; uma thread
+# em segundo plano junta as alterações (o mesmo caminho enfileirado
+# várias vezes vira um único envio) e grava tudo em UM commit usando
+# a Git Data API (blobs -> tree -> commit -> ref).
+#
+# Arquivos que precisam ser lidos no mesmo instante (o snapshot de
+# produtos e o log esvaziado pela compactação) entram como um grupo:
+# uma função gera o conteúdo de todos de uma vez e eles seguem no
+# mesmo commit.
+# -----------------------------------------------------------
+API_URL = "https://api.github.com"
+ATRASO_LOTE = 2.0   # segundos esperando mais alterações antes de enviar
+TENTATIVAS = 5
+ESPERA_INICIAL = 1.0  # segundos antes da 2ª tentativa; dobra a cada falha
+ESPERA_MAXIMA = 30
+
+
+class ErroGitHub(Exception):
+    pass
+
+
+def _sha_blob(conteudo):
+    """SHA que o git atribui a um blob; permite pular arquivos sem mudança."""
+    cabecalho = f"blob {len(conteudo)}\0".encode()
+    return hashlib.sha1(cabecalho + conteudo).hexdigest()
+
+
+def _caminhos(fila):
+    return sorted(c for chave in fila for c in (chave if isinstance(chave, tuple) else (chave,)))
+
+
+class SincronizadorGitHub:
+    def __init__(self, token, usuario, repo, branch="main",
+                 api_url=API_URL, atraso_lote=ATRASO_LOTE, tentativas=TENTATIVAS,
+                 espera_inicial=ESPERA_INICIAL):
+        self.base = f"{api_url}/repos/{usuario}/{repo}"
+        self.branch = branch
+        self.atraso_lote = atraso_lote
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+
+        self._http = requests.Session()
+        self._http.headers.update({
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+        })
+
+        self._cond = threading.Condition()
+        self._pendentes = {}     # caminho_repo (ou tupla, num grupo) -> (origem, mensagem)
+        self._enviando = {}
+        self._thread = None
+
+        # cache local de SHAs: evita o GET antes de cada envio
+        self._head = None        # (sha do commit, sha da tree)
+        self._blobs = {}         # caminho_repo -> sha do blob já publicado
+
+        self._status = {
+            "ultimo_commit": None,
+            "ultima_sincronizacao": None,
+            "ultimo_erro": None,
+            "arquivos_enviados": 0,
+        }
+
+    # ===========================
+    # API PÚBLICA
+    # ===========================
+    def enfileirar(self, caminho_repo, origem, mensagem):
+        """`origem` é um caminho local ou uma função que gera o arquivo e devolve o caminho.
+
+        Uma função é chamada só no momento do envio, então exportações
+        repetidas do mesmo arquivo custam uma única geração.
+        """
+        with self._cond:
+            self._pendentes[caminho_repo] = (origem, mensagem)
+            self._iniciar_thread()
+            self._cond.notify()
+
+    def enfileirar_remocao(self, caminho_repo, mensagem):
+        self.enfileirar(caminho_repo, None, mensagem)
+
+    def enfileirar_grupo(self, caminhos_repo, gerar, mensagem):
+        """`gerar()` devolve {caminho_repo: bytes} de todos os `caminhos_repo` de uma vez.
+
+        O grupo substitui os envios avulsos desses caminhos que ainda
+        estão na fila; os enfileirados depois dele são lidos depois dele.
+        """
+        chave = tuple(caminhos_repo)
+        with self._cond:
+            for caminho in chave:
+                self._pendentes.pop(caminho, None)
+            self._pendentes.pop(chave, None)
+            self._pendentes[chave] = (gerar, mensagem)
+            self._iniciar_thread()
+            self._cond.notify()
+
+    def status(self):
+        with self._cond:
+            return {
+                **self._status,
+                "pendentes": _caminhos(self._pendentes),
+                "enviando": _caminhos(self._enviando),
+            }
+
+    def aguardar(self, timeout=None):
+        """Bloqueia até a fila esvaziar (útil em scripts e testes)."""
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pendentes or self._enviando:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                self._cond.wait(restante)
+        return True
+
+    # ===========================
+    # THREAD DE ENVIO
+    # ===========================
+    def _iniciar_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="github-sync", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pendentes:
+                    self._cond.wait()
+
+            # janela curta para juntar alterações em sequência
+            time.sleep(self.atraso_lote)
+
+            with self._cond:
+                lote, self._pendentes = self._pendentes, {}
+                self._enviando = lote
+
+            try:
+                commit = self._enviar_com_retentativas(lote)
+                with self._cond:
+                    self._status["ultimo_erro"] = None
+                    self._status["ultima_sincronizacao"] = time.time()
+                    if commit:
+                        self._status["ultimo_commit"] = commit
+                        self._status["arquivos_enviados"] += len(_caminhos(lote))
+            except Exception as e:
+                with self._cond:
+                    self._status["ultimo_erro"] = str(e)
+                    # devolve à fila o que não foi substituído por algo mais novo
+                    for caminho, item in lote.items():
+                        self._pendentes.setdefault(caminho, item)
+                time.sleep(self.atraso_lote * 10)
+            finally:
+                with self._cond:
+                    self._enviando = {}
+                    self._cond.notify_all()
+
+    def _enviar_com_retentativas(self, lote):
+        @retry(
+            stop=stop_after_attempt(self.tentativas),
+            wait=wait_exponential(multiplier=self.espera_inicial, max=ESPERA_MAXIMA),
+            reraise=True,
+        )
+        def enviar():
+            return self._enviar(lote)
+
+        with medir("github_sync.lote"):
+            return enviar()
+
+    # ===========================
+    # GIT DATA API
+    # ===========================
+    def _req(self, metodo, caminho, **kwargs):
+        with medir(f"github_sync.{metodo}"):
+            resp = self._http.request(metodo, f"{self.base}{caminho}", timeout=30, **kwargs)
+        if resp.status_code >= 400:
+            raise ErroGitHub(f"{metodo} {caminho}: {resp.status_code} {resp.text[:200]}")
+        return resp.json()
+
+    def _obter_head(self):
+        if self._head is None:
+            ref = self._req("GET", f"/git/ref/heads/{self.branch}")
+            commit_sha = ref["object"]["sha"]
+            commit = self._req("GET", f"/git/commits/{commit_sha}")
+            self._head = (commit_sha, commit["tree"]["sha"])
+        return self._head
+
+    def _ler(self, lote):
+        """{caminho_repo: bytes ou None (remoção)} na ordem em que o lote foi enfileirado."""
+        conteudos = {}
+        for chave, (origem, _) in lote.items():
+            if isinstance(chave, tuple):
+                conteudos.update(origem())
+            elif origem is None:
+                conteudos[chave] = None
+            else:
+                caminho_local = origem() if callable(origem) else origem
+                with open(caminho_local, "rb") as f:
+                    conteudos[chave] = f.read()
+        return conteudos
+
+    def _enviar(self, lote):
+        entradas = []
+        novos_blobs = {}
+
+        for caminho_repo, conteudo in self._ler(lote).items():
+            if conteudo is None:
+                entradas.append({"path": caminho_repo, "mode": "100644", "type": "blob", "sha": None})
+                novos_blobs[caminho_repo] = None
+                continue
+
+            sha = _sha_blob(conteudo)
+            if self._blobs.get(caminho_repo) == sha:
+                continue  # idêntico ao que já está no GitHub
+
+            blob = self._req("POST", "/git/blobs", json={
+                "content": base64.b64encode(conteudo).decode(),
+                "encoding": "base64",
+            })
+            entradas.append({"path": caminho_repo, "mode": "100644", "type": "blob", "sha": blob["sha"]})
+            novos_blobs[caminho_repo] = sha
+
+        if not entradas:
+            return None
+
+        mensagens = [m for _, m in lote.values()]
+        if len(mensagens) == 1:
+            mensagem = mensagens[0]
+        else:
+            mensagem = f"Sincronizando {len(mensagens)} arquivos\n\n" + "\n".join(f"- {m}" for m in mensagens)
+
+        head_sha, tree_sha = self._obter_head()
+        try:
+            tree = self._req("POST", "/git/trees", json={"base_tree": tree_sha, "tree": entradas})
+            commit = self._req("POST", "/git/commits", json={
+                "message": mensagem,
+                "tree": tree["sha"],
+                "parents": [head_sha],
+            })
+            self._req("PATCH", f"/git/refs/heads/{self.branch}", json={"sha": commit["sha"]})
+        except ErroGitHub:
+            # o branch pode ter andado por fora: busca o head de novo na próxima tentativa
+            self._head = None
+            raise
+
+        self._head = (commit["sha"], tree["sha"])
+        for caminho_repo, sha in novos_blobs.items():
+            if sha is None:
+                self._blobs.pop(caminho_repo, None)
+            else:
+                self._blobs[caminho_repo] = sha
+        return commit["sha"]
+
+
+# -----------------------------------------------------------
+# Instância única por processo, configurada pelos secrets
+# -----------------------------------------------------------
+_lock = threading.Lock()
+_sincronizador = None
+
+
+def obter_sincronizador():
+    global _sincronizador
+
+    if _sincronizador is None:
+        with _lock:
+            if _sincronizador is None:
+                _sincronizador = SincronizadorGitHub(
+                    st.secrets["GITHUB_TOKEN"],
+                    st.secrets["GITHUB_USER"],
+                    st.secrets["GITHUB_REPO"],
+                    branch=st.secrets.get("GITHUB_BRANCH", "main"),
+                )
+    return _sincronizador
+
+
+def enfileirar(caminho_repo, origem, mensagem):
+    obter_sincronizador().enfileirar(caminho_repo, origem, mensagem)
+
+
+def enfileirar_produtos(mensagem):
+    """Envia as alterações de produtos: só o log, ou o snapshot compactado quando o log cresceu."""
+    if alteracoes.precisa_compactar(storage.PRODUTOS_JSON):
+        obter_sincronizador().enfileirar_grupo(
+            (storage.PRODUTOS_JSON, alteracoes.ALTERACOES_JSONL),
+            storage.compactar_produtos,
+            f"{mensagem} (compactando database.json)",
+        )
+    else:
+        enfileirar(alteracoes.ALTERACOES_JSONL, alteracoes.ALTERACOES_JSONL, mensagem)
+
+
+def enfileirar_remocao(caminho_repo, mensagem):
+    obter_sincronizador().enfileirar_remocao(caminho_repo, mensagem)
+
+
+def status():
+    return obter_sincronizador().status()
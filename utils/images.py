@@ -1,5 +1,77 @@
 import base64
+import hashlib
+import mimetypes
+import os
+import threading
 
+import streamlit as st
+
+from utils.instrumentacao import medido
+
+# -----------------------------------------------------------
+# Imagens fixas da interface (logo etc.).
+# Com server.enableStaticServing ligado, cada arquivo é copiado
+# uma vez para static/ com o hash do conteúdo no nome e a página
+# só referencia a URL: o navegador guarda a imagem entre reruns
+# e sessões. Sem static serving, cai para o data URI em base64,
+# calculado uma vez por versão do arquivo.
+# -----------------------------------------------------------
+STATIC_DIR = "static"
+
+_lock = threading.Lock()
+_base64 = {}    # (caminho, mtime, tamanho) -> base64
+_urls = {}      # (caminho, mtime, tamanho) -> URL em static/
+
+
+def _chave(path):
+    stat = os.stat(path)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+@medido("img_to_base64")
 def img_to_base64(path):
-    with open(path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
+    chave = _chave(path)
+    codificado = _base64.get(chave)
+    if codificado is None:
+        with open(path, "rb") as img_file:
+            codificado = base64.b64encode(img_file.read()).decode()
+        with _lock:
+            _base64[chave] = codificado
+    return codificado
+
+
+def _publicar(path):
+    with open(path, "rb") as f:
+        conteudo = f.read()
+    h = hashlib.sha1(conteudo).hexdigest()[:12]
+
+    nome, ext = os.path.splitext(os.path.basename(path))
+    arquivo = f"{nome}.{h}{ext}"
+    destino = os.path.join(STATIC_DIR, arquivo)
+
+    if not os.path.exists(destino):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        tmp = f"{destino}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(conteudo)
+        os.replace(tmp, destino)
+
+    # o "?v=" faz o Tornado responder com Cache-Control de longa duração
+    return f"app/static/{arquivo}?v={h}"
+
+
+def url_imagem(path):
+    """URL para usar em <img src>: arquivo estático com hash ou, sem static serving, data URI."""
+    if not st.get_option("server.enableStaticServing"):
+        mime = mimetypes.guess_type(path)[0] or "image/png"
+        return f"data:{mime};base64,{img_to_base64(path)}"
+
+    chave = _chave(path)
+    url = _urls.get(chave)
+    if url is None:
+        with _lock:
+            url = _urls.get(chave)
+            if url is None:
+                url = _publicar(path)
+                _urls[chave] = url
+    return url
@@ -1,17 +1,76 @@
-import json
+import threading
+from types import MappingProxyType
+
 import streamlit as st
 
+from utils import colunar, storage
+from utils.instrumentacao import medido
+from utils.modelo import ErroValidacao, Peca
+
+# -----------------------------------------------------------
+# Índice de produtos compartilhado entre todas as sessões.
+# Com pyarrow é o snapshot colunar mapeado em memória
+# (utils/colunar.py); sem ele, um dict de produtos.
+# É reconstruído apenas quando os produtos mudam
+# (storage.chave_produtos) ou quando alguma página chama
+# invalidar_database(); gravações de clientes não o afetam.
+# -----------------------------------------------------------
+_lock = threading.Lock()
+_cache = (None, None, None)  # (assinatura, chave dos produtos, índice)
+
+
+@medido("carregar_database.reconstruir")
+def _construir_indice():
+    if colunar.disponivel():
+        return colunar.carregar_produtos()
+
+    # dict codigo -> Peca (somente leitura); linhas sem código válido ficam de fora
+    indice = {}
+    for item in storage.listar_produtos():
+        try:
+            peca = Peca.de_dict(item)
+        except ErroValidacao:
+            continue
+        indice[peca.codigo] = peca
+    return MappingProxyType(indice)
+
+
+@medido("carregar_database")
 def carregar_database():
+    global _cache
+
     try:
-        with open("database/database.json", "r", encoding="utf-8") as f:
-            lista = json.load(f)
+        assinatura = storage.assinatura()
+        assinatura_cache, _, indice = _cache
+        if indice is not None and assinatura == assinatura_cache:
+            return indice
+
+        with _lock:
+            assinatura_cache, chave_cache, indice = _cache
+            if indice is not None and assinatura == assinatura_cache:
+                return indice
 
-        # converter para dict por código
-        return {item["codigo"]: item for item in lista}
+            # o banco mudou, mas talvez só nos clientes
+            chave = storage.chave_produtos()
+            if indice is None or chave != chave_cache:
+                indice = _construir_indice()
+            _cache = (assinatura, chave, indice)
+            return indice
 
-    except FileNotFoundError:
-        st.error("❌ O arquivo 'database.json' não foi encontrado em /database/")
-        return {}
     except Exception as e:
-        st.error(f"Erro ao carregar database.json: {e}")
-        return {}
\ No newline at end of file
+        st.error(f"Erro ao carregar a base de produtos: {e}")
+        return MappingProxyType({})
+
+
+def chave_database(indice):
+    """storage.chave_produtos() de quando `indice` foi montado (None se ele já foi trocado)."""
+    _, chave, atual = _cache
+    return chave if atual is indice else None
+
+
+def invalidar_database():
+    """Descarta o índice em memória; as gravações via utils.storage já o invalidam."""
+    global _cache
+
+    with _lock:
+        _cache = (None, None, None)
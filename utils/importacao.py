@@ -0,0 +1,354 @@
+"""Importação e exportação em lote de produtos e catálogos (CSV/XLSX).
+
+Uso:
+    python -m utils.importacao produtos pecas.csv --imagens fotos.zip [--simular]
+    python -m utils.importacao catalogos catalogos.csv [--simular]
+    python -m utils.importacao exportar-produtos produtos.csv
+    python -m utils.importacao exportar-catalogos catalogos.csv
+
+Produtos: colunas codigo, nome e, opcionalmente, descricao e imagem.
+Catálogos: uma linha por peça com id, cliente, vendedor, contato, codigo
+e, opcionalmente, personalizacao (JSON). O CSV é lido em blocos; códigos
+repetidos ficam com a última ocorrência e as imagens do zip são
+associadas pelo nome do arquivo (<codigo>.jpg/.png/...). As imagens
+passam pelo mesmo processamento dos uploads (utils/uploads.py) e só são
+gravadas depois de toda a validação, nunca numa simulação.
+"""
+import argparse
+import codecs
+import csv
+import io
+import json
+import os
+import zipfile
+
+import pandas as pd
+from PIL import Image
+
+from utils import storage
+from utils.busca import normalizar
+from utils.catalogo import CAMPOS_PERSONALIZAVEIS
+from utils.clients import invalidar_cliente
+from utils.instrumentacao import medido
+from utils.modelo import ErroValidacao, validar_codigo
+from utils.uploads import detectar_formato, processar_lote
+
+TAMANHO_BLOCO = 5000
+IMAGENS_DIR = "imagens"
+EXTENSOES_IMAGEM = {".jpg": "jpg", ".jpeg": "jpg", ".png": "png", ".webp": "webp"}
+MAX_ERROS_RELATADOS = 200
+
+COLUNAS_PRODUTO = storage.CAMPOS_PRODUTO
+COLUNAS_CATALOGO = ("id", "cliente", "vendedor", "contato", "codigo", "personalizacao")
+
+# separador usado na exportação (o Excel em português abre ";" direto)
+SEPARADOR = ";"
+
+
+# ===========================
+# LEITURA EM BLOCOS
+# ===========================
+def _separador(arquivo):
+    pos = arquivo.tell()
+    primeira = arquivo.readline()
+    arquivo.seek(pos)
+    if isinstance(primeira, bytes):
+        primeira = primeira.decode("utf-8", errors="ignore")
+    return ";" if primeira.count(";") > primeira.count(",") else ","
+
+
+def ler_blocos(arquivo, nome, tamanho_bloco=TAMANHO_BLOCO):
+    """DataFrames de até `tamanho_bloco` linhas, tudo como texto e com colunas normalizadas."""
+    ext = os.path.splitext(nome)[1].lower()
+
+    if ext in (".xlsx", ".xlsm", ".xls"):
+        # o pandas não lê planilhas em partes; a planilha inteira vai para a memória
+        try:
+            df = pd.read_excel(arquivo, dtype=str, keep_default_na=False)
+        except ImportError as e:
+            raise ValueError(
+                "Leitura de XLSX precisa do pacote openpyxl (pip install openpyxl); "
+                "ou salve a planilha como CSV."
+            ) from e
+        blocos = (df.iloc[i:i + tamanho_bloco] for i in range(0, len(df), tamanho_bloco))
+    else:
+        blocos = pd.read_csv(
+            arquivo,
+            sep=_separador(arquivo),
+            dtype=str,
+            keep_default_na=False,
+            encoding="utf-8-sig",
+            chunksize=tamanho_bloco,
+        )
+
+    for bloco in blocos:
+        # "Código", " DESCRIÇÃO " -> "codigo", "descricao"
+        bloco = bloco.rename(columns=lambda c: normalizar(c).replace(" ", "_"))
+        yield bloco.apply(lambda col: col.str.strip())
+
+
+def _exigir_colunas(bloco, obrigatorias):
+    faltando = [c for c in obrigatorias if c not in bloco.columns]
+    if faltando:
+        raise ValueError(f"Coluna(s) obrigatória(s) ausente(s): {', '.join(faltando)}")
+
+
+def _codigo_valido(codigo):
+    # o código vira nome de arquivo da imagem
+    try:
+        validar_codigo(codigo, para_arquivo=True)
+        return True
+    except ErroValidacao:
+        return False
+
+
+# ===========================
+# PRODUTOS
+# ===========================
+def _imagens_do_zip(zip_imagens):
+    """{codigo: nome do arquivo no zip} pelos nomes <codigo>.<ext>."""
+    if zip_imagens is None:
+        return None, {}
+    zf = zipfile.ZipFile(zip_imagens)
+    por_codigo = {}
+    for info in zf.infolist():
+        if info.is_dir():
+            continue
+        base, ext = os.path.splitext(os.path.basename(info.filename))
+        if ext.lower() in EXTENSOES_IMAGEM and not base.startswith("."):
+            por_codigo[base] = info.filename
+    return zf, por_codigo
+
+
+def _validar_imagem(zf, membro, codigo, imagens_dir):
+    """Caminho onde a imagem do zip será gravada; levanta erro se ela não for uma imagem aceita."""
+    conteudo = zf.read(membro)
+    with Image.open(io.BytesIO(conteudo)) as img:
+        img.verify()
+
+    # a extensão gravada vem do conteúdo, não do nome no zip
+    return f"{imagens_dir}/{codigo}.{detectar_formato(conteudo)}"
+
+
+def _gravar_imagens(zf, imagens):
+    """Processa [(produto, membro, destino, imagem anterior)]; devolve (gravadas, erros, criadas).
+
+    Um produto cuja imagem falhou volta a apontar para a imagem anterior.
+    `criadas` são os arquivos que não existiam antes (removidos se a
+    gravação dos produtos falhar).
+    """
+    criadas = [destino for _, _, destino, _ in imagens if not os.path.exists(destino)]
+    resultados = processar_lote((zf.read(membro), destino) for _, membro, destino, _ in imagens)
+
+    gravadas, erros = [], []
+    for (produto, membro, _, anterior), (destino, erro) in zip(imagens, resultados):
+        if erro is None:
+            gravadas.append(destino)
+        else:
+            produto["imagem"] = anterior
+            erros.append(f"{membro}: {erro}")
+    return gravadas, erros, [c for c in criadas if os.path.exists(c)]
+
+
+@medido("importacao.produtos")
+def importar_produtos(arquivo, nome, zip_imagens=None, simular=False, imagens_dir=IMAGENS_DIR):
+    """Valida, deduplica e grava os produtos numa única transação.
+
+    Colunas ausentes mantêm o valor atual do produto. Devolve o
+    relatório da importação; `relatorio["imagens"]` lista os arquivos
+    gravados, para serem enviados ao GitHub junto com os produtos.
+    """
+    relatorio = {"linhas": 0, "produtos": 0, "novos": 0, "duplicados": 0,
+                 "erros": [], "imagens": [], "imagens_invalidas": []}
+    produtos = {}
+    linha_arquivo = 1  # cabeçalho
+
+    for bloco in ler_blocos(arquivo, nome):
+        _exigir_colunas(bloco, ("codigo", "nome"))
+        colunas = [c for c in COLUNAS_PRODUTO if c in bloco.columns]
+
+        for registro in bloco[colunas].to_dict("records"):
+            linha_arquivo += 1
+            relatorio["linhas"] += 1
+            codigo = registro["codigo"]
+
+            if not _codigo_valido(codigo) or not registro["nome"]:
+                if len(relatorio["erros"]) < MAX_ERROS_RELATADOS:
+                    relatorio["erros"].append(f"linha {linha_arquivo}: código ou nome vazio/inválido")
+                continue
+            if codigo in produtos:
+                relatorio["duplicados"] += 1
+            if not registro.get("imagem"):
+                registro.pop("imagem", None)
+            produtos[codigo] = registro
+
+    existentes = storage.obter_produtos(list(produtos))
+    zf, imagens_zip = _imagens_do_zip(zip_imagens)
+
+    lista = []
+    imagens = []  # (produto, membro no zip, destino, imagem anterior)
+    for codigo, registro in produtos.items():
+        atual = existentes.get(codigo)
+        if atual is None:
+            relatorio["novos"] += 1
+        produto = {**(atual or {"descricao": "", "imagem": None}), **registro}
+
+        membro = imagens_zip.get(codigo)
+        if membro is not None:
+            try:
+                destino = _validar_imagem(zf, membro, codigo, imagens_dir)
+            except Exception as e:
+                relatorio["imagens_invalidas"].append(f"{membro}: {e}")
+            else:
+                imagens.append((produto, membro, destino, produto.get("imagem")))
+                produto["imagem"] = destino
+        lista.append(produto)
+
+    try:
+        if zf is not None:
+            sem_produto = sorted(set(imagens_zip) - set(produtos))
+            relatorio["imagens_sem_produto"] = sem_produto[:MAX_ERROS_RELATADOS]
+
+        relatorio["produtos"] = len(lista)
+        if simular or not lista:
+            return relatorio
+
+        # validação concluída: só agora as imagens vão para imagens/
+        gravadas, erros, criadas = _gravar_imagens(zf, imagens) if imagens else ([], [], [])
+        relatorio["imagens"] = gravadas
+        relatorio["imagens_invalidas"] += erros
+        try:
+            storage.salvar_produtos(lista)
+        except Exception:
+            for caminho in criadas:
+                os.remove(caminho)
+            raise
+        return relatorio
+    finally:
+        if zf is not None:
+            zf.close()
+
+
+# ===========================
+# CATÁLOGOS
+# ===========================
+@medido("importacao.catalogos")
+def importar_catalogos(arquivo, nome, simular=False):
+    """Substitui os catálogos presentes no arquivo (os demais não mudam), numa transação."""
+    relatorio = {"linhas": 0, "catalogos": [], "erros": [], "codigos_desconhecidos": []}
+    catalogos = {}
+    vistos = {}  # cliente_id -> códigos já incluídos
+    linha_arquivo = 1
+
+    for bloco in ler_blocos(arquivo, nome):
+        _exigir_colunas(bloco, ("id", "codigo"))
+
+        for registro in bloco.to_dict("records"):
+            linha_arquivo += 1
+            relatorio["linhas"] += 1
+            cliente_id, codigo = registro["id"], registro["codigo"]
+
+            if not _codigo_valido(cliente_id) or not codigo:
+                if len(relatorio["erros"]) < MAX_ERROS_RELATADOS:
+                    relatorio["erros"].append(f"linha {linha_arquivo}: id ou código vazio/inválido")
+                continue
+
+            dados = catalogos.setdefault(cliente_id, {
+                "cliente": registro.get("cliente") or cliente_id,
+                "vendedor": registro.get("vendedor", ""),
+                "contato": registro.get("contato", ""),
+                "pecas": [],
+                "personalizacoes": {},
+            })
+            codigos_cliente = vistos.setdefault(cliente_id, set())
+            if codigo in codigos_cliente:
+                continue  # peça repetida no mesmo catálogo
+            codigos_cliente.add(codigo)
+            dados["pecas"].append(codigo)
+
+            if registro.get("personalizacao"):
+                try:
+                    campos = json.loads(registro["personalizacao"])
+                    dados["personalizacoes"][codigo] = {
+                        k: v for k, v in campos.items() if k in CAMPOS_PERSONALIZAVEIS
+                    }
+                except (ValueError, AttributeError):
+                    relatorio["erros"].append(f"linha {linha_arquivo}: personalização não é um JSON válido")
+
+    codigos = {c for dados in catalogos.values() for c in dados["pecas"]}
+    conhecidos = storage.obter_produtos(list(codigos))
+    relatorio["codigos_desconhecidos"] = sorted(codigos - set(conhecidos))[:MAX_ERROS_RELATADOS]
+    relatorio["catalogos"] = list(catalogos)
+
+    if catalogos and not simular:
+        with storage.transacao():
+            for cliente_id, dados in catalogos.items():
+                storage.salvar_cliente(cliente_id, dados)
+        for cliente_id in catalogos:
+            invalidar_cliente(cliente_id)
+    return relatorio
+
+
+# ===========================
+# EXPORTAÇÃO
+# ===========================
+def linhas_produtos():
+    """Cabeçalho e uma linha por produto, lidos do banco aos poucos."""
+    yield COLUNAS_PRODUTO
+    for produto in storage.iterar_produtos():
+        yield [produto.get(c) or "" for c in COLUNAS_PRODUTO]
+
+
+def linhas_catalogos():
+    yield COLUNAS_CATALOGO
+    for linha in storage.iterar_pecas_clientes():
+        yield [linha.get(c) or "" for c in COLUNAS_CATALOGO]
+
+
+def csv_em_blocos(linhas, linhas_por_bloco=TAMANHO_BLOCO):
+    """Bytes do CSV (UTF-8 com BOM, para o Excel reconhecer os acentos) em blocos de linhas."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, delimiter=SEPARADOR)
+    yield codecs.BOM_UTF8
+    for i, linha in enumerate(linhas, 1):
+        escritor.writerow(linha)
+        if i % linhas_por_bloco == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def exportar_csv(linhas, caminho):
+    """Grava o CSV em `caminho` bloco a bloco (nunca o arquivo inteiro na memória)."""
+    with open(caminho, "wb") as f:
+        for bloco in csv_em_blocos(linhas):
+            f.write(bloco)
+    return caminho
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("acao", choices=["produtos", "catalogos", "exportar-produtos", "exportar-catalogos"])
+    parser.add_argument("arquivo")
+    parser.add_argument("--imagens", help="zip com as imagens (<codigo>.jpg/.png)")
+    parser.add_argument("--simular", action="store_true", help="só valida, não grava nada")
+    args = parser.parse_args()
+
+    if args.acao.startswith("exportar"):
+        linhas = linhas_produtos() if args.acao == "exportar-produtos" else linhas_catalogos()
+        exportar_csv(linhas, args.arquivo)
+        print(f"Exportado para {args.arquivo}")
+    else:
+        with open(args.arquivo, "rb") as f:
+            if args.acao == "produtos":
+                zip_imagens = open(args.imagens, "rb") if args.imagens else None
+                try:
+                    relatorio = importar_produtos(f, args.arquivo, zip_imagens, simular=args.simular)
+                finally:
+                    if zip_imagens:
+                        zip_imagens.close()
+            else:
+                relatorio = importar_catalogos(f, args.arquivo, simular=args.simular)
+        print(json.dumps(relatorio, indent=2, ensure_ascii=False))
@@ -0,0 +1,201 @@
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# -----------------------------------------------------------
+# Medição de tempo dos pontos quentes (carga de base, render,
+# imagens, gravações, GitHub). Guarda as últimas amostras de
+# cada trecho em memória para percentis e os últimos reruns de
+# cada página para o painel do admin.
+#
+# Se a variável ALCAM_TEMPOS_JSONL apontar para um arquivo,
+# cada trecho medido também vira uma linha JSON nele.
+# -----------------------------------------------------------
+JANELA_AMOSTRAS = 1000   # amostras guardadas por trecho
+ULTIMOS_RERUNS = 50
+PERCENTIS = (50, 90, 99)
+
+LOG_JSONL = os.environ.get("ALCAM_TEMPOS_JSONL")
+
+_lock = threading.Lock()
+_amostras = defaultdict(lambda: deque(maxlen=JANELA_AMOSTRAS))
+_totais = defaultdict(lambda: [0, 0.0])   # nome -> [contagem, soma ms]
+_reruns = deque(maxlen=ULTIMOS_RERUNS)
+_local = threading.local()                # rerun em andamento nesta thread
+
+
+def _escrever_jsonl(registro):
+    if not LOG_JSONL:
+        return
+    try:
+        with open(LOG_JSONL, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+    except OSError:
+        pass
+
+
+# ===========================
+# REGISTRO
+# ===========================
+def registrar(nome, ms):
+    with _lock:
+        _amostras[nome].append(ms)
+        total = _totais[nome]
+        total[0] += 1
+        total[1] += ms
+
+    rerun = getattr(_local, "rerun", None)
+    if rerun is not None:
+        rerun["trechos"].append((nome, ms))
+        rerun["fim"] = time.time()
+
+    _escrever_jsonl({
+        "ts": time.time(),
+        "trecho": nome,
+        "ms": round(ms, 3),
+        "rerun": rerun["id"] if rerun else None,
+        "pagina": rerun["pagina"] if rerun else None,
+    })
+
+
+@contextmanager
+def medir(nome):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar(nome, (time.perf_counter() - inicio) * 1000)
+
+
+def medido(nome):
+    """Decorador: mede cada chamada da função com o nome dado."""
+    def decorador(func):
+        @functools.wraps(func)
+        def envoltorio(*args, **kwargs):
+            with medir(nome):
+                return func(*args, **kwargs)
+        return envoltorio
+    return decorador
+
+
+# ===========================
+# RERUNS DAS PÁGINAS
+# ===========================
+def iniciar_rerun(pagina):
+    """Chamado no topo de cada página; os trechos medidos depois entram neste rerun.
+
+    O registro já entra na lista ao iniciar porque o st.stop() pode
+    interromper o script antes de finalizar_rerun().
+    """
+    agora = time.time()
+    rerun = {
+        "id": uuid.uuid4().hex[:8],
+        "pagina": pagina,
+        "inicio": agora,
+        "fim": agora,
+        "concluido": False,
+        "trechos": [],
+        "_perf": time.perf_counter(),
+    }
+    _local.rerun = rerun
+    with _lock:
+        _reruns.append(rerun)
+
+
+def finalizar_rerun():
+    rerun = getattr(_local, "rerun", None)
+    if rerun is None:
+        return
+    ms = (time.perf_counter() - rerun["_perf"]) * 1000
+    rerun["fim"] = time.time()
+    rerun["concluido"] = True
+    _local.rerun = None
+    registrar(f"rerun.{rerun['pagina']}", ms)
+
+
+@contextmanager
+def rerun_fragmento(nome):
+    """Para o corpo de um st.fragment.
+
+    Dentro do rerun da página não faz nada (os trechos entram nele);
+    quando só o fragmento roda de novo (cada execução do Streamlit
+    tem a sua thread, então não há rerun em andamento) ele vira um
+    rerun próprio com esse nome.
+    """
+    if getattr(_local, "rerun", None) is not None:
+        yield
+        return
+    iniciar_rerun(nome)
+    yield
+    finalizar_rerun()
+
+
+# ===========================
+# CONSULTA / EXPORTAÇÃO
+# ===========================
+def _percentil(ordenadas, p):
+    if not ordenadas:
+        return 0.0
+    k = (len(ordenadas) - 1) * p / 100
+    i = int(k)
+    j = min(i + 1, len(ordenadas) - 1)
+    return ordenadas[i] + (ordenadas[j] - ordenadas[i]) * (k - i)
+
+
+def resumo():
+    """Uma linha por trecho: contagem total, soma e percentis das últimas amostras."""
+    with _lock:
+        dados = {nome: (sorted(a), tuple(_totais[nome])) for nome, a in _amostras.items()}
+
+    linhas = []
+    for nome, (ordenadas, (contagem, soma)) in sorted(dados.items()):
+        linha = {"trecho": nome, "chamadas": contagem, "total_ms": round(soma, 1)}
+        for p in PERCENTIS:
+            linha[f"p{p}_ms"] = round(_percentil(ordenadas, p), 2)
+        linhas.append(linha)
+    return linhas
+
+
+def ultimos_reruns(n=10):
+    """Os `n` reruns mais recentes, com o tempo agrupado por trecho."""
+    with _lock:
+        recentes = list(_reruns)[-n:]
+
+    saida = []
+    for rerun in reversed(recentes):
+        por_trecho = defaultdict(lambda: [0, 0.0])
+        for nome, ms in list(rerun["trechos"]):
+            por_trecho[nome][0] += 1
+            por_trecho[nome][1] += ms
+        saida.append({
+            "id": rerun["id"],
+            "pagina": rerun["pagina"],
+            "inicio": rerun["inicio"],
+            "duracao_ms": round((rerun["fim"] - rerun["inicio"]) * 1000, 1),
+            "concluido": rerun["concluido"],
+            "trechos": {
+                nome: {"chamadas": c, "ms": round(ms, 2)}
+                for nome, (c, ms) in sorted(por_trecho.items(), key=lambda item: -item[1][1])
+            },
+        })
+    return saida
+
+
+def exportar_prometheus(prefixo="alcam_trecho_ms"):
+    """Texto no formato de exposição do Prometheus (summary por trecho)."""
+    linhas = [
+        f"# HELP {prefixo} Duração dos trechos instrumentados em milissegundos.",
+        f"# TYPE {prefixo} summary",
+    ]
+    for linha in resumo():
+        rotulo = linha["trecho"].replace("\\", "\\\\").replace('"', '\\"')
+        for p in PERCENTIS:
+            linhas.append(f'{prefixo}{{trecho="{rotulo}",quantile="{p / 100}"}} {linha[f"p{p}_ms"]}')
+        linhas.append(f'{prefixo}_sum{{trecho="{rotulo}"}} {linha["total_ms"]}')
+        linhas.append(f'{prefixo}_count{{trecho="{rotulo}"}} {linha["chamadas"]}')
+    return "\n".join(linhas) + "\n"
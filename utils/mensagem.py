@@ -0,0 +1,149 @@
+from collections import namedtuple
+from urllib.parse import quote
+
+# -----------------------------------------------------------
+# Texto do pedido enviado ao vendedor pelo WhatsApp
+#
+# O texto vai inteiro na URL (wa.me/<numero>?text=...), e URLs
+# longas demais são cortadas sem aviso pelo navegador ou pelo
+# WhatsApp. Por isso cada linha já nasce escapada para a URL
+# (linha_item, chamada uma vez por item pelo Carrinho) e a
+# montagem só soma tamanhos e concatena:
+#   1. tudo no formato completo, se couber em LIMITE_TEXTO;
+#   2. senão, tudo no formato compacto (código x quantidade);
+#   3. senão, o formato compacto dividido em mensagens
+#      numeradas ("parte 1/3"), cada uma dentro do limite (uma
+#      linha que sozinha passa do limite é cortada entre partes).
+# Com regras de rota (utils/rotas.py), o pedido vira um envio
+# por vendedor (montar_por_destino).
+# -----------------------------------------------------------
+LIMITE_URL = 2000                 # caracteres; seguro em navegadores e no app
+LIMITE_TEXTO = LIMITE_URL - 64    # sobra para "https://wa.me/<numero>?text="
+
+FORMATOS = ("completo", "compacto")
+ROTULOS = {"completo": "Itens Selecionados:", "compacto": "Itens (código x quantidade):"}
+
+# texto e o mesmo texto escapado para a URL
+Trecho = namedtuple("Trecho", "texto url")
+
+# formato usado, mensagens (Trecho) a enviar e tamanho total escapado
+Envio = namedtuple("Envio", "formato partes tamanho")
+
+QUEBRA = "\n"
+QUEBRA_URL = quote(QUEBRA)
+
+
+def trecho(texto):
+    return Trecho(texto, quote(texto))
+
+
+def linha_item(peca, quantidade):
+    """{formato: Trecho} da linha do item."""
+    return {
+        "completo": trecho(f"- {peca.nome} (código {peca.codigo}) — Quantidade: {quantidade}"),
+        "compacto": trecho(f"{peca.codigo} x{quantidade}"),
+    }
+
+
+def _cabecalho(nome_cliente, numero_pedido, vendedor, formato, parte=""):
+    titulo = "Pedido de Reposição de Peças"
+    if numero_pedido is not None:
+        titulo += f" nº {numero_pedido}"
+    para = f"\nVendedor: {vendedor}" if vendedor else ""
+    return trecho(f"{titulo}{parte}\nCliente: {nome_cliente}{para}\n\n{ROTULOS[formato]}")
+
+
+def _juntar(cabecalho, trechos):
+    return Trecho(
+        QUEBRA.join([cabecalho.texto, *(t.texto for t in trechos)]),
+        QUEBRA_URL.join([cabecalho.url, *(t.url for t in trechos)]),
+    )
+
+
+def _cortar(t, espaco):
+    """Pedaços de um trecho que sozinho não cabe: cada um com até `espaco` caracteres escapados."""
+    pedacos, atual, tamanho = [], [], 0
+    for c in t.texto:
+        custo = len(quote(c))
+        if atual and tamanho + custo > espaco:
+            pedacos.append(trecho("".join(atual)))
+            atual, tamanho = [], 0
+        atual.append(c)
+        tamanho += custo
+    if atual:
+        pedacos.append(trecho("".join(atual)))
+    return pedacos
+
+
+def _agrupar(trechos, reserva, limite):
+    grupos, atual, tamanho = [], [], reserva
+    for t in trechos:
+        custo = len(QUEBRA_URL) + len(t.url)
+        if reserva + custo > limite:
+            # linha maior que uma mensagem inteira: vai cortada em mensagens próprias
+            espaco = max(limite - reserva - len(QUEBRA_URL), 1)
+            if atual:
+                grupos.append(atual)
+            grupos.extend([pedaco] for pedaco in _cortar(t, espaco))
+            atual, tamanho = [], reserva
+            continue
+        if atual and tamanho + custo > limite:
+            grupos.append(atual)
+            atual, tamanho = [], reserva
+        atual.append(t)
+        tamanho += custo
+    if atual or not grupos:
+        grupos.append(atual)
+    return grupos
+
+
+def _dividir(nome_cliente, numero_pedido, vendedor, formato, trechos, limite):
+    """Enche mensagens de até `limite` caracteres escapados, na ordem dos itens."""
+    # o cabeçalho de cada parte é reservado com o maior número previsto;
+    # se as partes passarem disso, divide de novo com mais dígitos
+    digitos = 3
+    while True:
+        maior = "9" * digitos
+        reserva = len(_cabecalho(nome_cliente, numero_pedido, vendedor, formato, f" (parte {maior}/{maior})").url)
+        grupos = _agrupar(trechos, reserva, limite)
+        if len(str(len(grupos))) <= digitos:
+            break
+        digitos = len(str(len(grupos)))
+
+    total = len(grupos)
+    return [
+        _juntar(_cabecalho(nome_cliente, numero_pedido, vendedor, formato, f" (parte {i}/{total})"), grupo)
+        for i, grupo in enumerate(grupos, 1)
+    ]
+
+
+def montar_mensagem_linhas(nome_cliente, linhas, numero_pedido=None, limite=LIMITE_TEXTO, vendedor=None):
+    """Envio com as `linhas` (resultados de linha_item, na ordem do pedido)."""
+    for formato in FORMATOS:
+        cabecalho = _cabecalho(nome_cliente, numero_pedido, vendedor, formato)
+        tamanho = len(cabecalho.url) + sum(len(QUEBRA_URL) + len(l[formato].url) for l in linhas)
+        if tamanho <= limite:
+            partes = [_juntar(cabecalho, [l[formato] for l in linhas])]
+            return Envio(formato, partes, tamanho)
+
+    partes = _dividir(nome_cliente, numero_pedido, vendedor, formato, [l[formato] for l in linhas], limite)
+    return Envio(formato, partes, sum(len(p.url) for p in partes))
+
+
+def montar_mensagem(nome_cliente, pecas_selecionadas, quantidades, numero_pedido=None, limite=LIMITE_TEXTO):
+    linhas = [linha_item(p, quantidades[p.codigo]) for p in pecas_selecionadas]
+    return montar_mensagem_linhas(nome_cliente, linhas, numero_pedido, limite)
+
+
+def montar_por_destino(nome_cliente, itens, rotas, padrao, numero_pedido=None, limite=LIMITE_TEXTO):
+    """[(Destino, Envio)], um por vendedor, de `itens` [(codigo, linha_item)] na ordem do pedido.
+
+    `rotas` é um utils.rotas.Rotas e `padrao` o Destino das peças sem regra.
+    """
+    grupos = rotas.dividir(itens, padrao)
+    varios = len(grupos) > 1
+    return [
+        (destino, montar_mensagem_linhas(nome_cliente, linhas, numero_pedido, limite,
+                                         vendedor=destino.nome if varios else None))
+        for destino, linhas in grupos.items()
+    ]
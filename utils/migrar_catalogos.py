@@ -0,0 +1,91 @@
+"""Converte clientes/*.json para o formato normalizado (só códigos).
+
+Uso:
+    python -m utils.migrar_catalogos            # converte os arquivos
+    python -m utils.migrar_catalogos --simular  # só mostra o que mudaria
+
+Os dados copiados de cada peça (nome, descrição, imagem) iguais aos do
+produto atual (database.json + alteracoes.jsonl) são descartados; os que diferem viram personalizações do
+cliente e são listados para conferência. Itens sem código ficam em
+"itens_invalidos" e são mostrados na página do cliente.
+"""
+import argparse
+import glob
+import json
+import os
+
+from utils import alteracoes
+from utils.catalogo import FORMATO_ATUAL, CAMPOS_PERSONALIZAVEIS, itens_invalidos, normalizar_catalogo
+from utils.persistencia import gravar_atomico, trava_arquivo
+from utils.storage import CLIENTES_DIR, PRODUTOS_JSON
+
+
+def _divergencias(dados, produtos):
+    for item in dados.get("pecas", []):
+        if not isinstance(item, dict) or "codigo" not in item:
+            continue
+        produto = produtos.get(item["codigo"])
+        if produto is None:
+            yield f"peça {item['codigo']} não existe no database (dados mantidos como personalização)"
+            continue
+        for campo in CAMPOS_PERSONALIZAVEIS:
+            if campo in item and item[campo] != produto.get(campo):
+                yield f"peça {item['codigo']}: {campo} {item[campo]!r} ≠ database {produto.get(campo)!r} (vira personalização)"
+
+
+def _carregar_produtos(produtos_json, alteracoes_jsonl):
+    """Produtos atuais: snapshot + cauda do log. Linhas sem código ficam de fora, como no índice."""
+    with open(produtos_json, "r", encoding="utf-8") as f:
+        produtos = {
+            p["codigo"]: p for p in json.load(f)
+            if isinstance(p, dict) and str(p.get("codigo") or "").strip()
+        }
+    for entrada in alteracoes.ler(alteracoes_jsonl):
+        if entrada.get("op") == "salvar":
+            produtos[entrada["produto"]["codigo"]] = entrada["produto"]
+        elif entrada.get("op") == "remover":
+            produtos.pop(entrada["codigo"], None)
+    return produtos
+
+
+def migrar(clientes_dir=CLIENTES_DIR, produtos_json=PRODUTOS_JSON, simular=False,
+           alteracoes_jsonl=alteracoes.ALTERACOES_JSONL):
+    produtos = _carregar_produtos(produtos_json, alteracoes_jsonl)
+
+    convertidos = 0
+    for caminho in sorted(glob.glob(os.path.join(clientes_dir, "*.json"))):
+        # a trava impede que o app exporte o mesmo arquivo enquanto ele é convertido
+        with trava_arquivo(caminho):
+            with open(caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+
+            if dados.get("formato") == FORMATO_ATUAL:
+                continue
+
+            antes = os.path.getsize(caminho)
+            novo = normalizar_catalogo(dados, produtos)
+            conteudo = json.dumps(novo, indent=4, ensure_ascii=False)
+
+            print(f"{caminho}: {antes} -> {len(conteudo.encode())} bytes")
+            for aviso in _divergencias(dados, produtos):
+                print(f"  aviso: {aviso}")
+            for item in itens_invalidos(dados):
+                print(f"  sem código (mantido em itens_invalidos): {item}")
+
+            if not simular:
+                gravar_atomico(caminho, conteudo)
+        convertidos += 1
+
+    return convertidos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--simular", action="store_true", help="não grava nada")
+    parser.add_argument("--clientes", default=CLIENTES_DIR)
+    parser.add_argument("--database", default=PRODUTOS_JSON)
+    parser.add_argument("--alteracoes", default=alteracoes.ALTERACOES_JSONL)
+    args = parser.parse_args()
+
+    total = migrar(args.clientes, args.database, simular=args.simular, alteracoes_jsonl=args.alteracoes)
+    print(f"{total} catálogo(s) {'a converter' if args.simular else 'convertido(s)'}.")
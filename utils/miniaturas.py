@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+
+from cachetools import LRUCache
+from PIL import Image, features
+
+# -----------------------------------------------------------
+# Miniaturas pré-calculadas das imagens das peças.
+# Cada derivado é identificado pelo hash do conteúdo da imagem
+# original + largura, então uma imagem trocada gera novos
+# arquivos e os antigos nunca são servidos por engano.
+# -----------------------------------------------------------
+DERIVADOS_DIR = "imagens/derivados"
+LARGURAS = (160, 320, 640)
+
+# largura aproximada, em px, da coluna de imagem do catálogo (layout wide)
+LARGURA_CATALOGO = 320
+
+FORMATO = "WEBP" if features.check("webp") else "JPEG"
+EXTENSAO = "webp" if FORMATO == "WEBP" else "jpg"
+QUALIDADE = 80
+HASHES_EM_CACHE = 20000
+
+_lock = threading.Lock()
+_travas = {}  # hash -> [trava da geração dos derivados, quantos a usam]; sai quando ninguém usa
+_hashes = LRUCache(maxsize=HASHES_EM_CACHE)  # caminho -> (mtime, tamanho, hash do conteúdo)
+
+
+def _hash_conteudo(caminho):
+    stat = os.stat(caminho)
+    versao = (stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        entrada = _hashes.get(caminho)
+    if entrada is not None and entrada[:2] == versao:
+        return entrada[2]
+
+    with open(caminho, "rb") as f:
+        h = hashlib.sha1(f.read()).hexdigest()[:16]
+    with _lock:
+        _hashes[caminho] = (*versao, h)
+    return h
+
+
+def _largura_adequada(largura):
+    for w in LARGURAS:
+        if w >= largura:
+            return w
+    return LARGURAS[-1]
+
+
+def _caminho_derivado(h, largura):
+    return os.path.join(DERIVADOS_DIR, f"{h}_{largura}.{EXTENSAO}")
+
+
+def _gerar(imagem, destino, largura):
+    img = imagem.copy()
+    img.thumbnail((largura, largura * 4))
+
+    if FORMATO == "JPEG" and img.mode != "RGB":
+        fundo = Image.new("RGB", img.size, "white")
+        fundo.paste(img, mask=img.getchannel("A") if "A" in img.getbands() else None)
+        img = fundo
+    elif img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+
+    tmp = f"{destino}.{threading.get_ident()}.tmp"
+    if FORMATO == "WEBP":
+        img.save(tmp, FORMATO, quality=QUALIDADE, method=4)
+    else:
+        img.save(tmp, FORMATO, quality=QUALIDADE, optimize=True)
+    os.replace(tmp, destino)
+
+
+def gerar_derivados(caminho, larguras=LARGURAS):
+    """Gera (ou reaproveita) todas as miniaturas de uma imagem. Usada no upload."""
+    os.makedirs(DERIVADOS_DIR, exist_ok=True)
+    h = _hash_conteudo(caminho)
+
+    faltando = [w for w in larguras if not os.path.exists(_caminho_derivado(h, w))]
+    if faltando:
+        # uma trava por imagem: imagens diferentes são geradas em paralelo
+        with _lock:
+            entrada = _travas.setdefault(h, [threading.Lock(), 0])
+            entrada[1] += 1
+        try:
+            with entrada[0]:
+                # quem esperou a trava pode encontrar tudo já gerado
+                faltando = [w for w in faltando if not os.path.exists(_caminho_derivado(h, w))]
+                if faltando:
+                    with Image.open(caminho) as imagem:
+                        imagem.load()
+                        for w in faltando:
+                            _gerar(imagem, _caminho_derivado(h, w), w)
+        finally:
+            with _lock:
+                entrada[1] -= 1
+                if not entrada[1]:
+                    del _travas[h]
+
+    return {w: _caminho_derivado(h, w) for w in larguras}
+
+
+def miniatura(caminho, largura):
+    """Caminho da menor miniatura com pelo menos `largura` px.
+
+    Derivados ausentes são gerados na hora; se algo falhar devolve a
+    imagem original para a página continuar funcionando.
+    """
+    try:
+        w = _largura_adequada(largura)
+        destino = _caminho_derivado(_hash_conteudo(caminho), w)
+        if not os.path.exists(destino):
+            destino = gerar_derivados(caminho, (w,))[w]
+        return destino
+    except Exception:
+        return caminho
@@ -0,0 +1,225 @@
+import sys
+from types import MappingProxyType
+
+from utils.catalogo import CAMPOS_PERSONALIZAVEIS, FORMATO_ATUAL, normalizar_catalogo
+
+# -----------------------------------------------------------
+# Modelo das peças e catálogos usado pelas páginas.
+#
+# Peca e Catalogo são imutáveis e com __slots__: uma peça ocupa
+# um objeto pequeno em vez de um dict, e pode ser compartilhada
+# entre todas as sessões sem risco de alguém alterá-la. Códigos,
+# nomes e descrições passam por sys.intern: textos repetidos apontam
+# para a mesma string, e o interpretador solta a entrada quando
+# nenhuma peça usa mais o texto. Toda validação de peça fica aqui.
+# -----------------------------------------------------------
+CAMPOS_PECA = ("codigo", "nome", "descricao", "imagem")
+
+
+class ErroValidacao(ValueError):
+    pass
+
+
+def _compartilhar(texto):
+    return sys.intern(texto) if texto else ""
+
+
+def validar_codigo(codigo, para_arquivo=False):
+    """Código normalizado (texto sem espaços nas pontas) ou ErroValidacao.
+
+    `para_arquivo` exige também que o código sirva de nome de arquivo
+    (imagens novas são gravadas como imagens/<codigo>.<ext>).
+    """
+    codigo = str(codigo if codigo is not None else "").strip()
+    if not codigo:
+        raise ErroValidacao("Código da peça vazio.")
+    if para_arquivo and ("/" in codigo or "\\" in codigo or codigo in (".", "..")):
+        raise ErroValidacao(f"Código não pode ser usado como nome de arquivo: {codigo!r}")
+    return sys.intern(codigo)
+
+
+# ===========================
+# PEÇA
+# ===========================
+class Peca:
+    """Peça imutável; também aceita peca["campo"] e peca.get() como um dict somente leitura."""
+
+    __slots__ = CAMPOS_PECA
+
+    def __init__(self, codigo, nome="", descricao="", imagem=None):
+        set_ = object.__setattr__
+        set_(self, "codigo", validar_codigo(codigo))
+        set_(self, "nome", _compartilhar(str(nome or "")))
+        set_(self, "descricao", _compartilhar(str(descricao or "")))
+        set_(self, "imagem", imagem or None)
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(*(dados.get(campo) for campo in CAMPOS_PECA))
+
+    def para_dict(self):
+        return {campo: getattr(self, campo) for campo in CAMPOS_PECA}
+
+    def personalizada(self, campos):
+        """Cópia com os campos personalizados do cliente aplicados (o código nunca muda)."""
+        valores = self.para_dict()
+        valores.update((k, v) for k, v in campos.items() if k in CAMPOS_PERSONALIZAVEIS)
+        return Peca(**valores)
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("Peca é imutável")
+
+    def __delattr__(self, nome):
+        raise AttributeError("Peca é imutável")
+
+    # acesso como dict somente leitura (storage, busca e código antigo)
+    def __getitem__(self, campo):
+        if campo not in CAMPOS_PECA:
+            raise KeyError(campo)
+        return getattr(self, campo)
+
+    def get(self, campo, padrao=None):
+        return getattr(self, campo) if campo in CAMPOS_PECA else padrao
+
+    def keys(self):
+        return CAMPOS_PECA
+
+    def __eq__(self, outra):
+        if not isinstance(outra, Peca):
+            return NotImplemented
+        return all(getattr(self, c) == getattr(outra, c) for c in CAMPOS_PECA)
+
+    def __hash__(self):
+        return hash(tuple(getattr(self, c) for c in CAMPOS_PECA))
+
+    def __repr__(self):
+        return f"Peca({self.codigo!r}, {self.nome!r})"
+
+    def __reduce__(self):
+        return (Peca, tuple(getattr(self, c) for c in CAMPOS_PECA))
+
+
+# ===========================
+# CATÁLOGO
+# ===========================
+class Catalogo:
+    """Catálogo imutável de um cliente: códigos na ordem e personalizações por código."""
+
+    __slots__ = ("cliente", "vendedor", "contato", "pecas", "personalizacoes", "itens_invalidos")
+
+    def __init__(self, cliente="", vendedor="", contato="", pecas=(), personalizacoes=None, itens_invalidos=()):
+        set_ = object.__setattr__
+        set_(self, "cliente", cliente or "")
+        set_(self, "vendedor", vendedor or "")
+        set_(self, "contato", contato or "")
+
+        # códigos inválidos (vazios) não derrubam o catálogo: ficam de fora,
+        # como no índice de produtos, e são mostrados junto dos itens inválidos
+        itens_invalidos = list(itens_invalidos or ())
+        codigos = []
+        for codigo in pecas:
+            try:
+                codigos.append(validar_codigo(codigo))
+            except ErroValidacao:
+                itens_invalidos.append({"codigo": codigo})
+        codigos = tuple(codigos)
+        if len(set(codigos)) != len(codigos):
+            vistos = set()
+            codigos = tuple(c for c in codigos if not (c in vistos or vistos.add(c)))
+        set_(self, "pecas", codigos)
+
+        presentes = set(codigos)
+        set_(self, "personalizacoes", MappingProxyType({
+            sys.intern(codigo): MappingProxyType({k: v for k, v in campos.items() if k in CAMPOS_PERSONALIZAVEIS})
+            for codigo, campos in (personalizacoes or {}).items()
+            if codigo in presentes and campos
+        }))
+        # itens sem código válido: guardados só para serem mostrados
+        set_(self, "itens_invalidos", tuple(itens_invalidos))
+
+    @classmethod
+    def de_dict(cls, dados):
+        """Aceita o formato antigo ou o normalizado (ver utils/catalogo.py)."""
+        dados = normalizar_catalogo(dados)
+        return cls(dados["cliente"], dados["vendedor"], dados["contato"],
+                   dados["pecas"], dados["personalizacoes"], dados["itens_invalidos"])
+
+    def para_dict(self):
+        dados = {
+            "cliente": self.cliente,
+            "vendedor": self.vendedor,
+            "contato": self.contato,
+            "formato": FORMATO_ATUAL,
+            "pecas": list(self.pecas),
+            "personalizacoes": {c: dict(campos) for c, campos in self.personalizacoes.items()},
+        }
+        if self.itens_invalidos:
+            dados["itens_invalidos"] = list(self.itens_invalidos)
+        return dados
+
+    def com(self, **campos):
+        valores = {nome: getattr(self, nome) for nome in self.__slots__}
+        valores.update(campos)
+        return Catalogo(**valores)
+
+    def com_peca(self, codigo):
+        return self.com(pecas=self.pecas + (codigo,))
+
+    def sem_peca(self, codigo):
+        personalizacoes = {c: p for c, p in self.personalizacoes.items() if c != codigo}
+        return self.com(pecas=tuple(c for c in self.pecas if c != codigo), personalizacoes=personalizacoes)
+
+    def personalizar(self, codigo, campos):
+        """Define (ou remove, com `campos` vazio) o que muda na peça só para este cliente."""
+        personalizacoes = dict(self.personalizacoes)
+        if campos:
+            personalizacoes[codigo] = campos
+        else:
+            personalizacoes.pop(codigo, None)
+        return self.com(personalizacoes=personalizacoes)
+
+    def resolver(self, produtos):
+        """Junta os códigos com o índice de produtos de uma vez.
+
+        Retorna (pecas, faltando): `pecas` são Peca na ordem do
+        catálogo, já com as personalizações do cliente aplicadas;
+        `faltando` são os códigos ausentes do database.
+        """
+        pecas = []
+        faltando = []
+
+        for codigo in self.pecas:
+            produto = produtos.get(codigo)
+            if produto is None:
+                faltando.append(codigo)
+                continue
+
+            if not isinstance(produto, Peca):
+                produto = Peca.de_dict(produto)
+            extra = self.personalizacoes.get(codigo)
+            if extra:
+                produto = produto.personalizada(extra)
+            pecas.append(produto)
+
+        return pecas, faltando
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("Catalogo é imutável")
+
+    def __delattr__(self, nome):
+        raise AttributeError("Catalogo é imutável")
+
+    def __eq__(self, outro):
+        if not isinstance(outro, Catalogo):
+            return NotImplemented
+        return all(getattr(self, c) == getattr(outro, c) for c in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Catalogo({self.cliente!r}, {len(self.pecas)} peças)"
+
+    def __reduce__(self):
+        return (Catalogo, (self.cliente, self.vendedor, self.contato, self.pecas,
+                           {c: dict(p) for c, p in self.personalizacoes.items()},
+                           self.itens_invalidos))
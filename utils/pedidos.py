@@ -0,0 +1,137 @@
+import json
+import secrets
+import time
+
+from utils import previsao, storage
+from utils.instrumentacao import medido
+
+# -----------------------------------------------------------
+# Pedidos confirmados e carrinhos salvos (tabelas em storage.SCHEMA).
+#
+# Pedidos só recebem INSERT. O ranking de peças frequentes de
+# cada cliente (pecas_frequentes) é atualizado na mesma transação
+# do pedido, então a consulta nunca percorre o histórico: tanto
+# o último pedido quanto o ranking são buscas por índice, com o
+# mesmo custo para dez ou para milhões de pedidos. As estatísticas
+# de reposição (utils/previsao.py) são somadas do mesmo jeito.
+#
+# O carrinho da sessão é gravado a cada alteração sob um token
+# curto que vai na URL (?carrinho=...): recarregar a página ou
+# abrir o link em outro aparelho recupera a seleção.
+# -----------------------------------------------------------
+TAMANHO_TOKEN = 6  # bytes aleatórios -> 8 caracteres na URL
+
+
+# ===========================
+# PEDIDOS
+# ===========================
+@medido("pedidos.registrar")
+def registrar_pedido(cliente_id, itens, token=None):
+    """Grava um pedido com `itens` [(codigo, quantidade)] e devolve o número dele."""
+    itens = [(codigo, int(qtd)) for codigo, qtd in itens if int(qtd) > 0]
+    if not itens:
+        raise ValueError("Pedido sem itens.")
+
+    criado_em = time.time()
+    with storage.transacao() as con:
+        pedido_id = con.execute(
+            "INSERT INTO pedidos (cliente_id, criado_em, token) VALUES (?, ?, ?)",
+            (cliente_id, criado_em, token),
+        ).lastrowid
+        con.executemany(
+            "INSERT INTO pedido_itens (pedido_id, codigo, quantidade) VALUES (?, ?, ?)",
+            [(pedido_id, codigo, qtd) for codigo, qtd in itens],
+        )
+        con.executemany(
+            """
+            INSERT INTO pecas_frequentes (cliente_id, codigo, pedidos, unidades, ultimo_pedido)
+            VALUES (?, ?, 1, ?, ?)
+            ON CONFLICT (cliente_id, codigo) DO UPDATE SET
+                pedidos = pedidos + 1,
+                unidades = unidades + excluded.unidades,
+                ultimo_pedido = excluded.ultimo_pedido
+            """,
+            [(cliente_id, codigo, qtd, pedido_id) for codigo, qtd in itens],
+        )
+        previsao.registrar_itens(con, cliente_id, itens, criado_em)
+    return pedido_id
+
+
+def itens_do_pedido(pedido_id):
+    return {
+        linha["codigo"]: linha["quantidade"]
+        for linha in storage.conectar().execute(
+            "SELECT codigo, quantidade FROM pedido_itens WHERE pedido_id = ?", (pedido_id,)
+        )
+    }
+
+
+def ultimo_pedido(cliente_id):
+    """{"id", "criado_em", "itens": {codigo: quantidade}} do pedido mais recente, ou None."""
+    linha = storage.conectar().execute(
+        "SELECT id, criado_em FROM pedidos WHERE cliente_id = ? ORDER BY id DESC LIMIT 1",
+        (cliente_id,),
+    ).fetchone()
+    if linha is None:
+        return None
+    return {"id": linha["id"], "criado_em": linha["criado_em"], "itens": itens_do_pedido(linha["id"])}
+
+
+def ranking_pecas(cliente_id, limite=None):
+    """Códigos já pedidos pelo cliente, dos mais frequentes para os menos."""
+    sql = ("SELECT codigo FROM pecas_frequentes WHERE cliente_id = ? "
+           "ORDER BY pedidos DESC, unidades DESC")
+    params = [cliente_id]
+    if limite is not None:
+        sql += " LIMIT ?"
+        params.append(limite)
+    return [linha[0] for linha in storage.conectar().execute(sql, params)]
+
+
+@medido("pedidos.reconstruir_ranking")
+def reconstruir_ranking():
+    """Recalcula pecas_frequentes a partir de todo o histórico (manutenção)."""
+    with storage.transacao() as con:
+        con.execute("DELETE FROM pecas_frequentes")
+        con.execute(
+            """
+            INSERT INTO pecas_frequentes (cliente_id, codigo, pedidos, unidades, ultimo_pedido)
+            SELECT p.cliente_id, i.codigo, COUNT(*), SUM(i.quantidade), MAX(p.id)
+            FROM pedido_itens i
+            JOIN pedidos p ON p.id = i.pedido_id
+            GROUP BY p.cliente_id, i.codigo
+            """
+        )
+
+
+# ===========================
+# CARRINHOS
+# ===========================
+def novo_token():
+    return secrets.token_urlsafe(TAMANHO_TOKEN)
+
+
+def salvar_carrinho(token, cliente_id, itens):
+    """Grava (ou apaga, se vazio) o carrinho `itens` {codigo: quantidade}."""
+    with storage.transacao() as con:
+        if not itens:
+            con.execute("DELETE FROM carrinhos WHERE token = ?", (token,))
+            return
+        con.execute(
+            """
+            INSERT INTO carrinhos (token, cliente_id, itens, atualizado_em) VALUES (?, ?, ?, ?)
+            ON CONFLICT (token) DO UPDATE SET
+                itens = excluded.itens,
+                atualizado_em = excluded.atualizado_em
+            WHERE carrinhos.cliente_id = excluded.cliente_id
+            """,
+            (token, cliente_id, json.dumps(itens, ensure_ascii=False), time.time()),
+        )
+
+
+def carregar_carrinho(token, cliente_id):
+    """{codigo: quantidade} salvo sob `token` para este cliente, ou None."""
+    linha = storage.conectar().execute(
+        "SELECT itens FROM carrinhos WHERE token = ? AND cliente_id = ?", (token, cliente_id)
+    ).fetchone()
+    return json.loads(linha["itens"]) if linha else None
@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# -----------------------------------------------------------
+# Gravação segura dos arquivos JSON (database.json, clientes/*.json).
+#
+# - o conteúdo vai para um arquivo temporário na mesma pasta,
+#   passa por fsync e só então substitui o original (os.replace),
+#   então um leitor nunca vê o arquivo pela metade;
+# - quem grava segura uma trava de arquivo (<arquivo>.lock), o que
+#   serializa processos diferentes (duas instâncias do app, o
+#   migrador rodando junto com o app) e threads deste processo.
+# -----------------------------------------------------------
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def _lock_local(caminho):
+    with _locks_lock:
+        return _locks.setdefault(os.path.abspath(caminho), threading.Lock())
+
+
+def _travar(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except OSError:  # LK_LOCK desiste após ~10 s; continua esperando
+            time.sleep(0.1)
+
+
+def _destravar(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def trava_arquivo(caminho):
+    """Trava exclusiva de escrita para `caminho` (entre threads e processos)."""
+    with _lock_local(caminho):
+        fd = os.open(f"{caminho}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            _travar(fd)
+            try:
+                yield
+            finally:
+                _destravar(fd)
+        finally:
+            os.close(fd)
+
+
+def _fsync_pasta(pasta):
+    if fcntl is None:
+        return  # no Windows não dá para abrir diretório para fsync
+    fd = os.open(pasta, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def gravar_atomico(caminho, conteudo):
+    """Substitui `caminho` por `conteudo` (str ou bytes) sem nunca deixá-lo truncado."""
+    pasta = os.path.dirname(caminho) or "."
+    os.makedirs(pasta, exist_ok=True)
+    if isinstance(conteudo, str):
+        conteudo = conteudo.encode("utf-8")
+
+    tmp = os.path.join(pasta, f".{os.path.basename(caminho)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, caminho)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    _fsync_pasta(pasta)
+
+
+def gravar_json(caminho, dados, indent=4):
+    """json.dump atômico e serializado pela trava do arquivo."""
+    conteudo = json.dumps(dados, indent=indent, ensure_ascii=False)
+    with trava_arquivo(caminho):
+        gravar_atomico(caminho, conteudo)
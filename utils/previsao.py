@@ -0,0 +1,107 @@
+"""Previsão de reposição por cliente e peça.
+
+Uso (recálculo completo, ex.: todo dia de madrugada):
+    python -m utils.previsao
+"""
+import argparse
+import time
+from collections import namedtuple
+
+from utils import storage
+from utils.instrumentacao import medido
+
+# -----------------------------------------------------------
+# Para cada (cliente, peça) a tabela `reposicao` guarda quantos
+# pedidos tiveram a peça, o primeiro e o último e a soma das
+# quantidades. A soma dos intervalos entre pedidos consecutivos
+# é (último - primeiro), então isso basta para o intervalo médio
+# e a quantidade média, e cada pedido novo só atualiza a linha
+# (registrar_itens, chamado por pedidos.registrar_pedido).
+#
+# recalcular() refaz a tabela a partir do histórico inteiro e
+# serve de manutenção noturna.
+#
+# Uma peça está "no prazo" quando já passou (ou falta pouco
+# para) o intervalo médio desde o último pedido dela. Pedidos
+# todos no mesmo instante (mesmo segundo, pedido importado duas
+# vezes) não dão um intervalo e não geram sugestão.
+# -----------------------------------------------------------
+MIN_PEDIDOS = 2      # precisa de ao menos um intervalo
+FOLGA = 0.1          # avisa com 10% do intervalo de antecedência
+DIA = 86400
+
+Sugestao = namedtuple("Sugestao", "quantidade devido intervalo_dias dias_desde_ultimo")
+
+UPSERT_REPOSICAO = """
+INSERT INTO reposicao (cliente_id, codigo, pedidos, primeiro_em, ultimo_em, soma_qtd)
+VALUES (?, ?, 1, ?, ?, ?)
+ON CONFLICT (cliente_id, codigo) DO UPDATE SET
+    pedidos = pedidos + 1,
+    ultimo_em = excluded.ultimo_em,
+    soma_qtd = soma_qtd + excluded.soma_qtd
+"""
+
+
+def registrar_itens(con, cliente_id, itens, criado_em):
+    """Atualização incremental, dentro da transação do pedido."""
+    con.executemany(
+        UPSERT_REPOSICAO,
+        [(cliente_id, codigo, criado_em, criado_em, qtd) for codigo, qtd in itens],
+    )
+
+
+def _sugestao(pedidos, primeiro_em, ultimo_em, soma_qtd, agora):
+    quantidade = max(1, round(soma_qtd / pedidos))
+    dias_desde = (agora - ultimo_em) / DIA
+    if pedidos < MIN_PEDIDOS:
+        return Sugestao(quantidade, False, None, dias_desde)
+    intervalo = (ultimo_em - primeiro_em) / (pedidos - 1) / DIA
+    if intervalo <= 0:
+        return Sugestao(quantidade, False, None, dias_desde)
+    devido = dias_desde >= intervalo * (1 - FOLGA)
+    return Sugestao(quantidade, devido, intervalo, dias_desde)
+
+
+def sugestoes(cliente_id, agora=None):
+    """{codigo: Sugestao} das peças que o cliente já pediu."""
+    agora = time.time() if agora is None else agora
+    return {
+        linha["codigo"]: _sugestao(linha["pedidos"], linha["primeiro_em"],
+                                   linha["ultimo_em"], linha["soma_qtd"], agora)
+        for linha in storage.conectar().execute(
+            "SELECT codigo, pedidos, primeiro_em, ultimo_em, soma_qtd "
+            "FROM reposicao WHERE cliente_id = ?",
+            (cliente_id,),
+        )
+    }
+
+
+# ===========================
+# RECÁLCULO EM LOTE
+# ===========================
+@medido("previsao.recalcular")
+def recalcular():
+    """Refaz a tabela `reposicao` inteira a partir dos pedidos. Devolve quantas linhas gerou.
+
+    Como as estatísticas são só contagem, mínimo, máximo e soma, o
+    agrupamento roda dentro do SQLite: nenhuma linha do histórico
+    precisa virar objeto Python.
+    """
+    with storage.transacao() as con:
+        con.execute("DELETE FROM reposicao")
+        return con.execute(
+            """
+            INSERT INTO reposicao (cliente_id, codigo, pedidos, primeiro_em, ultimo_em, soma_qtd)
+            SELECT p.cliente_id, i.codigo, COUNT(*), MIN(p.criado_em), MAX(p.criado_em), SUM(i.quantidade)
+            FROM pedido_itens i
+            JOIN pedidos p ON p.id = i.pedido_id
+            GROUP BY p.cliente_id, i.codigo
+            """
+        ).rowcount
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Recalcula as estatísticas de reposição.").parse_args()
+    inicio = time.perf_counter()
+    total = recalcular()
+    print(f"{total} pares cliente/peça recalculados em {time.perf_counter() - inicio:.1f} s")
@@ -0,0 +1,114 @@
+import json
+import os
+import threading
+from collections import namedtuple
+
+# -----------------------------------------------------------
+# Para qual vendedor/armazém vai cada peça do pedido.
+#
+# As regras ficam em database/rotas.json (opcional):
+#     {
+#       "vendedores": {"sul": {"nome": "Armazém Sul", "contato": "5551..."}},
+#       "pecas":      {"P001": "sul"},    # código exato
+#       "categorias": {"FRE": "sul"}      # prefixo do código
+#     }
+# A regra da peça vale antes da categoria, e entre categorias
+# vale o prefixo mais longo. Peças sem regra vão para o vendedor
+# do catálogo do cliente. Regras de categoria são agrupadas pelo
+# tamanho do prefixo, então cada peça custa uma consulta de dict
+# por tamanho existente, qualquer que seja o número de regras.
+# -----------------------------------------------------------
+ROTAS_JSON = "database/rotas.json"
+
+Destino = namedtuple("Destino", "nome contato")
+
+
+class ErroRotas(ValueError):
+    pass
+
+
+class Rotas:
+    def __init__(self, vendedores=None, pecas=None, categorias=None):
+        vendedores = vendedores or {}
+        destinos = {}
+        for chave, dados in vendedores.items():
+            if not isinstance(dados, dict) or not str(dados.get("contato", "")).strip():
+                raise ErroRotas(f"Vendedor '{chave}' sem contato.")
+            destinos[chave] = Destino(str(dados.get("nome") or chave), str(dados["contato"]).strip())
+
+        def destino(chave, regra):
+            if chave not in destinos:
+                raise ErroRotas(f"Regra '{regra}' aponta para o vendedor desconhecido '{chave}'.")
+            return destinos[chave]
+
+        self._pecas = {str(codigo): destino(chave, codigo) for codigo, chave in (pecas or {}).items()}
+        self._prefixos = {}  # tamanho -> {prefixo: Destino}
+        for prefixo, chave in (categorias or {}).items():
+            prefixo = str(prefixo)
+            if not prefixo:
+                raise ErroRotas("Categoria com prefixo vazio.")
+            self._prefixos.setdefault(len(prefixo), {})[prefixo] = destino(chave, prefixo)
+        self._tamanhos = sorted(self._prefixos, reverse=True)
+
+    def __bool__(self):
+        return bool(self._pecas or self._prefixos)
+
+    def destino(self, codigo, padrao):
+        encontrado = self._pecas.get(codigo)
+        if encontrado is not None:
+            return encontrado
+        for tamanho in self._tamanhos:
+            encontrado = self._prefixos[tamanho].get(codigo[:tamanho])
+            if encontrado is not None:
+                return encontrado
+        return padrao
+
+    def dividir(self, itens, padrao):
+        """{Destino: [valor]} de `itens` [(codigo, valor)], mantendo a ordem dentro de cada destino."""
+        if not self:
+            return {padrao: [valor for _, valor in itens]}
+        grupos = {}
+        for codigo, valor in itens:
+            grupos.setdefault(self.destino(codigo, padrao), []).append(valor)
+        return grupos
+
+
+# ===========================
+# CARGA (relida só quando o arquivo muda)
+# ===========================
+_lock = threading.Lock()
+_carregadas = (None, Rotas())  # (assinatura do arquivo, Rotas)
+
+
+def _assinatura(caminho):
+    try:
+        stat = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def carregar_rotas(caminho=ROTAS_JSON):
+    """Rotas do arquivo (vazias se ele não existe). Levanta ErroRotas se ele for inválido."""
+    global _carregadas
+
+    assinatura = _assinatura(caminho)
+    with _lock:
+        if _carregadas[0] == assinatura:
+            return _carregadas[1]
+
+    if assinatura is None:
+        rotas = Rotas()
+    else:
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                dados = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ErroRotas(f"Não foi possível ler {caminho}: {e}") from e
+        if not isinstance(dados, dict):
+            raise ErroRotas(f"{caminho} deve conter um objeto JSON.")
+        rotas = Rotas(dados.get("vendedores"), dados.get("pecas"), dados.get("categorias"))
+
+    with _lock:
+        _carregadas = (assinatura, rotas)
+    return rotas
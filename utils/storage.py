@@ -0,0 +1,741 @@
+import glob
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+
+from utils import alteracoes
+from utils.catalogo import (
+    CAMPOS_PERSONALIZAVEIS, FORMATO_ATUAL, codigos_do_catalogo, formato_antigo, normalizar_catalogo,
+)
+from utils.instrumentacao import medido
+from utils.modelo import Catalogo
+from utils.persistencia import gravar_atomico, trava_arquivo
+
+# -----------------------------------------------------------
+# Armazenamento em SQLite (modo WAL) para produtos, clientes e
+# peças de cada cliente. Os arquivos JSON em database/ e clientes/
+# continuam existindo como cópia versionada no GitHub: quando o
+# banco ainda não existe ele é criado a partir deles (migrar_json).
+# -----------------------------------------------------------
+DB_FILE = "database/reposicao.db"
+PRODUTOS_JSON = "database/database.json"
+CLIENTES_DIR = "clientes"
+
+CAMPOS_PRODUTO = ("codigo", "nome", "descricao", "imagem")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS produtos (
+    codigo    TEXT PRIMARY KEY,
+    nome      TEXT NOT NULL DEFAULT '',
+    descricao TEXT NOT NULL DEFAULT '',
+    imagem    TEXT
+);
+
+CREATE TABLE IF NOT EXISTS clientes (
+    id        TEXT PRIMARY KEY,
+    cliente   TEXT NOT NULL DEFAULT '',
+    vendedor  TEXT NOT NULL DEFAULT '',
+    contato   TEXT NOT NULL DEFAULT '',
+    qtd_pecas INTEGER NOT NULL DEFAULT 0,
+    versao    INTEGER NOT NULL DEFAULT 0, -- incrementada a cada salvar_cliente
+    itens_invalidos TEXT                  -- JSON: itens sem código vindos do formato antigo
+);
+
+-- só o código da peça; personalizacao (JSON) guarda o que muda para o cliente
+CREATE TABLE IF NOT EXISTS cliente_pecas (
+    cliente_id      TEXT NOT NULL REFERENCES clientes (id) ON DELETE CASCADE,
+    posicao         INTEGER NOT NULL,
+    codigo          TEXT NOT NULL,
+    personalizacao  TEXT,
+    PRIMARY KEY (cliente_id, posicao)
+);
+
+-- identidade do banco e versão dos produtos (chave do snapshot colunar)
+CREATE TABLE IF NOT EXISTS metadados (
+    chave TEXT PRIMARY KEY,
+    valor TEXT NOT NULL
+);
+
+-- pedidos confirmados (só recebem INSERT; ver utils/pedidos.py)
+CREATE TABLE IF NOT EXISTS pedidos (
+    id         INTEGER PRIMARY KEY,
+    cliente_id TEXT NOT NULL,
+    criado_em  REAL NOT NULL,
+    token      TEXT              -- carrinho de onde o pedido saiu
+);
+
+CREATE TABLE IF NOT EXISTS pedido_itens (
+    pedido_id  INTEGER NOT NULL REFERENCES pedidos (id),
+    codigo     TEXT NOT NULL,
+    quantidade INTEGER NOT NULL,
+    PRIMARY KEY (pedido_id, codigo)
+) WITHOUT ROWID;
+
+-- ranking de peças por cliente, atualizado a cada pedido
+CREATE TABLE IF NOT EXISTS pecas_frequentes (
+    cliente_id    TEXT NOT NULL,
+    codigo        TEXT NOT NULL,
+    pedidos       INTEGER NOT NULL,   -- em quantos pedidos a peça apareceu
+    unidades      INTEGER NOT NULL,
+    ultimo_pedido INTEGER NOT NULL,
+    PRIMARY KEY (cliente_id, codigo)
+) WITHOUT ROWID;
+
+-- estatísticas de reposição por cliente e peça (ver utils/previsao.py)
+CREATE TABLE IF NOT EXISTS reposicao (
+    cliente_id  TEXT NOT NULL,
+    codigo      TEXT NOT NULL,
+    pedidos     INTEGER NOT NULL,
+    primeiro_em REAL NOT NULL,   -- intervalo médio = (ultimo - primeiro) / (pedidos - 1)
+    ultimo_em   REAL NOT NULL,
+    soma_qtd    INTEGER NOT NULL,
+    PRIMARY KEY (cliente_id, codigo)
+) WITHOUT ROWID;
+
+-- carrinhos em andamento, recuperados pelo token da URL
+CREATE TABLE IF NOT EXISTS carrinhos (
+    token         TEXT PRIMARY KEY,
+    cliente_id    TEXT NOT NULL,
+    itens         TEXT NOT NULL,      -- JSON {codigo: quantidade}
+    atualizado_em REAL NOT NULL
+);
+
+-- mtime/tamanho de cada clientes/*.json já importado ou exportado
+CREATE TABLE IF NOT EXISTS arquivos_json (
+    caminho  TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    tamanho  INTEGER NOT NULL
+);
+"""
+
+# índices do diretório de clientes (criados depois das colunas novas)
+INDICES = """
+CREATE INDEX IF NOT EXISTS idx_cliente_pecas_codigo ON cliente_pecas (codigo);
+-- a primeira versão de idx_clientes_vendedor era só (vendedor)
+DROP INDEX IF EXISTS idx_clientes_vendedor;
+CREATE INDEX IF NOT EXISTS idx_clientes_vendedor_cliente ON clientes (vendedor, cliente);
+CREATE INDEX IF NOT EXISTS idx_clientes_cliente ON clientes (cliente);
+CREATE INDEX IF NOT EXISTS idx_clientes_qtd ON clientes (qtd_pecas);
+CREATE INDEX IF NOT EXISTS idx_pedidos_cliente ON pedidos (cliente_id, id);
+CREATE INDEX IF NOT EXISTS idx_pecas_frequentes_ranking
+    ON pecas_frequentes (cliente_id, pedidos DESC, unidades DESC);
+"""
+
+# colunas acrescentadas depois da primeira versão do banco
+COLUNAS_NOVAS = {
+    "clientes": {
+        "qtd_pecas": "INTEGER NOT NULL DEFAULT 0",
+        "versao": "INTEGER NOT NULL DEFAULT 0",
+        "itens_invalidos": "TEXT",
+    },
+}
+
+UPSERT_PRODUTO = """
+INSERT INTO produtos (codigo, nome, descricao, imagem)
+VALUES (:codigo, :nome, :descricao, :imagem)
+ON CONFLICT (codigo) DO UPDATE SET
+    nome = excluded.nome,
+    descricao = excluded.descricao,
+    imagem = excluded.imagem
+"""
+
+# ordenações aceitas por listar_clientes
+ORDENACOES = {
+    "cliente": "cliente COLLATE NOCASE, id",
+    "vendedor": "vendedor COLLATE NOCASE, cliente COLLATE NOCASE, id",
+    "qtd_pecas": "qtd_pecas DESC, cliente COLLATE NOCASE, id",
+    "id": "id",
+}
+
+
+
+class ConflitoVersao(Exception):
+    """O catálogo foi alterado por outra pessoa desde que foi lido."""
+
+
+_lock = threading.RLock()
+_local = threading.local()   # uma conexão por thread
+_preparado = False           # schema criado/migrado neste processo
+_versao = 0  # incrementada a cada transação gravada neste processo
+
+TEMPO_ESPERA_TRAVA = 30  # segundos que um escritor espera outro (outro processo ou thread)
+
+
+# ===========================
+# CONEXÃO / TRANSAÇÕES
+# ===========================
+# Cada thread (sessões do Streamlit, API, sincronização) tem a sua
+# conexão: com WAL, uma leitura só enxerga transações já gravadas e
+# nunca o meio de uma transação aberta por outra thread.
+def _abrir():
+    con = sqlite3.connect(DB_FILE, isolation_level=None, timeout=TEMPO_ESPERA_TRAVA)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA foreign_keys=ON")
+    return con
+
+
+def conectar():
+    """Retorna a conexão desta thread, criando e migrando o banco se preciso."""
+    global _preparado
+
+    con = getattr(_local, "con", None)
+    if con is not None:
+        return con
+
+    with _lock:
+        if not _preparado:
+            os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
+            novo = not os.path.exists(DB_FILE)
+
+            con = _abrir()
+            con.executescript(SCHEMA)
+            _atualizar_schema(con)
+            _normalizar_cliente_pecas(con)
+            con.executescript(INDICES)
+            con.execute(
+                "INSERT OR IGNORE INTO metadados (chave, valor) VALUES ('id_banco', ?), ('versao_produtos', '0')",
+                (uuid.uuid4().hex,),
+            )
+            _local.con = con
+            _preparado = True
+
+            if novo:
+                migrar_json()
+            return con
+
+    con = _local.con = _abrir()
+    return con
+
+
+def _atualizar_schema(con):
+    for tabela, colunas in COLUNAS_NOVAS.items():
+        existentes = {linha["name"] for linha in con.execute(f"PRAGMA table_info({tabela})")}
+        for coluna, definicao in colunas.items():
+            if coluna not in existentes:
+                con.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+
+                if (tabela, coluna) == ("clientes", "qtd_pecas"):
+                    con.execute(
+                        "UPDATE clientes SET qtd_pecas = "
+                        "(SELECT COUNT(*) FROM cliente_pecas cp WHERE cp.cliente_id = clientes.id)"
+                    )
+
+
+def _normalizar_cliente_pecas(con):
+    """Bancos antigos copiavam nome/descricao/imagem em cada cliente: guarda só o código.
+
+    Valores copiados que diferem do produto são do cliente e viram
+    personalização, como em catalogo.personalizacoes_copiadas.
+    """
+    colunas = {linha["name"] for linha in con.execute("PRAGMA table_info(cliente_pecas)")}
+    if "personalizacao" in colunas:
+        return
+
+    con.execute("BEGIN IMMEDIATE")
+    con.execute("ALTER TABLE cliente_pecas RENAME TO cliente_pecas_antiga")
+    con.execute(
+        """
+        CREATE TABLE cliente_pecas (
+            cliente_id      TEXT NOT NULL REFERENCES clientes (id) ON DELETE CASCADE,
+            posicao         INTEGER NOT NULL,
+            codigo          TEXT NOT NULL,
+            personalizacao  TEXT,
+            PRIMARY KEY (cliente_id, posicao)
+        )
+        """
+    )
+    linhas = con.execute(
+        """
+        SELECT a.cliente_id, a.posicao, a.codigo, a.nome, a.descricao, a.imagem,
+               p.codigo AS existe, p.nome AS p_nome, p.descricao AS p_descricao, p.imagem AS p_imagem
+        FROM cliente_pecas_antiga a
+        LEFT JOIN produtos p ON p.codigo = a.codigo
+        """
+    ).fetchall()
+
+    def personalizacao(linha):
+        campos = {
+            campo: linha[campo]
+            for campo in CAMPOS_PERSONALIZAVEIS
+            if linha[campo] not in (None, "")
+            and (linha["existe"] is None or linha[campo] != linha[f"p_{campo}"])
+        }
+        return json.dumps(campos, ensure_ascii=False) if campos else None
+
+    con.executemany(
+        "INSERT INTO cliente_pecas (cliente_id, posicao, codigo, personalizacao) VALUES (?, ?, ?, ?)",
+        [(l["cliente_id"], l["posicao"], l["codigo"], personalizacao(l)) for l in linhas],
+    )
+    con.execute("DROP TABLE cliente_pecas_antiga")
+    con.execute("COMMIT")
+
+
+@contextmanager
+def transacao():
+    """Agrupa várias gravações em uma única transação atômica."""
+    global _versao
+
+    con = conectar()
+    with _lock:
+        if con.in_transaction:
+            # transação aninhada: o SAVEPOINT desfaz só a parte dela se
+            # algo falhar; a externa decide o commit
+            con.execute("SAVEPOINT aninhada")
+            try:
+                yield con
+            except BaseException:
+                con.execute("ROLLBACK TO aninhada")
+                con.execute("RELEASE aninhada")
+                raise
+            con.execute("RELEASE aninhada")
+            return
+
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            yield con
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+        con.execute("COMMIT")
+        _versao += 1
+
+
+def _produtos_alterados(con):
+    con.execute(
+        "UPDATE metadados SET valor = CAST(valor AS INTEGER) + 1 WHERE chave = 'versao_produtos'"
+    )
+
+
+def chave_produtos():
+    """Muda só quando os produtos mudam (e é diferente para cada banco criado)."""
+    valores = dict(conectar().execute(
+        "SELECT chave, valor FROM metadados WHERE chave IN ('id_banco', 'versao_produtos')"
+    ).fetchall())
+    return f"{valores['id_banco']}:{valores['versao_produtos']}"
+
+
+def assinatura():
+    """Identifica o estado atual do banco (muda a cada gravação, de qualquer processo)."""
+    conectar()
+    partes = [_versao]
+    for caminho in (DB_FILE, DB_FILE + "-wal"):
+        try:
+            stat = os.stat(caminho)
+            partes.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            partes.append(None)
+    return tuple(partes)
+
+
+# ===========================
+# PRODUTOS
+# ===========================
+def _linha_para_produto(linha):
+    return {campo: linha[campo] for campo in CAMPOS_PRODUTO}
+
+
+def obter_produto(codigo):
+    linha = conectar().execute(
+        "SELECT codigo, nome, descricao, imagem FROM produtos WHERE codigo = ?",
+        (codigo,),
+    ).fetchone()
+    return _linha_para_produto(linha) if linha else None
+
+
+def obter_produtos(codigos, tamanho_lote=500):
+    """{codigo: produto} dos códigos existentes, consultados em lotes."""
+    con = conectar()
+    encontrados = {}
+    for i in range(0, len(codigos), tamanho_lote):
+        lote = codigos[i:i + tamanho_lote]
+        marcadores = ", ".join("?" * len(lote))
+        for linha in con.execute(
+            f"SELECT codigo, nome, descricao, imagem FROM produtos WHERE codigo IN ({marcadores})",
+            lote,
+        ):
+            encontrados[linha["codigo"]] = _linha_para_produto(linha)
+    return encontrados
+
+
+def listar_produtos():
+    linhas = conectar().execute(
+        "SELECT codigo, nome, descricao, imagem FROM produtos ORDER BY rowid"
+    )
+    return [_linha_para_produto(linha) for linha in linhas]
+
+
+def iterar_produtos():
+    """Percorre os produtos sem montar a lista inteira (exportações grandes)."""
+    for linha in conectar().execute(
+        "SELECT codigo, nome, descricao, imagem FROM produtos ORDER BY rowid"
+    ):
+        yield _linha_para_produto(linha)
+
+
+def pagina_produtos(apos=None, limite=100):
+    """Até `limite` produtos em ordem de código, a partir do código seguinte a `apos`."""
+    sql = "SELECT codigo, nome, descricao, imagem FROM produtos"
+    params = []
+    if apos is not None:
+        sql += " WHERE codigo > ?"
+        params.append(apos)
+    sql += " ORDER BY codigo LIMIT ?"
+    params.append(limite)
+    return [_linha_para_produto(linha) for linha in conectar().execute(sql, params)]
+
+
+def iterar_lotes_por_codigo(tamanho_lote=50000):
+    """Listas de tuplas (codigo, nome, descricao, imagem) em ordem de código."""
+    cursor = conectar().execute(
+        "SELECT codigo, nome, descricao, imagem FROM produtos ORDER BY codigo"
+    )
+    while True:
+        lote = cursor.fetchmany(tamanho_lote)
+        if not lote:
+            return
+        yield [tuple(linha) for linha in lote]
+
+
+@medido("storage.salvar_produto")
+def salvar_produto(produto):
+    """Insere ou atualiza um único produto (uma linha) e registra no log de alterações."""
+    produto = {campo: produto.get(campo) for campo in CAMPOS_PRODUTO}
+    with transacao() as con:
+        _upsert_produto(con, produto)
+        _produtos_alterados(con)
+        # dentro da transação: a ordem do log é a mesma das gravações, e
+        # compactar_produtos (que também abre uma transação) não roda
+        # entre esta linha do log e o COMMIT
+        alteracoes.anexar({"op": "salvar", "produto": produto})
+
+
+@medido("storage.salvar_produtos")
+def salvar_produtos(produtos):
+    """Versão em lote de salvar_produto: uma transação e uma escrita no log."""
+    produtos = [{campo: p.get(campo) for campo in CAMPOS_PRODUTO} for p in produtos]
+    with transacao() as con:
+        con.executemany(UPSERT_PRODUTO, produtos)
+        _produtos_alterados(con)
+        alteracoes.anexar_varias({"op": "salvar", "produto": p} for p in produtos)
+    return len(produtos)
+
+
+def _upsert_produto(con, produto):
+    con.execute(UPSERT_PRODUTO, {campo: produto.get(campo) for campo in CAMPOS_PRODUTO})
+
+
+def remover_produto(codigo):
+    with transacao() as con:
+        con.execute("DELETE FROM produtos WHERE codigo = ?", (codigo,))
+        _produtos_alterados(con)
+        alteracoes.anexar({"op": "remover", "codigo": codigo})
+
+
+def _aplicar_alteracao(con, entrada):
+    if entrada.get("op") == "salvar":
+        _upsert_produto(con, entrada["produto"])
+    elif entrada.get("op") == "remover":
+        con.execute("DELETE FROM produtos WHERE codigo = ?", (entrada["codigo"],))
+
+
+# ===========================
+# CLIENTES
+# ===========================
+def listar_clientes(ordem="cliente", vendedor=None, limite=None, deslocamento=0, apos=None):
+    """Resumo dos clientes (sem as peças), ordenado e opcionalmente filtrado/paginado.
+
+    `apos` (com ordem="id") pagina por cursor: só ids maiores que ele.
+    """
+    sql = "SELECT id, cliente, vendedor, contato, qtd_pecas FROM clientes"
+    condicoes = []
+    params = []
+
+    if vendedor is not None:
+        condicoes.append("vendedor = ?")
+        params.append(vendedor)
+    if apos is not None:
+        condicoes.append("id > ?")
+        params.append(apos)
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+
+    sql += f" ORDER BY {ORDENACOES[ordem]}"
+
+    if limite is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limite, deslocamento]
+
+    return [dict(linha) for linha in conectar().execute(sql, params)]
+
+
+def contar_clientes(vendedor=None):
+    if vendedor is None:
+        return conectar().execute("SELECT COUNT(*) FROM clientes").fetchone()[0]
+    return conectar().execute(
+        "SELECT COUNT(*) FROM clientes WHERE vendedor = ?", (vendedor,)
+    ).fetchone()[0]
+
+
+def listar_vendedores():
+    return [
+        linha[0] for linha in conectar().execute(
+            "SELECT DISTINCT vendedor FROM clientes ORDER BY vendedor COLLATE NOCASE"
+        )
+    ]
+
+
+def iterar_pecas_clientes():
+    """Uma linha por peça de cada catálogo (id, cliente, vendedor, contato, posicao, codigo, personalizacao)."""
+    for linha in conectar().execute(
+        """
+        SELECT c.id, c.cliente, c.vendedor, c.contato, cp.posicao, cp.codigo, cp.personalizacao
+        FROM clientes c
+        JOIN cliente_pecas cp ON cp.cliente_id = c.id
+        ORDER BY c.id, cp.posicao
+        """
+    ):
+        yield dict(linha)
+
+
+def versao_cliente(cliente_id):
+    """Versão atual do catálogo (0 se o cliente não existe)."""
+    linha = conectar().execute("SELECT versao FROM clientes WHERE id = ?", (cliente_id,)).fetchone()
+    return linha["versao"] if linha else 0
+
+
+@medido("storage.carregar_cliente")
+def carregar_cliente(cliente_id):
+    """Catálogo no formato normalizado (ver utils/catalogo.py) ou None."""
+    con = conectar()
+    linha = con.execute(
+        "SELECT cliente, vendedor, contato, itens_invalidos FROM clientes WHERE id = ?",
+        (cliente_id,),
+    ).fetchone()
+
+    if linha is None:
+        return None
+
+    pecas = []
+    personalizacoes = {}
+    for p in con.execute(
+        "SELECT codigo, personalizacao FROM cliente_pecas "
+        "WHERE cliente_id = ? ORDER BY posicao",
+        (cliente_id,),
+    ):
+        pecas.append(p["codigo"])
+        if p["personalizacao"]:
+            personalizacoes[p["codigo"]] = json.loads(p["personalizacao"])
+
+    dados = {campo: linha[campo] for campo in ("cliente", "vendedor", "contato")}
+    dados["formato"] = FORMATO_ATUAL
+    dados["pecas"] = pecas
+    dados["personalizacoes"] = personalizacoes
+    if linha["itens_invalidos"]:
+        dados["itens_invalidos"] = json.loads(linha["itens_invalidos"])
+    return dados
+
+
+@medido("storage.salvar_cliente")
+def salvar_cliente(cliente_id, dados, versao_esperada=None):
+    """Grava os dados do cliente e substitui apenas as peças DESTE cliente.
+
+    Aceita um utils.modelo.Catalogo, o formato antigo ou o normalizado;
+    sempre grava só os códigos (no formato antigo, o que difere do
+    produto vira personalização).
+    Com `versao_esperada` (lida com versao_cliente antes de editar), a
+    gravação só acontece se ninguém salvou o catálogo nesse meio tempo;
+    senão levanta ConflitoVersao. Devolve a nova versão.
+    """
+    if isinstance(dados, Catalogo):
+        dados = dados.para_dict()
+    produtos = None
+    if formato_antigo(dados):
+        produtos = obter_produtos([c for c in codigos_do_catalogo(dados) if isinstance(c, str)])
+    dados = normalizar_catalogo(dados, produtos)
+    pecas = dados["pecas"]
+    personalizacoes = dados["personalizacoes"]
+    invalidos = json.dumps(dados["itens_invalidos"], ensure_ascii=False) if dados["itens_invalidos"] else None
+
+    with transacao() as con:
+        if versao_esperada is not None:
+            atual = versao_cliente(cliente_id)
+            if atual != versao_esperada:
+                raise ConflitoVersao(
+                    f"catálogo '{cliente_id}' está na versão {atual}, esperada {versao_esperada}"
+                )
+
+        con.execute(
+            """
+            INSERT INTO clientes (id, cliente, vendedor, contato, qtd_pecas, versao, itens_invalidos)
+            VALUES (?, ?, ?, ?, ?, 1, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                cliente = excluded.cliente,
+                vendedor = excluded.vendedor,
+                contato = excluded.contato,
+                qtd_pecas = excluded.qtd_pecas,
+                versao = clientes.versao + 1,
+                itens_invalidos = excluded.itens_invalidos
+            """,
+            (
+                cliente_id,
+                dados.get("cliente", ""),
+                dados.get("vendedor", ""),
+                dados.get("contato", ""),
+                len(pecas),
+                invalidos,
+            ),
+        )
+        con.execute("DELETE FROM cliente_pecas WHERE cliente_id = ?", (cliente_id,))
+        con.executemany(
+            "INSERT INTO cliente_pecas (cliente_id, posicao, codigo, personalizacao) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (
+                    cliente_id,
+                    posicao,
+                    codigo,
+                    json.dumps(personalizacoes[codigo], ensure_ascii=False)
+                    if codigo in personalizacoes else None,
+                )
+                for posicao, codigo in enumerate(pecas)
+            ],
+        )
+        return versao_cliente(cliente_id)
+
+
+# ===========================
+# MIGRAÇÃO / EXPORTAÇÃO JSON
+# ===========================
+def migrar_json(produtos_json=PRODUTOS_JSON, clientes_dir=CLIENTES_DIR,
+                alteracoes_jsonl=alteracoes.ALTERACOES_JSONL):
+    """Importa database.json (+ log de alterações) e clientes/*.json para o banco em uma transação."""
+    with transacao() as con:
+        if os.path.exists(produtos_json):
+            with open(produtos_json, "r", encoding="utf-8") as f:
+                produtos = json.load(f)
+            con.executemany(
+                "INSERT OR REPLACE INTO produtos (codigo, nome, descricao, imagem) "
+                "VALUES (:codigo, :nome, :descricao, :imagem)",
+                [{campo: p.get(campo) for campo in CAMPOS_PRODUTO} for p in produtos],
+            )
+
+        # snapshot + cauda do log = estado atual
+        for entrada in alteracoes.ler(alteracoes_jsonl):
+            _aplicar_alteracao(con, entrada)
+        _produtos_alterados(con)
+
+        # arquivos com erro ficam de fora e sem registro: o próximo
+        # sincronizar_clientes_json tenta de novo e avisa na página
+        for caminho in sorted(glob.glob(os.path.join(clientes_dir, "*.json"))):
+            try:
+                _importar_cliente_json(caminho, os.stat(caminho))
+            except ERROS_ARQUIVO_CLIENTE:
+                continue
+
+
+# JSON inválido ou pela metade, estrutura inesperada, código vazio...
+ERROS_ARQUIVO_CLIENTE = (OSError, ValueError, KeyError, TypeError, AttributeError)
+
+
+def _importar_cliente_json(caminho, stat):
+    cliente_id = os.path.splitext(os.path.basename(caminho))[0]
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    if not isinstance(dados, dict):
+        raise ValueError("o arquivo não contém um objeto JSON")
+
+    with transacao():
+        salvar_cliente(cliente_id, dados)
+        _registrar_arquivo(caminho, stat)
+
+
+def _registrar_arquivo(caminho, stat):
+    with transacao() as con:
+        con.execute(
+            "INSERT OR REPLACE INTO arquivos_json (caminho, mtime_ns, tamanho) VALUES (?, ?, ?)",
+            (caminho, stat.st_mtime_ns, stat.st_size),
+        )
+
+
+def sincronizar_clientes_json(clientes_dir=CLIENTES_DIR):
+    """Reimporta os clientes/*.json alterados por fora (ex.: git pull).
+
+    Compara só mtime/tamanho com o registrado na última importação ou
+    exportação; arquivos inalterados não são abertos. Devolve
+    (quantos foram reimportados, [(caminho, erro)] dos que falharam):
+    um arquivo com erro é pulado e os demais seguem.
+    """
+    conhecidos = {
+        linha["caminho"]: (linha["mtime_ns"], linha["tamanho"])
+        for linha in conectar().execute("SELECT caminho, mtime_ns, tamanho FROM arquivos_json")
+    }
+
+    alterados = []
+    try:
+        with os.scandir(clientes_dir) as entradas:
+            for entrada in entradas:
+                if not entrada.name.endswith(".json"):
+                    continue
+                caminho = os.path.join(clientes_dir, entrada.name)
+                stat = entrada.stat()
+                if conhecidos.get(caminho) != (stat.st_mtime_ns, stat.st_size):
+                    alterados.append((caminho, stat))
+    except FileNotFoundError:
+        return 0, []
+
+    importados, erros = 0, []
+    for caminho, stat in alterados:
+        try:
+            _importar_cliente_json(caminho, stat)
+        except ERROS_ARQUIVO_CLIENTE as e:
+            erros.append((caminho, str(e)))
+        else:
+            importados += 1
+    return importados, erros
+
+
+@medido("storage.exportar_produtos_json")
+def exportar_produtos_json(caminho=PRODUTOS_JSON):
+    # ler antes de gravar: a primeira conexão pode migrar a partir do arquivo.
+    # A leitura fica dentro da trava para que um export mais antigo nunca
+    # sobrescreva um mais novo.
+    conectar()
+    with trava_arquivo(caminho):
+        produtos = listar_produtos()
+        gravar_atomico(caminho, json.dumps(produtos, indent=2, ensure_ascii=False))
+    return caminho
+
+
+@medido("storage.compactar_produtos")
+def compactar_produtos(caminho=PRODUTOS_JSON, alteracoes_jsonl=alteracoes.ALTERACOES_JSONL):
+    """Incorpora o log de alterações ao snapshot e esvazia o log.
+
+    Devolve {caminho: conteúdo} dos dois arquivos lidos dentro da mesma
+    trava do log, para que sejam enviados juntos: nenhuma edição entra
+    entre o snapshot e o log vazio.
+
+    A transação (BEGIN IMMEDIATE) espera as gravações de produtos em
+    andamento, que anexam ao log antes do COMMIT: sem ela, o snapshot
+    sairia sem uma edição já registrada no log que está sendo esvaziado.
+    """
+    with transacao(), trava_arquivo(alteracoes_jsonl):
+        exportar_produtos_json(caminho)
+        alteracoes.limpar(alteracoes_jsonl)
+        with open(caminho, "rb") as f:
+            snapshot = f.read()
+    return {caminho: snapshot, alteracoes_jsonl: b""}
+
+
+@medido("storage.exportar_cliente_json")
+def exportar_cliente_json(cliente_id, clientes_dir=CLIENTES_DIR):
+    caminho = os.path.join(clientes_dir, f"{cliente_id}.json")
+    with trava_arquivo(caminho):
+        dados = carregar_cliente(cliente_id)
+        gravar_atomico(caminho, json.dumps(dados, indent=4, ensure_ascii=False))
+        _registrar_arquivo(caminho, os.stat(caminho))
+    return caminho
@@ -0,0 +1,184 @@
+import io
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+from utils.instrumentacao import medido
+from utils.miniaturas import gerar_derivados
+
+# -----------------------------------------------------------
+# Processamento das imagens enviadas pelo admin.
+#
+# A página só lê os bytes do upload, confere o formato pelo
+# conteúdo (não pela extensão) e entrega o trabalho à fila;
+# decodificar, desvirar pela orientação EXIF, reduzir, regravar
+# sem metadados e gerar as miniaturas acontece em threads de
+# um pool (o PIL libera o GIL nessas etapas). Só depois disso
+# a função `publicar` do job grava o produto/catálogo, então
+# nenhuma peça aponta para uma imagem que ainda não existe.
+# -----------------------------------------------------------
+IMAGENS_DIR = "imagens"
+TRABALHADORES = min(4, os.cpu_count() or 1)
+LADO_MAXIMO = 2000      # px; fotos de celular maiores que isso são reduzidas
+QUALIDADE_JPEG = 90
+JOBS_GUARDADOS = 100    # jobs concluídos mantidos para o status
+
+# assinatura no início do arquivo -> extensão gravada
+_ASSINATURAS = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+)
+
+_FORMATOS_PIL = {"png": "PNG", "jpg": "JPEG", "webp": "WEBP"}
+
+
+class ErroImagem(ValueError):
+    pass
+
+
+def detectar_formato(conteudo):
+    """Extensão ("png", "jpg" ou "webp") pelos primeiros bytes, ou ErroImagem."""
+    for assinatura, ext in _ASSINATURAS:
+        if conteudo.startswith(assinatura):
+            return ext
+    if conteudo[:4] == b"RIFF" and conteudo[8:12] == b"WEBP":
+        return "webp"
+    raise ErroImagem("Arquivo não é uma imagem PNG, JPG ou WEBP.")
+
+
+@medido("uploads.processar")
+def _processar(conteudo, ext, destino):
+    with Image.open(io.BytesIO(conteudo)) as img:
+        img = ImageOps.exif_transpose(img)  # aplica a orientação e descarta o EXIF
+        img.thumbnail((LADO_MAXIMO, LADO_MAXIMO))
+
+        opcoes = {}
+        if img.info.get("icc_profile"):
+            opcoes["icc_profile"] = img.info["icc_profile"]
+        if ext == "jpg":
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            opcoes.update(quality=QUALIDADE_JPEG, optimize=True)
+        elif ext == "png":
+            opcoes["optimize"] = True
+
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        tmp = f"{destino}.{threading.get_ident()}.tmp"
+        img.save(tmp, _FORMATOS_PIL[ext], **opcoes)
+    os.replace(tmp, destino)
+
+    gerar_derivados(destino)
+    return destino
+
+
+# ===========================
+# FILA
+# ===========================
+_lock = threading.Lock()
+_executor = None
+_jobs = OrderedDict()  # id -> situação (mais recentes no fim)
+
+
+def _obter_executor():
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=TRABALHADORES, thread_name_prefix="uploads")
+        return _executor
+
+
+def _atualizar(job_id, **campos):
+    with _lock:
+        _jobs[job_id].update(campos)
+
+
+def _executar(job_id, conteudo, ext, destino, publicar, ao_falhar):
+    _atualizar(job_id, situacao="processando")
+    try:
+        caminho = _processar(conteudo, ext, destino)
+        if publicar is not None:
+            publicar(caminho)
+    except Exception as e:
+        # antes de marcar o fim: quem espera o job já encontra o erro registrado
+        if ao_falhar is not None:
+            ao_falhar(str(e))
+        _atualizar(job_id, situacao="erro", erro=str(e), fim=time.time())
+    else:
+        _atualizar(job_id, situacao="publicado", fim=time.time())
+
+
+def enviar_imagem(arquivo, nome_base, descricao, publicar=None, imagens_dir=IMAGENS_DIR, ao_falhar=None):
+    """Aceita o upload e devolve na hora o caminho final da imagem.
+
+    `arquivo` é o UploadedFile (ou bytes); `nome_base` vira
+    <imagens_dir>/<nome_base>.<ext do conteúdo>. `publicar(caminho)`
+    roda no pool depois que a imagem e as miniaturas estão gravadas;
+    se o processamento ou o `publicar` falhar, roda `ao_falhar(mensagem)`.
+    Levanta ErroImagem se o conteúdo não for uma imagem aceita.
+    """
+    conteudo = arquivo if isinstance(arquivo, bytes) else arquivo.getvalue()
+    ext = detectar_formato(conteudo)
+    destino = f"{imagens_dir}/{nome_base}.{ext}"
+
+    job_id = uuid.uuid4().hex[:8]
+    with _lock:
+        _jobs[job_id] = {"id": job_id, "descricao": descricao, "caminho": destino,
+                         "situacao": "na fila", "erro": None, "inicio": time.time(), "fim": None}
+        concluidos = [j for j, job in _jobs.items() if job["fim"] is not None]
+        for antigo in concluidos[:max(0, len(concluidos) - JOBS_GUARDADOS)]:
+            del _jobs[antigo]
+
+    _obter_executor().submit(_executar, job_id, conteudo, ext, destino, publicar, ao_falhar)
+    return destino
+
+
+def processar_lote(imagens):
+    """Processa pares (conteudo, destino) como enviar_imagem, no mesmo pool, e espera.
+
+    Gera (destino, erro) na ordem recebida; `erro` é None quando a imagem
+    e as miniaturas foram gravadas. `imagens` é consumido aos poucos (pode
+    ser um gerador lendo de um zip), com poucas imagens na memória por vez.
+    """
+    executor = _obter_executor()
+    janela = deque()
+    for conteudo, destino in imagens:
+        ext = os.path.splitext(destino)[1].lstrip(".")
+        janela.append((destino, executor.submit(_processar, conteudo, ext, destino)))
+        if len(janela) >= TRABALHADORES * 2:
+            yield _resultado(*janela.popleft())
+    while janela:
+        yield _resultado(*janela.popleft())
+
+
+def _resultado(destino, futuro):
+    try:
+        futuro.result()
+    except Exception as e:
+        return destino, str(e)
+    return destino, None
+
+
+def status():
+    """Jobs em andamento e os concluídos mais recentes (mais novos primeiro)."""
+    with _lock:
+        jobs = [dict(job) for job in reversed(_jobs.values())]
+    return {
+        "pendentes": [j for j in jobs if j["fim"] is None],
+        "concluidos": [j for j in jobs if j["fim"] is not None],
+    }
+
+
+def aguardar(timeout=None):
+    """Bloqueia até não haver jobs pendentes (útil em scripts e testes)."""
+    limite = None if timeout is None else time.monotonic() + timeout
+    while status()["pendentes"]:
+        if limite is not None and time.monotonic() >= limite:
+            return False
+        time.sleep(0.05)
+    return True